@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import inspect
+import os
+import sys
+
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.vars.clean import remove_internal_keys
+
+from ansible_collections.rhoas.rhoas.plugins.plugin_utils.inprocess import run_module_in_process
+
+# The strategy loads action plugins in the main ansible-playbook process, importing the SDKs here means every
+# fork starts with them already imported
+try:
+    import rhoas_kafka_mgmt_sdk  # noqa: F401
+    import rhoas_kafka_instance_sdk  # noqa: F401
+    import rhoas_service_accounts_mgmt_sdk  # noqa: F401
+    HAS_RHOAS_SDKS = True
+except ImportError:
+    HAS_RHOAS_SDKS = False
+
+# Connection plugins whose tasks run on the controller
+LOCAL_CONNECTIONS = ('local', 'ansible.builtin.local')
+
+
+class ActionModule(ActionBase):
+    # Runs the rhoas modules inside the controller process when they target the controller. This skips
+    # building and transferring the AnsiballZ payload and starting a new interpreter that has to import the
+    # SDKs again, and lets a task reuse the SDK API clients of earlier loop items. Any other task is run as a
+    # normal module. Set RHOAS_INPROCESS=false to always run the modules as normal modules.
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        # The modules are routed to this action plugin, so `resolved_action` names the plugin and not the module
+        module_name = self._shared_loader_obj.module_loader.find_plugin_with_context(
+            self._task.action, collection_list=self._task.collections).resolved_fqcn
+        if not self._can_run_in_process(task_vars):
+            result.update(self._execute_module(module_name=module_name, task_vars=task_vars))
+            return result
+
+        module_args = self._task.args.copy()
+        self._update_module_args(module_name, module_args, task_vars)
+        stdout, rc = run_module_in_process(module_name.split('.')[-1], module_args, self._task_environment())
+        res = dict(stdout=stdout, stderr='', rc=rc)
+        if 'profile' in inspect.signature(self._parse_returned_data).parameters:
+            data = self._parse_returned_data(res, 'legacy')
+        else:
+            data = self._parse_returned_data(res)
+        remove_internal_keys(data)
+        result.update(data)
+        return result
+
+    def _can_run_in_process(self, task_vars):
+        if not HAS_RHOAS_SDKS or not boolean(os.environ.get('RHOAS_INPROCESS', True), strict=False):
+            return False
+        if self._connection._load_name not in LOCAL_CONNECTIONS:
+            return False
+        if self._task.async_val or self._play_context.become:
+            return False
+        # A task pointed at another interpreter, such as a virtualenv with other SDK versions, keeps using it
+        interpreter = task_vars.get('ansible_python_interpreter')
+        if interpreter and self._templar.template(interpreter) not in (sys.executable, task_vars.get('ansible_playbook_python')):
+            return False
+        return True
+
+    def _task_environment(self):
+        environment = dict()
+        environments = self._task.environment or []
+        if not isinstance(environments, list):
+            environments = [environments]
+        for task_environment in environments:
+            if task_environment:
+                environment.update(self._templar.template(task_environment))
+        return environment
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: rhoas_profile
+
+short_description: Summarises the API calls and timings of the RHOAS tasks of a playbook run.
+
+version_added: "0.1.1"
+
+type: aggregate
+
+description:
+    - Collects the C(timings) returned by the RHOAS modules when profiling is enabled and prints a summary when the playbook ends.
+    - The summary has the number of calls and the p50, p95 and p99 latency of every API endpoint, the time spent exchanging tokens, resolving admin URLs,
+      waiting for Kafka instances and doing the rest of the work, the time spent in calls creating, updating or deleting resources, and the slowest tasks.
+    - Unless C(RHOAS_PROFILE) is already set, enabling the callback sets it, so tasks running on the controller are profiled without setting the C(profile) option of every task.
+      Tasks on other hosts need the C(profile) option or C(RHOAS_PROFILE) in their C(environment).
+
+requirements:
+    - Enable the callback with C(callbacks_enabled = rhoas.rhoas.rhoas_profile) in the C([defaults]) section of C(ansible.cfg), or with C(ANSIBLE_CALLBACKS_ENABLED).
+
+options:
+    output_file:
+        description: Also write the summary to this file as JSON.
+        type: path
+        env:
+            - name: RHOAS_PROFILE_OUTPUT
+        ini:
+            - section: callback_rhoas_profile
+              key: output_file
+    slowest_tasks:
+        description: Number of slowest tasks listed in the summary.
+        type: int
+        default: 10
+        env:
+            - name: RHOAS_PROFILE_SLOWEST_TASKS
+        ini:
+            - section: callback_rhoas_profile
+              key: slowest_tasks
+    enable_profiling:
+        description: Set C(RHOAS_PROFILE=true) for the tasks of the run if it is not set already.
+        type: bool
+        default: true
+        ini:
+            - section: callback_rhoas_profile
+              key: enable_profiling
+
+author:
+    - Red Hat Developer
+'''
+
+import json
+import math
+import os
+
+from ansible.plugins.callback import CallbackBase
+
+from ansible_collections.rhoas.rhoas.plugins.module_utils.profiling import PROFILE_PHASES
+
+# Methods of the calls that create, update or delete resources
+MUTATION_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'rhoas.rhoas.rhoas_profile'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, *args, **kwargs):
+        super(CallbackModule, self).__init__(*args, **kwargs)
+        self._calls = {}
+        self._phases_ms = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self._tasks = []
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        # The workers and the module processes they start on the controller inherit the environment
+        if self.get_option('enable_profiling') and 'RHOAS_PROFILE' not in os.environ:
+            os.environ['RHOAS_PROFILE'] = 'true'
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def _record(self, result):
+        # Loop tasks report the timings of every item in `results`
+        task_result = result._result
+        loop_results = task_result.get('results')
+        for item_result in loop_results or [task_result]:
+            timings = item_result.get('timings') if isinstance(item_result, dict) else None
+            if not isinstance(timings, dict) or 'calls' not in timings or 'phases' not in timings:
+                continue
+            for call in timings['calls']:
+                self._calls.setdefault(f"{call['method']} {call['endpoint']}", []).append(call)
+            for phase in PROFILE_PHASES:
+                self._phases_ms[phase] += timings['phases'].get(phase, 0.0)
+            task_name = result._task.get_name()
+            if loop_results:
+                task_name = f'{task_name} ({self._get_item_label(item_result)})'
+            self._tasks.append(dict(
+                host=result._host.get_name(),
+                task=task_name,
+                action=result._task.action,
+                total_ms=timings.get('total_ms', 0.0),
+                calls=len(timings['calls']),
+                failed=bool(item_result.get('failed')),
+            ))
+
+    def summary(self):
+        endpoints = {}
+        for endpoint, calls in sorted(self._calls.items()):
+            latencies = sorted(call['latency_ms'] for call in calls)
+            endpoints[endpoint] = dict(
+                calls=len(calls),
+                errors=sum(1 for call in calls if call['status'] is None or call['status'] >= 400),
+                retries=sum(call.get('retries', 0) for call in calls),
+                total_ms=round(sum(latencies), 1),
+                p50_ms=percentile(latencies, 50),
+                p95_ms=percentile(latencies, 95),
+                p99_ms=percentile(latencies, 99),
+            )
+        return dict(
+            tasks=len(self._tasks),
+            calls=sum(endpoint['calls'] for endpoint in endpoints.values()),
+            phases_ms={phase: round(ms, 1) for phase, ms in self._phases_ms.items()},
+            mutations_ms=round(sum(call['latency_ms'] for calls in self._calls.values() for call in calls if call['method'] in MUTATION_METHODS), 1),
+            endpoints=endpoints,
+            slowest_tasks=sorted(self._tasks, key=lambda task: task['total_ms'], reverse=True)[:self.get_option('slowest_tasks')],
+        )
+
+    def v2_playbook_on_stats(self, stats):
+        if not self._tasks:
+            return
+        summary = self.summary()
+        self._display.banner('RHOAS PROFILE')
+        self._display.display(f"{summary['tasks']} profiled tasks made {summary['calls']} API calls")
+        phases = summary['phases_ms']
+        self._display.display(
+            f"Token exchange: {phases['auth'] / 1000:.2f}s, admin URL lookups: {phases['resolve'] / 1000:.2f}s, "
+            f"waiting for instances: {phases['wait'] / 1000:.2f}s, other work: {phases['execute'] / 1000:.2f}s "
+            f"(of which {summary['mutations_ms'] / 1000:.2f}s in create, update and delete calls)"
+        )
+        if summary['endpoints']:
+            width = max(len(endpoint) for endpoint in summary['endpoints'])
+            self._display.display('')
+            self._display.display(f"{'ENDPOINT':<{width}} {'CALLS':>6} {'ERRORS':>6} {'RETRIES':>7} {'P50 MS':>8} {'P95 MS':>8} {'P99 MS':>8} {'TOTAL S':>8}")
+            for endpoint, stat in summary['endpoints'].items():
+                self._display.display(
+                    f"{endpoint:<{width}} {stat['calls']:>6} {stat['errors']:>6} {stat['retries']:>7} "
+                    f"{stat['p50_ms']:>8.1f} {stat['p95_ms']:>8.1f} {stat['p99_ms']:>8.1f} {stat['total_ms'] / 1000:>8.2f}"
+                )
+        if summary['slowest_tasks']:
+            self._display.display('')
+            self._display.display('Slowest tasks:')
+            for task in summary['slowest_tasks']:
+                self._display.display(f"  {task['total_ms'] / 1000:>8.2f}s  {task['host']}: {task['task']} ({task['calls']} calls)")
+
+        output_file = self.get_option('output_file')
+        if output_file:
+            with open(os.path.expanduser(output_file), 'w') as f:
+                json.dump(summary, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self._display.display(f'RHOAS profile written to {output_file}')
+
+
+def percentile(sorted_values, percent):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(math.ceil(percent / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
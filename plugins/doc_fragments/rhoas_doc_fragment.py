@@ -22,6 +22,20 @@ class ModuleDocFragment(object):
         
     '''
 
+    # Profiling option shared by every module
+    PROFILE = r'''
+  options:
+    profile:
+      description:
+        - Adds a C(timings) block to the result with the time spent authenticating, resolving the Kafka admin URL, executing and waiting, and with every HTTP call made by the task.
+        - C(timings) has the wall time of the task in milliseconds as C(total_ms), the milliseconds spent in the C(auth), C(resolve), C(execute) and C(wait) phases as C(phases),
+          and the HTTP C(calls) with their C(method), C(endpoint) template, C(status), C(latency_ms), C(retries) and C(phase).
+        - Profiling can also be enabled for every task with the C(RHOAS_PROFILE) environment variable. When C(RHOAS_PROFILE_FILE) is set, the timings of every profiled task are also appended to that file as one JSON object per line.
+      required: false
+      type: bool
+      default: false
+    '''
+
     # Additional section
     OTHER = r'''
     options:
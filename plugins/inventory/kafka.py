@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: kafka
+
+short_description: Red Hat OpenShift Streams for Apache Kafka Instances inventory source.
+
+version_added: "0.1.1"
+
+description:
+    - Lists the Red Hat OpenShift Streams for Apache Kafka Instances of the organization with the same C(get_kafkas) call as the M(rhoas.rhoas.get_kafkas) module and adds each instance as a host.
+    - The fields of each instance, such as C(id), C(bootstrap_server_host), C(admin_api_server_url), C(cloud_provider), C(region) and C(status), are set as host variables.
+      C(name) is reserved by Ansible and is set as C(kafka_name) instead, the id is also set as C(kafka_id).
+    - Hosts are grouped by cloud provider, region and status, for example C(cloud_provider_aws), C(region_us_east_1) and C(status_ready), and are all in the C(rhoas_kafka) group.
+    - Hosts use the C(local) connection, so tasks targeting them run on the controller, with the Python interpreter running Ansible.
+      Set C(ansible_python_interpreter) with I(compose) or in C(group_vars) or C(host_vars) to use another one.
+    - The inventory file name must end with C(rhoas_kafka.yml) or C(rhoas_kafka.yaml).
+
+options:
+    plugin:
+        description: Token that ensures this is a source file for the plugin.
+        required: true
+        choices: ['rhoas.rhoas.kafka']
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+        env:
+            - name: OFFLINE_TOKEN
+    api_base_host:
+        description: The base host for the Kafka Management API.
+        required: false
+        type: str
+        default: https://api.openshift.com
+        env:
+            - name: API_BASE_HOST
+    search:
+        description: Only add the Kafka instances matching this search query, for example C(region = us-east-1).
+        required: false
+        type: str
+        default: ''
+    hostname:
+        description: The field of the Kafka instance used as the inventory hostname.
+        required: false
+        type: str
+        choices: ['name', 'id']
+        default: name
+    page_size:
+        description: Number of Kafka instances requested per page.
+        required: false
+        type: int
+        default: 100
+    concurrency:
+        description: Maximum number of pages fetched at the same time.
+        required: false
+        type: int
+        default: 10
+
+extends_documentation_fragment:
+    - constructed
+    - inventory_cache
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+# inventory.rhoas_kafka.yml
+plugin: rhoas.rhoas.kafka
+search: "status = ready"
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.ansible/tmp/rhoas-inventory
+cache_timeout: 600
+keyed_groups:
+  - key: owner
+    prefix: owner
+
+# Target the instances with host patterns
+# - hosts: region_us_east_1:&status_ready
+#   gather_facts: false
+#   tasks:
+#     - rhoas.rhoas.kafka_topics:
+#         kafka_admin_url: "{{ admin_api_server_url }}"
+#         topics:
+#           - name: "orders"
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible.errors import AnsibleError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+
+# Variables set by inventory plugins are not templated since ansible-core 2.19 unless marked as trusted
+try:
+    from ansible.template import trust_as_template
+except ImportError:
+    def trust_as_template(value):
+        return value
+
+from ansible_collections.rhoas.rhoas.plugins.module_utils.clients import pooled_api_client
+from ansible_collections.rhoas.rhoas.plugins.module_utils.common import get_offline_token
+from ansible_collections.rhoas.rhoas.plugins.module_utils.kafkas import list_kafkas
+
+# Fields of a Kafka instance the hosts are grouped by
+KAFKA_GROUP_BY_FIELDS = ('cloud_provider', 'region', 'status')
+# Fields of a Kafka instance that clash with variable names reserved by Ansible
+KAFKA_RESERVED_FIELDS = dict(name='kafka_name')
+
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
+
+    NAME = 'rhoas.rhoas.kafka'
+
+    def verify_file(self, path):
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('rhoas_kafka.yml', 'rhoas_kafka.yaml'))
+
+    def parse(self, inventory, loader, path, cache=True):
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+
+        cache_key = self.get_cache_key(path)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        kafkas = None
+        if attempt_to_read_cache:
+            try:
+                kafkas = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+        if kafkas is None:
+            kafkas = self._list_kafkas()
+        if cache_needs_update:
+            self._cache[cache_key] = kafkas
+
+        self._populate(kafkas)
+
+    def _list_kafkas(self):
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+
+        api_base_host = self.get_option('api_base_host')
+        if "http://localhost" in api_base_host:
+            access_token = "DUMMY_TOKEN_FOR_MOCK"
+        else:
+            access_token = get_offline_token(self.get_option('openshift_offline_token'))
+
+        configuration = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        configuration.access_token = access_token
+        configuration.connection_pool_maxsize = self.get_option('concurrency')
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client, ThreadPoolExecutor(max_workers=self.get_option('concurrency')) as executor:
+            api_instance = default_api.DefaultApi(api_client)
+            try:
+                total, kafkas = list_kafkas(api_instance, executor, page_size=self.get_option('page_size'), search=self.get_option('search'))
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                raise AnsibleError(f'Failed to get kafka instances with error: `{e.status} {e.reason}` because `{e.body}`')
+            except Exception as e:
+                raise AnsibleError(f'Failed to get kafka instances with error: `{e}`.')
+        return kafkas
+
+    def _populate(self, kafkas):
+        strict = self.get_option('strict')
+        self.inventory.add_group('rhoas_kafka')
+        # The `local` connection would otherwise run the modules under the discovered system Python, which seldom has
+        # the SDKs. Set on the group, so group_vars, host_vars and compose can still point the hosts at another one.
+        self.inventory.set_variable('rhoas_kafka', 'ansible_python_interpreter', trust_as_template('{{ ansible_playbook_python }}'))
+        for kafka in kafkas:
+            host = self.inventory.add_host(kafka[self.get_option('hostname')], group='rhoas_kafka')
+            for field, value in kafka.items():
+                self.inventory.set_variable(host, KAFKA_RESERVED_FIELDS.get(field, field), value)
+            self.inventory.set_variable(host, 'kafka_id', kafka['id'])
+            self.inventory.set_variable(host, 'ansible_connection', 'local')
+
+            for field in KAFKA_GROUP_BY_FIELDS:
+                if kafka.get(field):
+                    group = self.inventory.add_group(self._sanitize_group_name(f'{field}_{kafka[field]}'))
+                    self.inventory.add_child(group, host)
+
+            hostvars = self.inventory.get_host(host).get_vars()
+            self._set_composite_vars(self.get_option('compose'), hostvars, host, strict=strict)
+            self._add_host_to_composed_groups(self.get_option('groups'), hostvars, host, strict=strict)
+            self._add_host_to_keyed_groups(self.get_option('keyed_groups'), hostvars, host, strict=strict)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+name: kafka
+
+short_description: Look up Red Hat OpenShift Streams for Apache Kafka Instances by ID.
+
+version_added: "0.1.1"
+
+description:
+    - Returns the details of Red Hat OpenShift Streams for Apache Kafka Instances, or a single field of them, by ID.
+    - Instances in the C(ready) state are memoised per offline token and Kafka instance ID for the life of the playbook run, and shared by every task and fork of the run.
+      Instances that are not ready yet are only reused for a few seconds, so their C(status) and C(admin_api_server_url) stay current.
+    - The first lookup lists the instances of the organization once with C(get_kafkas), so templating many references costs a single listing.
+      The Kafka Management API cannot search by ID, instances that are not in that listing are fetched concurrently with C(get_kafka_by_id),
+      or with a new listing when that takes fewer calls.
+
+options:
+    _terms:
+        description: IDs of the Kafka instances.
+        required: true
+        type: list
+        elements: str
+    field:
+        description: Only return this field of each Kafka instance, for example C(admin_api_server_url) or C(bootstrap_server_host).
+        required: false
+        type: str
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+        env:
+            - name: OFFLINE_TOKEN
+    api_base_host:
+        description: The base host for the Kafka Management API.
+        required: false
+        type: str
+        default: https://api.openshift.com
+        env:
+            - name: API_BASE_HOST
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+  - name: Create Kafka Topic
+    rhoas.rhoas.create_kafka_topic:
+      topic_name: "kafka-topic-name"
+      kafka_admin_url: "{{ lookup('rhoas.rhoas.kafka', kafka_id, field='admin_api_server_url') }}"
+
+  - name: Print the bootstrap servers of several instances
+    ansible.builtin.debug:
+      msg: "{{ query('rhoas.rhoas.kafka', *kafka_ids, field='bootstrap_server_host') }}"
+'''
+
+RETURN = r'''
+_raw:
+    description: The Kafka instances in the order of the IDs passed in, or the requested field of each of them.
+    type: list
+    elements: raw
+'''
+
+import glob
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from ansible.errors import AnsibleError
+from ansible.plugins.lookup import LookupBase
+
+from ansible_collections.rhoas.rhoas.plugins.module_utils.cache import cache_key, cache_path, file_lock, get_cache_dir, read_json, write_json
+from ansible_collections.rhoas.rhoas.plugins.module_utils.clients import pooled_api_client
+from ansible_collections.rhoas.rhoas.plugins.module_utils.common import get_offline_token
+from ansible_collections.rhoas.rhoas.plugins.module_utils.constants.constants import KAFKA_LIST_PAGE_SIZE, KAFKA_LOOKUP_CACHE_MAX_AGE_SECONDS, KAFKA_LOOKUP_CONCURRENCY, KAFKA_LOOKUP_PENDING_TTL_SECONDS
+from ansible_collections.rhoas.rhoas.plugins.module_utils.kafkas import KAFKA_READY_STATE, list_kafkas
+
+# Kafka instances already looked up by this process, per API host, offline token and playbook run
+_memo = {}
+
+
+class LookupModule(LookupBase):
+
+    def run(self, terms, variables=None, **kwargs):
+        self.set_options(var_options=variables, direct=kwargs)
+        api_base_host = self.get_option('api_base_host')
+        offline_token = self.get_option('openshift_offline_token')
+
+        # Lookups are templated in forked workers, the memo lives as long as the ansible-playbook process they share
+        playbook_pid = os.getppid() if multiprocessing.current_process().name != 'MainProcess' else os.getpid()
+        memo_key = cache_key(api_base_host, offline_token, playbook_pid)
+        try:
+            memo_file = cache_path(f'lookup-kafkas-{memo_key}.json')
+        except OSError:
+            # The memo is only kept in this process when the cache directory cannot be used
+            memo_file = None
+        memo = _memo.setdefault(memo_key, _new_memo())
+        if memo_file is not None and _missing(memo, terms):
+            memo = _memo[memo_key] = _read_memo(memo_file, memo)
+        if _missing(memo, terms):
+            with _memo_lock(memo_file):
+                if memo_file is not None:
+                    memo = _memo[memo_key] = _read_memo(memo_file, memo)
+                missing = _missing(memo, terms)
+                if missing:
+                    found, memo['list_pages'] = self._get_kafkas(api_base_host, offline_token, missing, memo['list_pages'])
+                    # Ready instances are memoised for the run, the status and admin URL of the others are still
+                    # changing and are only reused for a few seconds
+                    fetched = time.time()
+                    for kafka_id, kafka in found.items():
+                        if kafka.get('status') == KAFKA_READY_STATE:
+                            memo['kafkas'][kafka_id] = kafka
+                            memo['pending'].pop(kafka_id, None)
+                        else:
+                            memo['pending'][kafka_id] = dict(kafka=kafka, fetched=fetched)
+                    memo['pending'] = {kafka_id: entry for kafka_id, entry in memo['pending'].items() if _is_fresh(entry)}
+                    if memo_file is not None:
+                        _write_memo(memo_file, memo)
+        kafkas = {**{kafka_id: entry['kafka'] for kafka_id, entry in memo['pending'].items()}, **memo['kafkas']}
+
+        ret = []
+        for kafka_id in terms:
+            kafka = kafkas.get(kafka_id)
+            if kafka is None:
+                raise AnsibleError(f'Kafka instance with ID: {kafka_id} could not be found.')
+            ret.append(kafka.get(self.get_option('field')) if self.get_option('field') else kafka)
+        return ret
+
+    def _get_kafkas(self, api_base_host, offline_token, kafka_ids, list_pages):
+        # Returns the instances found by ID and the number of pages of the last listing. The organization is listed
+        # the first time and whenever that takes fewer calls than fetching the missing instances one by one.
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+
+        if "http://localhost" in api_base_host:
+            access_token = "DUMMY_TOKEN_FOR_MOCK"
+        else:
+            access_token = get_offline_token(offline_token)
+        configuration = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        configuration.access_token = access_token
+        configuration.connection_pool_maxsize = KAFKA_LOOKUP_CONCURRENCY
+
+        def get_kafka(kafka_id):
+            try:
+                response = api_instance.get_kafka_by_id(kafka_id, _preload_content=False)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                if e.status == 404:
+                    return None
+                raise
+            return json.loads(response.data)
+
+        found = {}
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client, ThreadPoolExecutor(max_workers=KAFKA_LOOKUP_CONCURRENCY) as executor:
+            api_instance = default_api.DefaultApi(api_client)
+            try:
+                if not list_pages or len(kafka_ids) >= list_pages:
+                    total, items = list_kafkas(api_instance, executor)
+                    list_pages = max(-(-total // KAFKA_LIST_PAGE_SIZE), 1)
+                    found.update((kafka['id'], kafka) for kafka in items)
+                else:
+                    found.update((kafka['id'], kafka) for kafka in executor.map(get_kafka, kafka_ids) if kafka is not None)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                raise AnsibleError(f'Failed to get kafka instances with error: `{e.status} {e.reason}` because `{e.body}`')
+            except Exception as e:
+                raise AnsibleError(f'Failed to get kafka instances with error: `{e}`.')
+        return found, list_pages
+
+
+def _new_memo():
+    # `list_pages` is the number of pages of the last listing, 0 until the organization has been listed
+    return dict(list_pages=0, kafkas={}, pending={})
+
+
+def _is_fresh(entry):
+    return time.time() - entry['fetched'] < KAFKA_LOOKUP_PENDING_TTL_SECONDS
+
+
+def _missing(memo, kafka_ids):
+    return [kafka_id for kafka_id in kafka_ids if kafka_id not in memo['kafkas'] and not (kafka_id in memo['pending'] and _is_fresh(memo['pending'][kafka_id]))]
+
+
+def _memo_lock(memo_file):
+    lock = ExitStack()
+    if memo_file is not None:
+        try:
+            lock.enter_context(file_lock(memo_file))
+        except OSError:
+            pass
+    return lock
+
+
+def _read_memo(memo_file, default):
+    memo = read_json(memo_file)
+    if not isinstance(memo, dict) or any(not isinstance(memo.get(field), type(value)) for field, value in _new_memo().items()):
+        return default
+    return memo
+
+
+def _write_memo(memo_file, memo):
+    try:
+        write_json(memo_file, memo)
+        _prune_memo_files()
+    except OSError:
+        pass
+
+
+def _prune_memo_files():
+    # Memo files of past playbook runs are removed once they are old enough
+    expired = time.time() - KAFKA_LOOKUP_CACHE_MAX_AGE_SECONDS
+    for path in glob.glob(os.path.join(get_cache_dir(), 'lookup-kafkas-*.json')):
+        try:
+            if os.path.getmtime(path) < expired:
+                os.remove(path)
+                os.remove(f'{path}.lock')
+        except OSError:
+            pass
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import json
+from collections import namedtuple
+from urllib.parse import urlencode
+
+from .constants.constants import ACL_LIST_PAGE_SIZE
+
+# Identity of an ACL binding, two bindings with the same key are the same binding
+AclBindingKey = namedtuple('AclBindingKey', ['resource_type', 'resource_name', 'pattern_type', 'principal', 'operation', 'permission'])
+
+def normalize_principal(principal):
+    # Principals are passed as plain user or service account ids, or already prefixed with `User:`
+    principal = principal.replace(" ", "")
+    if principal.lower().startswith('user:'):
+        return f'User:{principal[len("user:"):]}'
+    return f'User:{principal}'
+
+def acl_binding_key(resource_type, resource_name, pattern_type, principal, operation, permission):
+    # The API expects the enum values in capitals, normalising here lets user input match listed bindings
+    return AclBindingKey(
+        resource_type=resource_type.upper(),
+        resource_name=resource_name,
+        pattern_type=pattern_type.upper(),
+        principal=normalize_principal(principal),
+        operation=operation.upper(),
+        permission=permission.upper(),
+    )
+
+def acl_binding_from_key(key):
+    # The SDK models are imported on first use, listing and comparing bindings only needs the raw JSON
+    from rhoas_kafka_instance_sdk.model.acl_binding import AclBinding
+    from rhoas_kafka_instance_sdk.model.acl_operation import AclOperation as aot
+    from rhoas_kafka_instance_sdk.model.acl_pattern_type import AclPatternType as apt
+    from rhoas_kafka_instance_sdk.model.acl_permission_type import AclPermissionType as apert
+    from rhoas_kafka_instance_sdk.model.acl_resource_type import AclResourceType as art
+    return AclBinding(
+        resource_type=art(key.resource_type),
+        resource_name=key.resource_name,
+        pattern_type=apt(key.pattern_type),
+        principal=key.principal,
+        operation=aot(key.operation),
+        permission=apert(key.permission),
+    )
+
+def list_acl_bindings(acls_api_instance, executor=None, page_size=ACL_LIST_PAGE_SIZE):
+    # Returns the keys of every ACL binding of the instance, read from the raw JSON rather than SDK models
+    first_page = _get_acls_page(acls_api_instance, 1, page_size)
+    pages = [first_page]
+    page_count = -(-first_page.get('total', 0) // page_size)
+    if page_count > 1:
+        fetch = lambda page: _get_acls_page(acls_api_instance, page, page_size)
+        remaining = range(2, page_count + 1)
+        pages.extend(executor.map(fetch, remaining) if executor is not None else map(fetch, remaining))
+    return set(
+        AclBindingKey(
+            resource_type=binding['resourceType'],
+            resource_name=binding['resourceName'],
+            pattern_type=binding['patternType'],
+            principal=binding['principal'],
+            operation=binding['operation'],
+            permission=binding['permission'],
+        )
+        for page in pages for binding in page.get('items') or []
+    )
+
+def _get_acls_page(acls_api_instance, page, page_size):
+    response = acls_api_instance.get_acls(page=page, size=page_size, _preload_content=False)
+    return json.loads(response.data)
+
+# Filters tried when grouping removals, from the broadest to a single binding
+ACL_DELETE_FILTER_FIELDS = (
+    ('principal',),
+    ('principal', 'resource_type'),
+    ('principal', 'resource_type', 'resource_name', 'pattern_type'),
+    AclBindingKey._fields,
+)
+
+def group_acl_removals(existing_bindings, removals):
+    # Groups the bindings to remove into as few delete filters as possible. A filter is only used when every
+    # existing binding it matches is to be removed, so each filter becomes one `delete_acls` call that cannot
+    # remove a binding which should be kept. Returns a list of (filter dict, bindings it removes) tuples.
+    removals = set(removals)
+    remaining = set(removals)
+    groups = []
+    for fields in ACL_DELETE_FILTER_FIELDS:
+        matched = {}
+        for key in existing_bindings:
+            matched.setdefault(tuple(getattr(key, field) for field in fields), set()).add(key)
+        for values in sorted(set(tuple(getattr(key, field) for field in fields) for key in remaining)):
+            bindings = matched.get(values, set())
+            if bindings and bindings <= removals and bindings & remaining:
+                groups.append((dict(zip(fields, values)), bindings))
+                remaining -= bindings
+        if not remaining:
+            break
+    return groups
+
+# Query parameter names of the `DELETE /api/v1/acls` filter
+ACL_DELETE_FILTER_PARAMS = {
+    'resource_type': 'resourceType',
+    'resource_name': 'resourceName',
+    'pattern_type': 'patternType',
+    'principal': 'principal',
+    'operation': 'operation',
+    'permission': 'permission',
+}
+
+def delete_acl_bindings(acls_api_instance, delete_filter):
+    # The generated REST client drops the query string of DELETE requests, so `delete_acls(**filter)` would
+    # remove every binding of the instance. The filter is encoded into the resource path instead.
+    query = urlencode([(ACL_DELETE_FILTER_PARAMS[field], value) for field, value in delete_filter.items()])
+    return acls_api_instance.api_client.call_api(
+        f'/api/v1/acls?{query}', 'DELETE',
+        header_params={'Accept': 'application/json'},
+        auth_settings=['Bearer'],
+        _return_http_data_only=True,
+        _preload_content=False,
+    )
+
+def acl_binding_str(key):
+    return f'{key.principal} {key.permission} {key.operation} on {key.resource_type} {key.pattern_type} {key.resource_name}'
@@ -0,0 +1,59 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+from .constants.constants import CACHE_DIR
+
+
+def get_cache_dir():
+    # RHOAS_CACHE_DIR lets several playbooks (or CI jobs) keep their caches apart
+    path = os.path.expanduser(os.environ.get('RHOAS_CACHE_DIR') or CACHE_DIR)
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    return path
+
+def cache_key(*parts):
+    return hashlib.sha256('\0'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def cache_path(name):
+    return os.path.join(get_cache_dir(), name)
+
+@contextlib.contextmanager
+def file_lock(path):
+    # Exclusive advisory lock held on a sidecar file so that readers never see a half-written cache file
+    with open(f'{path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_json(path, default=None):
+    try:
+        with open(path, 'r') as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, data):
+    # Write to a temporary file first and rename it over the target so the update is atomic
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(data, tmp_file, default=_json_default)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _json_default(obj):
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
@@ -0,0 +1,243 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import json
+import os
+import threading
+import time
+from urllib.parse import urlencode, urlparse
+
+from .cache import cache_key, cache_path, file_lock, read_json, write_json
+from .profiling import current_endpoint_template
+
+# Record and replay of the HTTP exchanges of the modules, so API paths can be benchmarked and regression tested
+# deterministically and without network access.
+#
+# RHOAS_CASSETTE is the path of the cassette, gzipped NDJSON with one exchange per line. With RHOAS_CASSETTE_MODE=record
+# the exchanges with the fleet manager, Kafka admin, service account and SSO APIs are appended to it. Every process
+# appends under a lock, so the tasks and forks of a whole playbook run can record to the same cassette. Request headers
+# are not recorded and the secrets of the responses, client secrets and tokens, are replaced.
+#
+# With RHOAS_CASSETTE_MODE=replay no connection is made and requests are answered from the cassette. Exchanges are
+# matched by method, path, query and request body and replayed in recorded order, so polling an instance goes through
+# the recorded statuses. Once the recorded exchanges of a request are used up the last one is repeated. Requests that
+# were never recorded get a 501 response. RHOAS_CASSETTE_TIMING scales the recorded latency of the responses and the
+# sleeps between polls: 1 (the default) replays the original timing, 0 replays as fast as possible.
+#
+# Recorded cassettes are appended to one gzip member per exchange, `compact_cassette` recompresses them as one.
+#
+# The replay progress is kept in the replay report, RHOAS_CASSETTE_REPORT or a file in the cache directory, shared by
+# the tasks and forks of the run. It also counts the requests recorded and replayed per endpoint and lists the requests
+# that were not in the cassette, so a change making more API calls than the recording shows up in the counts. Remove
+# the report, or use a new one, to replay a cassette from the start again.
+
+CASSETTE_VERSION = 1
+# Fields of the responses whose values are not written to cassettes
+REDACTED_FIELDS = ('client_secret', 'secret', 'access_token', 'refresh_token', 'id_token')
+# Response headers kept in cassettes, the others describe the transfer rather than the response
+RECORDED_HEADERS = ('content-type', 'retry-after')
+SSO_TOKEN_ENDPOINT = '/auth/realms/{realm}/protocol/openid-connect/token'
+
+# Exchanges of the cassette being replayed by this process by request key, and the recorded calls per endpoint
+_replay = None
+_replay_lock = threading.Lock()
+
+def cassette_mode():
+    # 'record', 'replay' or None when no cassette is used
+    if not os.environ.get('RHOAS_CASSETTE'):
+        return None
+    mode = os.environ.get('RHOAS_CASSETTE_MODE', 'replay').lower()
+    if mode not in ('record', 'replay'):
+        raise ValueError(f'Invalid RHOAS_CASSETTE_MODE `{mode}`, expected `record` or `replay`')
+    return mode
+
+def replaying():
+    return cassette_mode() == 'replay'
+
+def timing_scale():
+    return float(os.environ.get('RHOAS_CASSETTE_TIMING', '1'))
+
+def sleep(seconds):
+    # time.sleep for the waits between polls, scaled like the responses when replaying
+    time.sleep(seconds * timing_scale() if replaying() else seconds)
+
+def use_cassette(pool_manager):
+    # Records the requests of the urllib3 pool manager of an SDK client, or answers them from the cassette
+    mode = cassette_mode()
+    if mode == 'record':
+        pool_manager.request = _recorded(pool_manager.request)
+    elif mode == 'replay':
+        pool_manager.request = _replayed
+
+def _recorded(request):
+    def recorded_request(method, url, fields=None, headers=None, **kwargs):
+        started = time.perf_counter()
+        response = request(method, url, fields=fields, headers=headers, **kwargs)
+        # Reading `data` caches the body, the SDK reads the same content afterwards
+        body = response.data
+        record_exchange(
+            method, _request_url(method, url, fields), current_endpoint_template() or urlparse(url).path,
+            _request_body(method, fields, kwargs.get('body')), response.status,
+            {name: value for name, value in response.headers.items() if name.lower() in RECORDED_HEADERS},
+            body.decode('utf-8') if body else '', time.perf_counter() - started,
+        )
+        return response
+    return recorded_request
+
+def _replayed(method, url, fields=None, headers=None, **kwargs):
+    from urllib3.response import HTTPResponse
+    exchange = replay_exchange(method, _request_url(method, url, fields), current_endpoint_template() or urlparse(url).path,
+                               _request_body(method, fields, kwargs.get('body')))
+    if exchange is None:
+        body = json.dumps(dict(code='RHOAS-CASSETTE-1', reason=f'No recorded exchange for {method} {_request_url(method, url, fields)}'))
+        return HTTPResponse(body=body.encode('utf-8'), headers={'Content-Type': 'application/json'}, status=501, preload_content=False)
+    return HTTPResponse(body=exchange['response'].encode('utf-8'), headers=exchange['headers'], status=exchange['status'],
+                        preload_content=False)
+
+def record_exchange(method, url, endpoint, request_body, status, headers, response_body, seconds):
+    exchange = dict(
+        method=method,
+        url=url,
+        endpoint=endpoint,
+        request=request_body,
+        status=status,
+        headers=headers,
+        response=_redact(response_body),
+        elapsed_ms=round(seconds * 1000, 1),
+    )
+    _append(os.environ['RHOAS_CASSETTE'], exchange)
+
+def replay_exchange(method, url, endpoint, request_body):
+    # Returns the recorded exchange answering the request, or None, after sleeping for its scaled latency
+    cassette = _load_replay(os.environ['RHOAS_CASSETTE'])
+    key = _request_key(method, url, request_body)
+    exchanges = cassette['exchanges'].get(key)
+    call = f'{method} {endpoint}'
+    report_file = _report_path()
+    with file_lock(report_file):
+        report = read_json(report_file) or dict(
+            cassette=os.path.abspath(os.environ['RHOAS_CASSETTE']),
+            requests=0,
+            recorded_requests=sum(cassette['calls'].values()),
+            repeated=0,
+            unmatched=[],
+            endpoints={call: dict(recorded=count, replayed=0) for call, count in cassette['calls'].items()},
+            positions={},
+        )
+        position = report['positions'].get(key, 0)
+        report['positions'][key] = position + 1
+        report['requests'] += 1
+        report['endpoints'].setdefault(call, dict(recorded=0, replayed=0))['replayed'] += 1
+        if exchanges is None:
+            report['unmatched'].append(f'{method} {url}')
+        elif position >= len(exchanges):
+            report['repeated'] += 1
+        write_json(report_file, report)
+    if exchanges is None:
+        return None
+    exchange = exchanges[min(position, len(exchanges) - 1)]
+    time.sleep(exchange['elapsed_ms'] / 1000 * timing_scale())
+    return exchange
+
+def record_access_token(token, seconds):
+    # The SSO exchange goes through keycloak rather than an SDK client, it is recorded by `get_access_token`
+    record_exchange('POST', SSO_TOKEN_ENDPOINT, SSO_TOKEN_ENDPOINT, None, 200, {'Content-Type': 'application/json'}, json.dumps(token), seconds)
+
+def replay_access_token():
+    # The recorded token response, its access token redacted. A missing exchange is reported but does not fail the
+    # task, the replayed APIs accept any token.
+    exchange = replay_exchange('POST', SSO_TOKEN_ENDPOINT, SSO_TOKEN_ENDPOINT, None)
+    if exchange is None:
+        return dict(access_token='REDACTED', expires_in=300)
+    return json.loads(exchange['response'])
+
+def _request_url(method, url, fields):
+    # Path and query of the request, urllib3 encodes the fields of GET and DELETE requests into the URL
+    parsed = urlparse(url)
+    query = parsed.query
+    if fields and method.upper() in ('GET', 'HEAD', 'DELETE', 'OPTIONS'):
+        query = '&'.join(part for part in (query, urlencode(fields)) if part)
+    return f'{parsed.path}?{query}' if query else parsed.path
+
+def _request_body(method, fields, body):
+    if fields and method.upper() not in ('GET', 'HEAD', 'DELETE', 'OPTIONS'):
+        return urlencode(fields)
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return body
+
+def _request_key(method, url, request_body):
+    # JSON bodies are compared by content, not by key order or spacing
+    if request_body:
+        try:
+            request_body = json.dumps(json.loads(request_body), sort_keys=True)
+        except ValueError:
+            pass
+    return f'{method.upper()} {url} {request_body or ""}'
+
+def _redact(response_body):
+    try:
+        data = json.loads(response_body)
+    except ValueError:
+        return response_body
+
+    def redact(value):
+        if isinstance(value, dict):
+            return {k: 'REDACTED' if k in REDACTED_FIELDS and v else redact(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [redact(v) for v in value]
+        return value
+    return json.dumps(redact(data), separators=(',', ':'))
+
+def _append(cassette_file, exchange):
+    # Each append is a gzip member of its own, gzip readers return the members of a file as one stream. The first
+    # member written to a new cassette is its header.
+    import gzip
+    cassette_file = os.path.expanduser(cassette_file)
+    lines = []
+    with file_lock(cassette_file):
+        if not os.path.exists(cassette_file) or os.path.getsize(cassette_file) == 0:
+            lines.append(json.dumps(dict(cassette=CASSETTE_VERSION, recorded_at=time.time())))
+        lines.append(json.dumps(exchange, separators=(',', ':')))
+        with open(cassette_file, 'ab') as f:
+            f.write(gzip.compress(''.join(line + '\n' for line in lines).encode('utf-8')))
+
+def read_cassette(cassette_file):
+    # The recorded exchanges of a cassette, in order
+    import gzip
+    with gzip.open(os.path.expanduser(cassette_file), 'rt', encoding='utf-8') as f:
+        return [exchange for exchange in map(json.loads, filter(str.strip, f)) if 'cassette' not in exchange]
+
+def compact_cassette(cassette_file):
+    # Rewrites a recorded cassette as a single gzip member, which compresses the repeated fields of its exchanges
+    # much better than the member appended per exchange while recording
+    import gzip
+    cassette_file = os.path.expanduser(cassette_file)
+    with file_lock(cassette_file):
+        with gzip.open(cassette_file, 'rb') as f:
+            content = f.read()
+        tmp_file = f'{cassette_file}.tmp'
+        with gzip.open(tmp_file, 'wb', compresslevel=9) as f:
+            f.write(content)
+        os.replace(tmp_file, cassette_file)
+    os.unlink(f'{cassette_file}.lock')
+
+def _load_replay(cassette_file):
+    global _replay
+    with _replay_lock:
+        if _replay is None or _replay['file'] != cassette_file:
+            exchanges = {}
+            calls = {}
+            for exchange in read_cassette(cassette_file):
+                exchanges.setdefault(_request_key(exchange['method'], exchange['url'], exchange['request']), []).append(exchange)
+                call = f"{exchange['method']} {exchange['endpoint']}"
+                calls[call] = calls.get(call, 0) + 1
+            _replay = dict(file=cassette_file, exchanges=exchanges, calls=calls)
+        return _replay
+
+def _report_path():
+    report_file = os.environ.get('RHOAS_CASSETTE_REPORT')
+    if report_file:
+        return os.path.expanduser(report_file)
+    return cache_path(f'cassette-replay-{cache_key(os.path.abspath(os.environ["RHOAS_CASSETTE"]))}.json')
@@ -0,0 +1,103 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import contextlib
+import os
+import time
+from urllib.parse import urlparse
+
+from urllib3.util.retry import Retry
+
+from .cassette import replaying, use_cassette
+from .constants.constants import API_RETRY_BACKOFF_FACTOR, API_RETRY_TOTAL
+from .daemon import daemon_enabled, route_through_daemon
+from .profiling import current_endpoint_template, endpoint_template, profiling_active, record_call
+from .rate_limit import acquire
+
+# Responses retried for every method
+API_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Responses telling the request was not processed at all, so POST and PATCH requests are retried on them as well
+API_RETRY_UNPROCESSED_STATUS_CODES = (429, 503)
+
+# API clients kept open by this process, so tasks run in-process by the action plugin reuse their connection pools
+_api_clients = {}
+
+@contextlib.contextmanager
+def pooled_api_client(sdk, configuration):
+    # Drop-in replacement for `with sdk.ApiClient(configuration) as api_client:` that leaves the client open. Clients
+    # are shared per SDK, host and pool size, the access token of the configuration passed in is used for requests.
+    # The pid is part of the key so a forked process never shares the sockets of its parent.
+    key = (sdk.__name__, configuration.host, configuration.connection_pool_maxsize, configuration.verify_ssl, os.getpid())
+    api_client = _api_clients.get(key)
+    if api_client is None:
+        if configuration.retries is None:
+            configuration.retries = api_retry()
+        api_client = _api_clients[key] = sdk.ApiClient(configuration)
+        # urllib3 decompresses the responses, large lists of topics, ACLs and instances compress well
+        api_client.set_default_header('Accept-Encoding', 'gzip')
+        api_client.rest_client.request = _rate_limited(api_client.rest_client.request)
+        # A replayed cassette answers the requests itself, there is nothing for the daemon to connect to
+        if daemon_enabled() and not replaying():
+            try:
+                route_through_daemon(api_client)
+            except OSError:
+                # Without a working daemon the client connects to the API itself
+                pass
+        api_client.call_api = _with_endpoint_template(api_client.call_api)
+        pool_manager = api_client.rest_client.pool_manager
+        use_cassette(pool_manager)
+        pool_manager.request = _profiled(pool_manager.request)
+    else:
+        api_client.configuration.access_token = configuration.access_token
+    yield api_client
+
+def _rate_limited(request):
+    # Every request of the REST client, SDK call or raw call_api, waits for a token of its host first
+    def rate_limited_request(method, url, *args, **kwargs):
+        acquire(url)
+        return request(method, url, *args, **kwargs)
+    return rate_limited_request
+
+def _with_endpoint_template(call_api):
+    # Remembers the path template of the SDK call, e.g. `/api/v1/topics/{topicName}`, for the profile of the task
+    def call_api_with_endpoint_template(resource_path, *args, **kwargs):
+        with endpoint_template(resource_path):
+            return call_api(resource_path, *args, **kwargs)
+    return call_api_with_endpoint_template
+
+def _profiled(request):
+    # Records the calls of a profiled task once per SDK call, the latency includes the retries urllib3 made
+    def profiled_request(method, url, *args, **kwargs):
+        if not profiling_active():
+            return request(method, url, *args, **kwargs)
+        started = time.perf_counter()
+        status = None
+        retries = 0
+        try:
+            response = request(method, url, *args, **kwargs)
+            status = response.status
+            if getattr(response, 'retries', None) is not None:
+                retries = len(response.retries.history)
+            return response
+        finally:
+            record_call(method, current_endpoint_template() or urlparse(url).path, status, time.perf_counter() - started, retries)
+    return profiled_request
+
+def api_retry():
+    # Retry policy of the urllib3 pools of the SDK clients. Connection errors and 429/5xx responses are retried with
+    # exponential backoff, or after the delay of a Retry-After header. POST and PATCH requests are only retried when
+    # the response shows they were not processed, so a create is never sent twice. Once the retries are used up the
+    # last response is returned, and the SDK raises the usual ApiException for it.
+    return ApiRetry(
+        total=API_RETRY_TOTAL,
+        backoff_factor=API_RETRY_BACKOFF_FACTOR,
+        status_forcelist=API_RETRY_STATUS_CODES,
+        raise_on_status=False,
+    )
+
+class ApiRetry(Retry):
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if status_code in API_RETRY_UNPROCESSED_STATUS_CODES:
+            method = 'GET'
+        return super(ApiRetry, self).is_retry(method, status_code, has_retry_after)
@@ -2,11 +2,156 @@
 # -*- coding: utf-8 -*-
 
 # Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
-from os import environ
-from auth.rhoas_auth import get_access_token
+import base64
+import json
+import time
+from os import environ, path
+from auth.constants import DEFAULT_AUTH_URL
 
+from .cache import cache_key, cache_path, file_lock, read_json, write_json
+from .cassette import cassette_mode, record_access_token, replay_access_token
+from .daemon import daemon_access_token, daemon_enabled
+from .constants.constants import KAFKA_ADMIN_URL_CACHE_TTL_SECONDS, TOKEN_EXPIRY_LEEWAY_SECONDS
+from .profiling import profile_phase, record_call
+
+_env_loaded = False
+
+def load_env():
+    # Reads the optional `.env` file once per process. python-dotenv is only imported when there is a file to read,
+    # modules running in the controller process share the result.
+    global _env_loaded
+    if _env_loaded:
+        return
+    _env_loaded = True
+    if path.isfile('.env'):
+        from dotenv import load_dotenv
+        load_dotenv('.env')
+
+def get_access_token(offline_token):
+    # The SSO client pulls in keycloak and its dependencies, which is the most expensive import of a module run.
+    # Tasks served from the token cache, the daemon or the mock never need it.
+    mode = cassette_mode()
+    if mode == 'replay':
+        return replay_access_token()
+    from auth.rhoas_auth import get_access_token as exchange_offline_token
+    # The exchange goes through keycloak rather than an SDK client, it is recorded here for the task profile
+    started = time.perf_counter()
+    status = None
+    try:
+        token = exchange_offline_token(offline_token)
+        status = 200
+        if mode == 'record':
+            record_access_token(token, time.perf_counter() - started)
+        return token
+    except Exception as e:
+        status = getattr(e, 'response_code', None)
+        raise
+    finally:
+        record_call('POST', '/auth/realms/{realm}/protocol/openid-connect/token', status, time.perf_counter() - started)
+
+@profile_phase('auth')
 def get_offline_token(module_param_offline_token):
     if module_param_offline_token is None or module_param_offline_token == '':
-        return get_access_token(offline_token=None)['access_token']
+        offline_token = environ.get('OFFLINE_TOKEN')
     else:
-        return get_access_token(module_param_offline_token)['access_token']
\ No newline at end of file
+        offline_token = module_param_offline_token
+
+    if offline_token and daemon_enabled():
+        try:
+            return daemon_access_token(offline_token)
+        except (OSError, ValueError, KeyError):
+            # Without a working daemon the token is exchanged as usual
+            pass
+
+    if offline_token is None or offline_token == '' or environ.get('RHOAS_TOKEN_CACHE', 'true').lower() in ('0', 'false', 'no'):
+        return get_access_token(offline_token)['access_token']
+
+    try:
+        token_cache_file = cache_path(f'token-{cache_key(offline_token, DEFAULT_AUTH_URL)}.json')
+        access_token = _read_cached_access_token(token_cache_file)
+        if access_token is not None:
+            return access_token
+        # Only one fork performs the SSO exchange, the others wait on the lock and pick up its result
+        with file_lock(token_cache_file):
+            access_token = _read_cached_access_token(token_cache_file)
+            if access_token is not None:
+                return access_token
+            token = get_access_token(offline_token)
+            write_json(token_cache_file, dict(
+                access_token=token['access_token'],
+                expires_at=_get_token_expiry(token),
+            ))
+            return token['access_token']
+    except OSError:
+        # The cache is an optimisation only, an unwritable cache directory must not fail the task
+        return get_access_token(offline_token)['access_token']
+
+def _read_cached_access_token(token_cache_file):
+    cached = read_json(token_cache_file)
+    if not isinstance(cached, dict) or 'access_token' not in cached:
+        return None
+    if cached.get('expires_at', 0) - TOKEN_EXPIRY_LEEWAY_SECONDS <= time.time():
+        return None
+    return cached['access_token']
+
+def _get_token_expiry(token):
+    # The access token is a JWT, its `exp` claim is authoritative. Fall back to `expires_in` if it cannot be decoded.
+    try:
+        payload = token['access_token'].split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return int(time.time()) + int(token.get('expires_in', 0))
+
+@profile_phase('resolve')
+def resolve_kafka_admin_url(kafka_mgmt_api_instance, kafka_id):
+    # Returns the admin URL of the Kafka instance together with the instance details it was read from.
+    # Resolutions are cached for KAFKA_ADMIN_URL_CACHE_TTL_SECONDS so topic and ACL tasks against the
+    # same instance only call `get_kafka_by_id` once.
+    key = cache_key(kafka_mgmt_api_instance.api_client.configuration.host, kafka_id)
+    try:
+        admin_url_cache_file = cache_path('kafka-admin-urls.json')
+    except OSError:
+        admin_url_cache_file = None
+
+    if admin_url_cache_file is not None:
+        entry = _read_admin_url_entries(admin_url_cache_file).get(key)
+        if isinstance(entry, dict) and entry.get('expires_at', 0) > time.time():
+            return entry['admin_api_server_url'], entry['kafka']
+
+    kafka_mgmt_api_response = kafka_mgmt_api_instance.get_kafka_by_id(kafka_id)
+    kafka = kafka_mgmt_api_response.to_dict()
+    admin_url = kafka.get('admin_api_server_url')
+
+    # The admin URL is only assigned once the instance is provisioned, do not cache until then
+    if admin_url and admin_url_cache_file is not None:
+        try:
+            with file_lock(admin_url_cache_file):
+                now = time.time()
+                entries = _read_admin_url_entries(admin_url_cache_file)
+                entries = {k: v for k, v in entries.items() if isinstance(v, dict) and v.get('expires_at', 0) > now}
+                entries[key] = dict(
+                    admin_api_server_url=admin_url,
+                    kafka=kafka,
+                    expires_at=now + KAFKA_ADMIN_URL_CACHE_TTL_SECONDS,
+                )
+                write_json(admin_url_cache_file, entries)
+        except OSError:
+            pass
+    return admin_url, kafka
+
+def _read_admin_url_entries(admin_url_cache_file):
+    # A cache file that does not hold an object, truncated or written by something else, is a cache miss
+    entries = read_json(admin_url_cache_file, default={})
+    return entries if isinstance(entries, dict) else {}
+
+def invalidate_kafka_admin_url(kafka_mgmt_api_instance, kafka_id):
+    key = cache_key(kafka_mgmt_api_instance.api_client.configuration.host, kafka_id)
+    try:
+        admin_url_cache_file = cache_path('kafka-admin-urls.json')
+        with file_lock(admin_url_cache_file):
+            entries = _read_admin_url_entries(admin_url_cache_file)
+            if entries.pop(key, None) is not None:
+                write_json(admin_url_cache_file, entries)
+    except OSError:
+        pass
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+# Long-lived local daemon that owns the access tokens and the keep-alive HTTP connections to the management,
+# service account and Kafka admin APIs. Modules send their requests to it over a Unix socket as to an HTTP
+# proxy, with the absolute URL as the request target, and ask it for access tokens at TOKEN_PATH.
+# This file is started with `python -c <source>` so that it also works from an AnsiballZ payload, it must only
+# import the standard library at the top and must not use relative imports.
+import base64
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+
+# Path answered by the daemon itself with an access token for the offline token posted to it
+TOKEN_PATH = '/__rhoas__/token'
+# Seconds before the JWT `exp` claim at which an access token is refreshed
+TOKEN_EXPIRY_LEEWAY_SECONDS = 60
+# Headers that only apply to the connection between the module and the daemon
+HOP_BY_HOP_HEADERS = frozenset((
+    'connection', 'keep-alive', 'proxy-connection', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade', 'host', 'content-length',
+))
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, idle_timeout, pool_maxsize):
+        import urllib3
+        try:
+            import certifi
+            ca_certs = certifi.where()
+        except ImportError:
+            ca_certs = None
+        socketserver.UnixStreamServer.__init__(self, socket_path, DaemonRequestHandler)
+        self.pool_manager = urllib3.PoolManager(num_pools=32, maxsize=pool_maxsize, cert_reqs='CERT_REQUIRED', ca_certs=ca_certs)
+        self.idle_timeout = idle_timeout
+        self.last_request = time.monotonic()
+        self.tokens = {}
+        self.tokens_lock = threading.Lock()
+
+    def access_token(self, offline_token):
+        # Tokens are exchanged on first use and refreshed shortly before they expire
+        with self.tokens_lock:
+            token = self.tokens.get(offline_token)
+            if token is None or token['expires_at'] - TOKEN_EXPIRY_LEEWAY_SECONDS <= time.time():
+                from auth.rhoas_auth import get_access_token
+                exchanged = get_access_token(offline_token)
+                token = self.tokens[offline_token] = dict(
+                    access_token=exchanged['access_token'],
+                    expires_at=_token_expiry(exchanged),
+                )
+            return token['access_token']
+
+class DaemonRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def handle_request(self):
+        self.server.last_request = time.monotonic()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        if self.path == TOKEN_PATH:
+            self.handle_token(body)
+        else:
+            self.forward(body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = handle_request
+
+    def handle_token(self, body):
+        try:
+            access_token = self.server.access_token(json.loads(body)['offline_token'])
+        except Exception as e:
+            self.respond(502, json.dumps(dict(error='token_exchange_failed', error_description=str(e))).encode('utf-8'))
+            return
+        self.respond(200, json.dumps(dict(access_token=access_token)).encode('utf-8'))
+
+    def forward(self, body):
+        headers = {key: value for key, value in self.headers.items() if key.lower() not in HOP_BY_HOP_HEADERS}
+        try:
+            response = self.server.pool_manager.urlopen(
+                self.command, self.path, body=body, headers=headers,
+                redirect=False, retries=False, preload_content=True, decode_content=False,
+            )
+        except Exception as e:
+            self.respond(502, json.dumps(dict(code='RHOAS-DAEMON-502', reason=f'Failed to reach {self.path}: {e}')).encode('utf-8'))
+            return
+        response_headers = [(key, value) for key, value in response.headers.items() if key.lower() not in HOP_BY_HOP_HEADERS]
+        self.respond(response.status, response.data, response_headers)
+
+    def respond(self, status, data, headers=None):
+        self.send_response(status)
+        for key, value in headers or [('Content-Type', 'application/json')]:
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def _token_expiry(token):
+    try:
+        payload = token['access_token'].split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return int(time.time()) + int(token.get('expires_in', 0))
+
+def serve(socket_path, idle_timeout, pool_maxsize):
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    # The socket gives access to the cached tokens, only the current user may connect to it
+    umask = os.umask(0o177)
+    try:
+        server = DaemonServer(socket_path, idle_timeout, pool_maxsize)
+    finally:
+        os.umask(umask)
+
+    def shutdown_when_idle():
+        while time.monotonic() - server.last_request < idle_timeout:
+            time.sleep(min(idle_timeout, 5))
+        server.shutdown()
+
+    threading.Thread(target=shutdown_when_idle, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.remove(socket_path)
+        except OSError:
+            pass
+
+if __name__ == '__main__':
+    serve(sys.argv[1], float(sys.argv[2]), int(sys.argv[3]))
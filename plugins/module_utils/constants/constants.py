@@ -1,3 +1,36 @@
 # Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
 API_BASE_HOST="https://api.openshift.com"
 SSO_BASE_HOST="https://sso.redhat.com/auth/realms/redhat-external"
+# Local cache shared by every task and fork running on the controller
+CACHE_DIR="~/.ansible/tmp/rhoas"
+# Seconds before the JWT `exp` claim at which a cached access token is considered stale
+TOKEN_EXPIRY_LEEWAY_SECONDS=60
+# Seconds for which a kafka_id -> admin_api_server_url resolution is reused
+KAFKA_ADMIN_URL_CACHE_TTL_SECONDS=3600
+# Number of topics requested per page when listing the topics of a Kafka instance
+TOPIC_LIST_PAGE_SIZE=100
+# Number of ACL bindings requested per page when listing the ACLs of a Kafka instance
+ACL_LIST_PAGE_SIZE=100
+# Seconds a task waits for a Kafka instance to become ready, provisioning usually takes 10 to 20 minutes
+KAFKA_WAIT_TIMEOUT_SECONDS=1800
+# First and largest delay in seconds between two status polls of a provisioning Kafka instance
+KAFKA_WAIT_INITIAL_DELAY_SECONDS=5
+KAFKA_WAIT_MAX_DELAY_SECONDS=60
+# Number of Kafka instances requested per page when listing every page of `get_kafkas`
+KAFKA_LIST_PAGE_SIZE=100
+# Seconds after which the Kafka instances memoised by the kafka lookup plugin for a playbook run are removed
+KAFKA_LOOKUP_CACHE_MAX_AGE_SECONDS=86400
+# Seconds for which the kafka lookup plugin reuses an instance that is not ready yet
+KAFKA_LOOKUP_PENDING_TTL_SECONDS=5
+# Maximum number of Kafka instances the kafka lookup plugin fetches by ID at the same time
+KAFKA_LOOKUP_CONCURRENCY=10
+# Seconds without requests after which the connection daemon exits
+DAEMON_IDLE_TIMEOUT_SECONDS=600
+# Keep-alive connections the connection daemon holds open per API host
+DAEMON_POOL_MAXSIZE=10
+# Seconds a task waits for a newly started connection daemon to accept connections
+DAEMON_START_TIMEOUT_SECONDS=10
+# Retries of an API request after a connection error or a 429/5xx response, and the factor of their exponential backoff
+# in seconds. A Retry-After header sent by the server takes precedence over the backoff.
+API_RETRY_TOTAL=5
+API_RETRY_BACKOFF_FACTOR=0.5
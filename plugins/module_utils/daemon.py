@@ -0,0 +1,146 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import fcntl
+import http.client
+import json
+import os
+import socket
+import sys
+import time
+
+from .cache import cache_path
+from .constants.constants import DAEMON_IDLE_TIMEOUT_SECONDS, DAEMON_POOL_MAXSIZE, DAEMON_START_TIMEOUT_SECONDS
+
+def daemon_enabled():
+    # The connection daemon is opt-in with RHOAS_DAEMON=true
+    return os.environ.get('RHOAS_DAEMON', 'false').lower() in ('1', 'true', 'yes')
+
+def daemon_socket_path():
+    return cache_path('daemon.sock')
+
+def ensure_daemon():
+    # Returns the socket of the running daemon, starting one if there is none. Only one task starts it, the
+    # others wait on the lock until it accepts connections.
+    socket_path = daemon_socket_path()
+    if _daemon_alive(socket_path):
+        return socket_path
+    with open(f'{socket_path}.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if _daemon_alive(socket_path):
+            return socket_path
+        _start_daemon(socket_path)
+        deadline = time.monotonic() + DAEMON_START_TIMEOUT_SECONDS
+        while not _daemon_alive(socket_path):
+            if time.monotonic() > deadline:
+                raise OSError(f'The connection daemon did not start listening on {socket_path}')
+            time.sleep(0.05)
+    return socket_path
+
+def daemon_access_token(offline_token):
+    from .connection_daemon import TOKEN_PATH
+    connection = _UnixHTTPConnection(ensure_daemon())
+    try:
+        connection.request('POST', TOKEN_PATH, body=json.dumps(dict(offline_token=offline_token)),
+                           headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        data = json.loads(response.read())
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise OSError(f'The connection daemon failed to exchange the offline token: {data.get("error_description")}')
+    return data['access_token']
+
+def route_through_daemon(api_client, maxsize=None):
+    # Sends the requests of an SDK API client through the daemon, which holds the keep-alive connections
+    api_client.rest_client.pool_manager = DaemonPoolManager(ensure_daemon(), maxsize or api_client.configuration.connection_pool_maxsize,
+                                                            api_client.configuration.retries)
+
+def _start_daemon(socket_path):
+    # The daemon runs from the source of connection_daemon in a new session, so it outlives the task and does
+    # not depend on the AnsiballZ payload it may have been started from. It is only imported when a daemon is started.
+    import inspect
+    import subprocess
+    from . import connection_daemon
+    subprocess.Popen(
+        [sys.executable, '-c', inspect.getsource(connection_daemon), socket_path, str(DAEMON_IDLE_TIMEOUT_SECONDS), str(DAEMON_POOL_MAXSIZE)],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        close_fds=True, start_new_session=True, cwd='/',
+    )
+
+def _daemon_alive(socket_path):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        sock.close()
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        http.client.HTTPConnection.__init__(self, 'localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+try:
+    import urllib3
+    from urllib3.connection import HTTPConnection as _urllib3_HTTPConnection
+    try:
+        from urllib3.request import RequestMethods
+    except ImportError:
+        from urllib3._request_methods import RequestMethods
+except ImportError:
+    urllib3 = None
+else:
+    class _UnixSocketConnection(_urllib3_HTTPConnection):
+        def __init__(self, *args, **kwargs):
+            self.socket_path = kwargs.pop('socket_path')
+            _urllib3_HTTPConnection.__init__(self, *args, **kwargs)
+
+        def _new_conn(self):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            if self.timeout is not None and self.timeout is not socket._GLOBAL_DEFAULT_TIMEOUT:
+                sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise urllib3.exceptions.NewConnectionError(self, f'Failed to connect to the connection daemon: {e}')
+            return sock
+
+    class _UnixSocketConnectionPool(urllib3.HTTPConnectionPool):
+        ConnectionCls = _UnixSocketConnection
+
+    class DaemonPoolManager(RequestMethods):
+        # Stands in for the urllib3 PoolManager of an SDK REST client. Requests keep their absolute URL and are
+        # sent to the daemon, which forwards them over its own keep-alive connections.
+        def __init__(self, socket_path, maxsize=None, retries=None):
+            RequestMethods.__init__(self)
+            self.socket_path = socket_path
+            # Responses relayed from the API are retried as usual, a daemon that is gone is restarted in urlopen
+            # instead of being retried with backoff
+            if isinstance(retries, urllib3.util.retry.Retry):
+                retries = retries.new(connect=0)
+            self.pool = _UnixSocketConnectionPool('localhost', maxsize=maxsize or 4, retries=retries, socket_path=socket_path)
+
+        def urlopen(self, method, url, **kwargs):
+            kwargs['assert_same_host'] = False
+            try:
+                return self.pool.urlopen(method, url, **kwargs)
+            except (urllib3.exceptions.NewConnectionError, urllib3.exceptions.MaxRetryError) as e:
+                if not isinstance(getattr(e, 'reason', e), urllib3.exceptions.NewConnectionError):
+                    raise
+                # The daemon exited after being idle, start a new one and try once more
+                ensure_daemon()
+                return self.pool.urlopen(method, url, **kwargs)
+
+        def clear(self):
+            self.pool.close()
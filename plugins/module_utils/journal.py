@@ -0,0 +1,110 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import json
+import os
+import time
+
+from .cache import cache_path, file_lock
+
+# Append-only journal of the Kafka instances provisioned and deleted from this controller, one JSON object per line.
+# `create_kafka` writes the request and the id it got back before polling, and every status it observes while polling,
+# so a re-run after the controller died or the task timed out resumes polling the same instance instead of creating
+# another one. `delete_kafka_by_id` writes the deletion, after which the name is free again.
+#
+# Every entry has the `time` it was written, the `event`, the instance `name` and `kafka_id`, the API `host` and the
+# last observed `status`. `requested` entries also have the `request` payload, and entries written while polling the
+# `elapsed_seconds` since the instance was requested, which makes the journal a dataset of provisioning latencies:
+#
+# - requested: the instance was created
+# - adopted: an instance with the name already existed and was used instead
+# - resumed: the instance of an earlier run was found in the journal and used instead
+# - status: a new status was observed while waiting for the instance
+# - deleted: the instance was set for deletion
+# - gone: the instance of the journal no longer exists, or is being deleted
+#
+# RHOAS_JOURNAL is the path of the journal, `provisioning-journal.ndjson` in the cache directory by default. `false`
+# disables it.
+#
+# The journal is never compacted, it is kept as a dataset. It grows by a few hundred bytes per status seen, usually
+# under 1 KiB per instance, and is read once by every `create_kafka` task. It can be rotated or removed at any time,
+# only an instance that is being waited for at that moment is then created again by a re-run.
+
+# Events after which the journal no longer has an instance for the name
+JOURNAL_CLOSING_EVENTS = ('deleted', 'gone')
+
+def journal_path():
+    value = os.environ.get('RHOAS_JOURNAL', '')
+    if value.lower() in ('0', 'false', 'no'):
+        return None
+    if value:
+        return os.path.expanduser(value)
+    return cache_path('provisioning-journal.ndjson')
+
+def read_journal():
+    entries = []
+    try:
+        path = journal_path()
+        if path is None:
+            return []
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A line cut short by a controller that died while writing it
+                    continue
+    except OSError:
+        return []
+    return entries
+
+def journal_event(event, name, kafka_id, host, status=None, **fields):
+    # Appends an entry and returns it, the journal is an optimisation and a dataset, failing to write it never fails
+    # the task
+    entry = dict(time=time.time(), event=event, name=name, kafka_id=kafka_id, host=host, status=status, **fields)
+    try:
+        path = journal_path()
+        if path is None:
+            return entry
+        with file_lock(path):
+            with open(path, 'a') as f:
+                f.write(json.dumps(entry, sort_keys=True, default=str) + '\n')
+    except OSError:
+        pass
+    return entry
+
+def find_journal_instance(name, host):
+    # The last entry of the instance the journal has for name on host, or None if it has none or it was deleted. The
+    # entry also has the `requested_time` of the instance, when the journal has its request.
+    last = None
+    requested = None
+    for entry in read_journal():
+        if entry.get('name') == name and entry.get('host') == host:
+            last = entry
+            if entry.get('event') == 'requested':
+                requested = entry
+    if last is None or last.get('event') in JOURNAL_CLOSING_EVENTS or not last.get('kafka_id'):
+        return None
+    return dict(last, requested_time=requested.get('time') if requested is not None and requested.get('kafka_id') == last['kafka_id'] else None)
+
+def find_journal_name(kafka_id, host):
+    name = None
+    for entry in read_journal():
+        if entry.get('kafka_id') == kafka_id and entry.get('host') == host:
+            name = entry.get('name')
+    return name
+
+def status_recorder(name, kafka_id, host, status=None, requested=None):
+    # Callback for `wait_for_kafka_ready` writing a `status` entry whenever the status of the instance changes, with
+    # the seconds elapsed since the `requested` time of the instance when it is known
+    last_status = [status]
+
+    def record_status(kafka):
+        status = kafka.get('status')
+        if status == last_status[0]:
+            return
+        last_status[0] = status
+        elapsed = round(time.time() - requested, 1) if requested is not None else None
+        journal_event('status', name, kafka_id, host, status, elapsed_seconds=elapsed)
+    return record_status
@@ -0,0 +1,150 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import json
+import random
+import time
+
+from .cassette import sleep
+from .constants.constants import (
+    KAFKA_LIST_PAGE_SIZE,
+    KAFKA_WAIT_INITIAL_DELAY_SECONDS,
+    KAFKA_WAIT_MAX_DELAY_SECONDS,
+    KAFKA_WAIT_TIMEOUT_SECONDS,
+)
+from .profiling import profile_phase
+
+# Status of a Kafka instance that is ready to be used
+KAFKA_READY_STATE = 'ready'
+# Statuses from which an instance never becomes ready, waiting on them fails straight away
+KAFKA_TERMINAL_STATES = ('failed', 'deprovision', 'deleting')
+# Statuses of an instance that was deleted, a new instance can be created with its name
+KAFKA_DELETING_STATES = ('deprovision', 'deleting')
+
+class KafkaWaitError(Exception):
+    def __init__(self, msg, kafka=None):
+        super(KafkaWaitError, self).__init__(msg)
+        self.kafka = kafka
+
+def backoff_delays(initial_delay=KAFKA_WAIT_INITIAL_DELAY_SECONDS, max_delay=KAFKA_WAIT_MAX_DELAY_SECONDS):
+    # Exponential backoff with jitter, each delay is drawn from the upper half of the current step so that
+    # forks waiting on instances created at the same time do not poll the API in lockstep
+    attempt = 0
+    while True:
+        delay = min(max_delay, initial_delay * 2 ** attempt)
+        yield random.uniform(delay / 2, delay)
+        attempt += 1
+
+@profile_phase('wait')
+def wait_for_kafka_ready(kafka_mgmt_api_instance, kafka_id, timeout=KAFKA_WAIT_TIMEOUT_SECONDS,
+                         initial_delay=KAFKA_WAIT_INITIAL_DELAY_SECONDS, max_delay=KAFKA_WAIT_MAX_DELAY_SECONDS, on_poll=None):
+    # Polls the instance until it is ready and returns its details. Raises KafkaWaitError when the instance
+    # reaches a terminal state or is still not ready after `timeout` seconds. on_poll is called with the details
+    # of every poll.
+    deadline = time.monotonic() + timeout
+    delays = backoff_delays(initial_delay, max_delay)
+    while True:
+        kafka = kafka_mgmt_api_instance.get_kafka_by_id(kafka_id).to_dict()
+        if on_poll is not None:
+            on_poll(kafka)
+        status = kafka.get('status')
+        if status == KAFKA_READY_STATE:
+            return kafka
+        if status in KAFKA_TERMINAL_STATES:
+            raise KafkaWaitError(_terminal_state_msg(f'ID: {kafka_id}', kafka), kafka)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise KafkaWaitError(_timeout_msg(f'ID: {kafka_id}', kafka, timeout), kafka)
+        sleep(min(next(delays), remaining))
+
+@profile_phase('wait')
+def wait_for_kafkas_ready(kafka_mgmt_api_instance, names, timeout=KAFKA_WAIT_TIMEOUT_SECONDS, executor=None,
+                          initial_delay=KAFKA_WAIT_INITIAL_DELAY_SECONDS, max_delay=KAFKA_WAIT_MAX_DELAY_SECONDS):
+    # Waits for a batch of instances with one name search per poll interval rather than one `get_kafka_by_id`
+    # call per instance. Returns the last seen details of every instance found by name, a dict of
+    # name -> failure message for the instances that did not become ready and the number of polls made.
+    deadline = time.monotonic() + timeout
+    delays = backoff_delays(initial_delay, max_delay)
+    pending = set(names)
+    kafkas = {}
+    failures = {}
+    polls = 0
+    while True:
+        found = search_kafkas_by_name(kafka_mgmt_api_instance, pending, executor, include_deleting=True)
+        polls += 1
+        for name in sorted(pending):
+            kafka = found.get(name)
+            if kafka is None:
+                failures[name] = f'Kafka instance with name: {name} could not be found.'
+                pending.discard(name)
+                continue
+            kafkas[name] = kafka
+            if kafka.get('status') == KAFKA_READY_STATE:
+                pending.discard(name)
+            elif kafka.get('status') in KAFKA_TERMINAL_STATES:
+                failures[name] = _terminal_state_msg(f'name: {name}', kafka)
+                pending.discard(name)
+        if not pending:
+            return kafkas, failures, polls
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            for name in pending:
+                failures[name] = _timeout_msg(f'name: {name}', kafkas[name], timeout)
+            return kafkas, failures, polls
+        sleep(min(next(delays), remaining))
+
+def search_kafkas_by_name(kafka_mgmt_api_instance, names, executor=None, include_deleting=False):
+    # Looks up many instances with a single `name in (a, b, ...)` search, read from the raw JSON rather than SDK
+    # models. An instance being deleted keeps its name until it is gone while a new instance can already take it,
+    # such instances are left out unless include_deleting is set, and a live instance of the name always wins.
+    names = sorted(names)
+    if not names:
+        return {}
+    _, items = list_kafkas(kafka_mgmt_api_instance, executor, search=f'name in ({", ".join(names)})')
+    kafkas = {}
+    for kafka in items:
+        if kafka.get('status') in KAFKA_DELETING_STATES and (not include_deleting or kafka['name'] in kafkas):
+            continue
+        kafkas[kafka['name']] = kafka
+    return kafkas
+
+def kafka_spec_mismatches(kafka, cloud_provider, region, plan):
+    # The requested settings an existing instance of the name differs in, as field -> (requested, actual). The API
+    # returns the plan as the instance type and size of the instance.
+    actual = dict(cloud_provider=kafka.get('cloud_provider'), region=kafka.get('region'))
+    if kafka.get('instance_type') and kafka.get('size_id'):
+        actual['plan'] = f'{kafka["instance_type"]}.{kafka["size_id"]}'
+    requested = dict(cloud_provider=cloud_provider, region=region, plan=plan)
+    return {field: (requested[field], value) for field, value in actual.items() if value and value.lower() != requested[field].lower()}
+
+def kafka_spec_mismatch_msg(kafka, mismatches):
+    differences = ', '.join(f'{field} `{actual}` instead of `{requested}`' for field, (requested, actual) in sorted(mismatches.items()))
+    return f'Kafka instance `{kafka["name"]}` with ID: {kafka["id"]} already exists with {differences}. Delete it or use another name.'
+
+def list_kafkas(kafka_mgmt_api_instance, executor=None, page_size=KAFKA_LIST_PAGE_SIZE, order_by='', search=''):
+    # Returns the total and every instance matching the search. Page 1 tells how many pages there are, the
+    # remaining pages are then fetched together.
+    first_page = get_kafkas_page(kafka_mgmt_api_instance, 1, page_size, order_by, search)
+    pages = [first_page]
+    page_count = -(-first_page.get('total', 0) // page_size)
+    if page_count > 1:
+        fetch = lambda page: get_kafkas_page(kafka_mgmt_api_instance, page, page_size, order_by, search)
+        remaining = range(2, page_count + 1)
+        pages.extend(executor.map(fetch, remaining) if executor is not None else map(fetch, remaining))
+    return first_page.get('total', 0), [kafka for page in pages for kafka in page.get('items') or []]
+
+def get_kafkas_page(kafka_mgmt_api_instance, page, page_size, order_by='', search=''):
+    # A page of `get_kafkas` read from the raw JSON rather than SDK models
+    response = kafka_mgmt_api_instance.get_kafkas(page=str(page), size=str(page_size), order_by=order_by, search=search, _preload_content=False)
+    return json.loads(response.data)
+
+def project_kafka(kafka, fields):
+    return {field: kafka[field] for field in fields if field in kafka}
+
+def _terminal_state_msg(instance, kafka):
+    reason = f' The reason of failure: `{kafka["failed_reason"]}`.' if kafka.get('failed_reason') else ''
+    return f'Kafka instance with {instance} is in the `{kafka.get("status")}` state and will not become ready.{reason}'
+
+def _timeout_msg(instance, kafka, timeout):
+    return f'Kafka instance with {instance} is still in the `{kafka.get("status")}` state after {timeout} seconds. The RHOAS CLI can be used to check the status of the instance.'
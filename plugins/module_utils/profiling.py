@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Opt-in profiling of a task, enabled with the `profile` option of the modules or RHOAS_PROFILE. The result of the
+# task gets a `timings` block with every HTTP call it made and the time spent in each phase:
+#
+# - auth: exchanging the offline token for an access token
+# - resolve: looking up the admin URL of a Kafka instance from its id
+# - wait: polling until Kafka instances are ready, including the sleeps between polls
+# - execute: everything else, the calls doing the actual work
+#
+# When RHOAS_PROFILE_FILE is set the timings are also appended to that file, one JSON object per line, so the tasks of
+# a whole run can be aggregated.
+
+PROFILE_PHASES = ('auth', 'resolve', 'execute', 'wait')
+
+# Profile of the task being run by this process, None when profiling is off. Tasks run in-process by the action
+# plugin run one at a time in each worker, the profile is replaced at the start of every task.
+_profile = None
+# Endpoint template of the SDK call being made by the current thread, set by the wrapped `call_api`
+_local = threading.local()
+
+class TaskProfile(object):
+    def __init__(self, module_name):
+        self.module_name = module_name
+        self.started = time.perf_counter()
+        self.phase = 'execute'
+        self.phase_seconds = dict.fromkeys(PROFILE_PHASES, 0.0)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def timings(self):
+        total = time.perf_counter() - self.started
+        phases = dict(self.phase_seconds)
+        phases['execute'] = max(0.0, total - sum(seconds for phase, seconds in phases.items() if phase != 'execute'))
+        with self.lock:
+            calls = list(self.calls)
+        return dict(
+            total_ms=_ms(total),
+            phases={phase: _ms(seconds) for phase, seconds in phases.items()},
+            calls=calls,
+        )
+
+def profiling_enabled(module):
+    if module.params.get('profile'):
+        return True
+    return os.environ.get('RHOAS_PROFILE', 'false').lower() in ('1', 'true', 'yes')
+
+def start_profile(module, module_name):
+    # Starts profiling the task of module if it is enabled. The timings are added to the result passed to
+    # `exit_json` and `fail_json`, so the modules do not need to change how they return. Modules that already
+    # return `timings` of their own keep them next to the profile.
+    global _profile
+    if not profiling_enabled(module):
+        _profile = None
+        return
+    profile = _profile = TaskProfile(module_name)
+
+    def with_timings(exit_method, failed):
+        def exit_with_timings(*args, **kwargs):
+            kwargs['timings'] = dict(kwargs.get('timings') or {}, **profile.timings())
+            _append_to_profile_file(profile, kwargs, failed)
+            return exit_method(*args, **kwargs)
+        return exit_with_timings
+
+    module.exit_json = with_timings(module.exit_json, False)
+    module.fail_json = with_timings(module.fail_json, True)
+
+@contextlib.contextmanager
+def profile_phase(phase):
+    # Attributes the time spent and the calls made in the block, or the decorated function, to phase. Phases do not
+    # nest, the outermost one is kept.
+    profile = _profile
+    if profile is None or profile.phase != 'execute':
+        yield
+        return
+    profile.phase = phase
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phase_seconds[phase] += time.perf_counter() - started
+        profile.phase = 'execute'
+
+def record_call(method, endpoint, status, seconds, retries=0):
+    profile = _profile
+    if profile is None:
+        return
+    with profile.lock:
+        profile.calls.append(dict(
+            method=method,
+            endpoint=endpoint,
+            status=status,
+            latency_ms=_ms(seconds),
+            retries=retries,
+            phase=profile.phase,
+        ))
+
+def profiling_active():
+    return _profile is not None
+
+@contextlib.contextmanager
+def endpoint_template(resource_path):
+    _local.endpoint = resource_path
+    try:
+        yield
+    finally:
+        _local.endpoint = None
+
+def current_endpoint_template():
+    return getattr(_local, 'endpoint', None)
+
+def _append_to_profile_file(profile, result, failed):
+    profile_file = os.environ.get('RHOAS_PROFILE_FILE')
+    if not profile_file:
+        return
+    line = json.dumps(dict(
+        module=profile.module_name,
+        pid=os.getpid(),
+        time=time.time(),
+        failed=failed,
+        changed=bool(result.get('changed')),
+        **result['timings']
+    ), sort_keys=True)
+    try:
+        # A single append of a whole line, lines of concurrent forks do not interleave
+        with open(os.path.expanduser(profile_file), 'a') as f:
+            f.write(line + '\n')
+    except OSError:
+        # Profiling must never fail the task
+        pass
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import fnmatch
+import os
+import time
+from urllib.parse import urlparse
+
+from .cache import cache_key, cache_path, file_lock, read_json, write_json
+
+# Token buckets of the API hosts, one state file per host in the cache directory. Every task and fork on the
+# controller takes its tokens from the same file, under its lock, so the limit holds for the whole playbook run.
+#
+# RHOAS_RATE_LIMIT configures the buckets as a comma separated list of `<host pattern>=<requests per second>[/<burst>]`,
+# e.g. `api.openshift.com=10,sso.redhat.com=5,*.openshiftapps.com=20/40`. Patterns are shell-style and matched against
+# the host of the request URL, the first matching one applies. The burst defaults to the rate. Requests to hosts that
+# match no pattern are not limited.
+
+_parsed_rate_limits = {}
+
+def parse_rate_limits(value):
+    # Returns the [(pattern, rate, burst)] configured by a RHOAS_RATE_LIMIT value, raises ValueError if it is malformed
+    rate_limits = []
+    for entry in (value or '').split(','):
+        if not entry.strip():
+            continue
+        pattern, sep, limit = entry.partition('=')
+        rate, sep_burst, burst = limit.partition('/')
+        if not sep or not pattern.strip():
+            raise ValueError(f'Invalid RHOAS_RATE_LIMIT entry `{entry}`, expected `<host pattern>=<requests per second>[/<burst>]`')
+        try:
+            rate = float(rate)
+            burst = float(burst) if sep_burst else max(rate, 1.0)
+        except ValueError:
+            raise ValueError(f'Invalid RHOAS_RATE_LIMIT entry `{entry}`, the rate and the burst must be numbers')
+        if rate <= 0 or burst < 1:
+            raise ValueError(f'Invalid RHOAS_RATE_LIMIT entry `{entry}`, the rate must be positive and the burst at least 1')
+        rate_limits.append((pattern.strip().lower(), rate, burst))
+    return rate_limits
+
+def get_rate_limit(host):
+    # The (rate, burst) applying to requests to host, or None
+    value = os.environ.get('RHOAS_RATE_LIMIT', '')
+    if not value:
+        return None
+    if value not in _parsed_rate_limits:
+        _parsed_rate_limits[value] = parse_rate_limits(value)
+    hostname = host.lower().split(':')[0]
+    for pattern, rate, burst in _parsed_rate_limits[value]:
+        if fnmatch.fnmatchcase(hostname, pattern) or fnmatch.fnmatchcase(host.lower(), pattern):
+            return rate, burst
+    return None
+
+def acquire(url):
+    # Takes a token from the bucket of the host of url, sleeping until it is available. Returns the seconds slept.
+    host = urlparse(url).netloc
+    rate_limit = get_rate_limit(host)
+    if rate_limit is None:
+        return 0
+    rate, burst = rate_limit
+    try:
+        state_file = cache_path(f'ratelimit-{cache_key(host)}.json')
+        with file_lock(state_file):
+            now = time.time()
+            state = read_json(state_file, default={})
+            tokens = min(burst, state.get('tokens', burst) + max(0, now - state.get('updated', now)) * rate)
+            # The token is taken even if the bucket is empty, the negative balance is the queue of requests waiting
+            # for a token, so each waiter sleeps exactly until its turn without taking the lock again
+            tokens -= 1
+            write_json(state_file, dict(tokens=tokens, updated=now))
+    except OSError:
+        # Like the other caches the rate limiter is an optimisation, an unwritable cache directory must not fail the task
+        return 0
+    delay = -tokens / rate if tokens < 0 else 0
+    if delay:
+        time.sleep(delay)
+    return delay
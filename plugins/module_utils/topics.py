@@ -0,0 +1,69 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+import json
+
+from .constants.constants import TOPIC_LIST_PAGE_SIZE
+
+# Maps the module options of a topic spec to the Kafka topic configuration keys
+TOPIC_CONFIG_KEYS = dict(
+    retention_size_bytes='retention.bytes',
+    retention_period_ms='retention.ms',
+    cleanup_policy='cleanup.policy',
+)
+
+def topic_config_from_spec(spec):
+    return {config_key: str(spec[option]) for option, config_key in TOPIC_CONFIG_KEYS.items() if spec.get(option) is not None}
+
+def topic_settings_from_spec(spec):
+    # Only settings present in the spec are sent, the API applies its presets for anything else. The SDK models are
+    # imported on first use, listing and comparing topics only needs the raw JSON.
+    from rhoas_kafka_instance_sdk.model.config_entry import ConfigEntry
+    from rhoas_kafka_instance_sdk.model.topic_settings import TopicSettings
+    settings = {}
+    if spec.get('partitions') is not None:
+        settings['num_partitions'] = spec['partitions']
+    config = topic_config_from_spec(spec)
+    if config:
+        settings['config'] = [ConfigEntry(key=key, value=value) for key, value in config.items()]
+    return TopicSettings(**settings)
+
+def list_topics(topics_api_instance, executor=None, page_size=TOPIC_LIST_PAGE_SIZE):
+    # Returns every topic of the instance as plain dicts indexed by name. The raw JSON is used instead of
+    # the SDK models as only a handful of fields are compared, which keeps listing large instances cheap.
+    first_page = _get_topics_page(topics_api_instance, 1, page_size)
+    pages = [first_page]
+    page_count = -(-first_page.get('total', 0) // page_size)
+    if page_count > 1:
+        fetch = lambda page: _get_topics_page(topics_api_instance, page, page_size)
+        remaining = range(2, page_count + 1)
+        pages.extend(executor.map(fetch, remaining) if executor is not None else map(fetch, remaining))
+    return {topic['name']: topic for page in pages for topic in page.get('items') or []}
+
+def _get_topics_page(topics_api_instance, page, page_size):
+    response = topics_api_instance.get_topics(page=page, size=page_size, _preload_content=False)
+    return json.loads(response.data)
+
+def topic_changes(spec, topic):
+    # Compares a topic spec with a topic as returned by `list_topics` and returns the settings that differ
+    changes = {}
+    current_partitions = len(topic.get('partitions') or [])
+    if spec.get('partitions') is not None and spec['partitions'] != current_partitions:
+        changes['partitions'] = dict(before=current_partitions, after=spec['partitions'])
+    current_config = {entry['key']: entry.get('value') for entry in topic.get('config') or []}
+    for key, value in topic_config_from_spec(spec).items():
+        if current_config.get(key) != value:
+            changes.setdefault('config', {})[key] = dict(before=current_config.get(key), after=value)
+    return changes
+
+def topic_update_settings(changes):
+    # Only the settings that differ are sent so that unrelated configuration is left untouched
+    from rhoas_kafka_instance_sdk.model.config_entry import ConfigEntry
+    from rhoas_kafka_instance_sdk.model.topic_settings import TopicSettings
+    settings = {}
+    if 'partitions' in changes:
+        settings['num_partitions'] = changes['partitions']['after']
+    if 'config' in changes:
+        settings['config'] = [ConfigEntry(key=key, value=change['after']) for key, change in changes['config'].items()]
+    return TopicSettings(**settings)
@@ -5,11 +5,13 @@
 from __future__ import (absolute_import, division, print_function)
 import json
 import os
-import time
 
-from ..module_utils.constants.constants import API_BASE_HOST
-from ..module_utils.common import get_offline_token
-from dotenv import load_dotenv
+from ..module_utils.constants.constants import API_BASE_HOST, KAFKA_WAIT_TIMEOUT_SECONDS
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
+from ..module_utils.kafkas import KAFKA_DELETING_STATES, KAFKA_READY_STATE, KafkaWaitError, kafka_spec_mismatch_msg, kafka_spec_mismatches, search_kafkas_by_name, wait_for_kafka_ready
+from ..module_utils.journal import find_journal_instance, journal_event, status_recorder
 
 DOCUMENTATION = r'''
 ---
@@ -19,7 +21,13 @@ short_description: Create Red Hat OpenShift Streams for Apache Kafka Instance.
 
 version_added: "0.1.1"
 
-description: Create Red Hat OpenShift Streams for Apache Kafka Instance.
+description:
+    - Create Red Hat OpenShift Streams for Apache Kafka Instance.
+    - If an instance with the same name already exists, for example when a play is run again after a failure, it is used instead of creating a new one and the module reports no change.
+      The existing instance is waited for like a new one when it is not ready yet. An instance in the C(deprovision) or C(deleting) state is not used, a new one is created.
+    - The module fails if the existing instance has another I(cloud_provider), I(region) or I(plan) than requested.
+    - The instances created, and the statuses observed while waiting for them, are appended to a journal on the controller, C(provisioning-journal.ndjson) in the cache directory or the file set with C(RHOAS_JOURNAL).
+      A run interrupted while waiting is resumed from the id in the journal.
 
 options:
     name:
@@ -59,6 +67,21 @@ options:
         description: Instance type for the Kafka instance.
         required: false
         type: str
+    wait:
+        description:
+            - Wait for the Kafka instance to be ready before returning.
+            - When C(false) the module returns as soon as the instance has been accepted, the M(rhoas.rhoas.wait_for_kafka) module can then be used to wait for it later in the play.
+        required: false
+        type: bool
+        default: true
+    wait_timeout:
+        description:
+            - Number of seconds to wait for the Kafka instance to be ready. The module fails if the instance is not ready by then.
+            - The status is polled with an exponential backoff, starting at 5 seconds and growing to at most 60 seconds between polls.
+            - The module fails as soon as the instance reaches the C(failed), C(deprovision) or C(deleting) state.
+        required: false
+        type: int
+        default: 1800
     openshift_offline_token:
         description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
         required: false
@@ -66,6 +89,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -85,6 +109,23 @@ EXAMPLES = r'''
       openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
     register:
       kafka_req_resp
+
+# Start provisioning, do other work, and wait for the instance afterwards
+  - name: Create kafka without waiting
+    rhoas.rhoas.create_kafka:
+      name: "kafka_name"
+      billing_model: "standard"
+      cloud_provider: "aws"
+      region: "us-east-1"
+      plan: "developer.x1"
+      wait: false
+    register:
+      kafka_req_resp
+
+  - name: Wait for kafka to be ready
+    rhoas.rhoas.wait_for_kafka:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      wait_timeout: 1800
 '''
 
 RETURN = r'''
@@ -99,7 +140,7 @@ message:
     type: dict
     returned: in case of error / exception
 kafka_admin_url:
-    description: The admin url for the Kafka instance.
+    description: The admin url for the Kafka instance. Empty when C(wait) is C(false).
     type: str
     returned: If the module is successful.
 kafka_id:
@@ -107,24 +148,24 @@ kafka_id:
     type: str
     returned: If the module is successful.
 kafka_state:
-    description: The state of the Kafka instance.
+    description: The state of the Kafka instance. C(ready) unless C(wait) is C(false).
     type: str
     returned: If the module is successful.
 env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import rhoas_kafka_mgmt_sdk
-from rhoas_kafka_mgmt_sdk.api import default_api
-from rhoas_kafka_mgmt_sdk.model.kafka_request_payload import KafkaRequestPayload
-import auth.rhoas_auth as auth
-
-load_dotenv(".env")
 
 def run_module():
+    load_env()
+
     # define available arguments/parameters a user can pass to the module
     module_args = dict(
         name=dict(type='str', required=True),
@@ -136,7 +177,10 @@ def run_module():
         marketplace=dict(type='str', required=False),
         billing_model=dict(type='str', required=True),
         instance_type=dict(type='str', required=False),
+        wait=dict(type='bool', required=False, default=True),
+        wait_timeout=dict(type='int', required=False, default=KAFKA_WAIT_TIMEOUT_SECONDS),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -153,6 +197,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'create_kafka')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
@@ -172,39 +217,19 @@ def run_module():
     if api_base_host is None:
         result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
         api_base_host = API_BASE_HOST
+
+    import rhoas_kafka_mgmt_sdk
+    from rhoas_kafka_mgmt_sdk.api import default_api
+    from rhoas_kafka_mgmt_sdk.model.kafka_request_payload import KafkaRequestPayload
+
     configuration = rhoas_kafka_mgmt_sdk.Configuration(
         host = api_base_host,
     )
 
     configuration.access_token = token["access_token"]
 
-    def check_kafka_in_ready_state(kafka_mgmt_api_instance, retries = 10, backoff_in_seconds = 15):
-        attempt = 0
-        # Check for kafka_admin_url to be used to create topic
-        while result['kafka_state'] != "ready":
-            try:
-                # Enter a context with an instance of the API client
-                    kafka_id = result['kafka_id'] # str | The ID of record
-
-                    try:
-                        kafka_mgmt_api_response = kafka_mgmt_api_instance.get_kafka_by_id(kafka_id)
-                        # kafka_mgmt_api_response.get(2000)
-                        result['kafka_admin_url'] = kafka_mgmt_api_response['admin_api_server_url']
-                        result['kafka_state'] = kafka_mgmt_api_response['status']
-                        result['kafka_admin_resp_obj'] = kafka_mgmt_api_response.to_dict()
-
-                    except rhoas_kafka_mgmt_sdk.ApiException as e:
-                        rb = json.loads(e.body)
-                        module.fail_json(msg=f'Failed to create new kafka instance with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.')
-            except:
-                if attempt == retries:
-                    raise Exception ("Failed to establish that the new Kafka instance is in a 'ready state', Kafka may be provisioning. The RHOAS CLI can be used to check the status of the instance.")
-                sleep = (backoff_in_seconds * attempt)
-                time.sleep(sleep)
-                attempt += 1
-
     # Enter a context with an instance of the API client
-    with rhoas_kafka_mgmt_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client:
         # Create an instance of the API class
         api_instance = default_api.DefaultApi(api_client)
         _async = True # bool | Perform the action in an asynchronous manner
@@ -218,16 +243,66 @@ def run_module():
             marketplace=module.params['marketplace'],
             billing_model=module.params['billing_model'],
         )
+        name = module.params['name']
         try:
-            api_response = api_instance.create_kafka(_async, kafka_request_payload, async_req=True)
-            kafka_req_resp = api_response.get(20000)
+            # An earlier run interrupted while waiting left the id of its instance in the journal, it is polled again
+            # rather than looked up by name. An instance deleted elsewhere since, from the console or another
+            # controller, is gone for this purpose even while it is still being deprovisioned.
+            kafka = None
+            requested = None
+            journal_entry = find_journal_instance(name, api_base_host)
+            if journal_entry is not None:
+                try:
+                    kafka = api_instance.get_kafka_by_id(journal_entry['kafka_id']).to_dict()
+                except rhoas_kafka_mgmt_sdk.ApiException as e:
+                    if e.status != 404:
+                        raise
+                if kafka is None or kafka['status'] in KAFKA_DELETING_STATES:
+                    journal_event('gone', name, journal_entry['kafka_id'], api_base_host, kafka['status'] if kafka else None)
+                    kafka = None
+                else:
+                    journal_event('resumed', name, kafka['id'], api_base_host, kafka['status'])
+                    requested = journal_entry['requested_time']
+            if kafka is None:
+                # A single name search makes re-runs adopt the instance of an earlier run instead of failing on its name
+                kafka = search_kafkas_by_name(api_instance, [name]).get(name)
+                if kafka is not None:
+                    journal_event('adopted', name, kafka['id'], api_base_host, kafka['status'])
+            if kafka is not None:
+                mismatches = kafka_spec_mismatches(kafka, module.params['cloud_provider'], module.params['region'], module.params['plan'])
+                if mismatches:
+                    module.fail_json(msg=kafka_spec_mismatch_msg(kafka, mismatches), **result)
+                result['original_message'] = kafka
+                result['kafka_id'] = kafka['id']
+                result['kafka_state'] = kafka['status']
+            else:
+                kafka_req_resp = api_instance.create_kafka(_async, kafka_request_payload)
+
+                if kafka_req_resp['status'] == 'accepted' or kafka_req_resp['status'] == 'ready' or kafka_req_resp['status'] == 'provisioning':
+                    result['original_message'] = kafka_req_resp.to_dict()
+                    result['kafka_id'] = kafka_req_resp['id']
+                    result['kafka_state'] = kafka_req_resp['status']
+                result['changed'] = True
+                requested = journal_event('requested', name, kafka_req_resp['id'], api_base_host, kafka_req_resp['status'], request=dict(
+                    cloud_provider=module.params['cloud_provider'],
+                    region=module.params['region'],
+                    plan=module.params['plan'],
+                    billing_model=module.params['billing_model'],
+                ))['time']
 
-            if kafka_req_resp['status'] == 'accepted' or kafka_req_resp['status'] == 'ready' or kafka_req_resp['status'] == 'provisioning':
-                result['original_message'] = kafka_req_resp.to_dict()
-                result['kafka_id'] = kafka_req_resp['id']
-            check_kafka_in_ready_state(api_instance)
+            if module.params['wait']:
+                if kafka is None or result['kafka_state'] != KAFKA_READY_STATE:
+                    try:
+                        kafka = wait_for_kafka_ready(api_instance, result['kafka_id'], timeout=module.params['wait_timeout'],
+                                                     on_poll=status_recorder(name, result['kafka_id'], api_base_host, result['kafka_state'], requested))
+                    except KafkaWaitError as e:
+                        if e.kafka is not None:
+                            result['kafka_state'] = e.kafka.get('status')
+                        module.fail_json(msg=f'Failed to establish that the Kafka instance is in a `ready` state: {e}', **result)
+                result['kafka_admin_url'] = kafka['admin_api_server_url']
+                result['kafka_state'] = kafka['status']
+                result['kafka_admin_resp_obj'] = kafka
 
-            result['changed'] = True
             # exit the module and return the state
             module.exit_json(**result)
         except rhoas_kafka_mgmt_sdk.ApiException as e:
@@ -6,9 +6,10 @@ from __future__ import (absolute_import, division, print_function)
 import json
 import os
 
-from ..module_utils.common import get_offline_token
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, resolve_kafka_admin_url, load_env
+from ..module_utils.profiling import start_profile
 from ..module_utils.constants.constants import API_BASE_HOST
-from dotenv import load_dotenv
 
 DOCUMENTATION = r'''
 ---
@@ -60,6 +61,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -103,26 +105,18 @@ env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: when the module uses default url instead of passed environment variable
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
-import auth.rhoas_auth as auth
-import rhoas_kafka_instance_sdk
-import rhoas_kafka_mgmt_sdk
 from ansible.module_utils.basic import AnsibleModule
-from rhoas_kafka_instance_sdk.api import acls_api
-from rhoas_kafka_instance_sdk.model.acl_binding import AclBinding
-from rhoas_kafka_instance_sdk.model.acl_operation import AclOperation as aot
-from rhoas_kafka_instance_sdk.model.acl_pattern_type import \
-    AclPatternType as apt
-from rhoas_kafka_instance_sdk.model.acl_permission_type import \
-    AclPermissionType as apert
-from rhoas_kafka_instance_sdk.model.acl_resource_type import \
-    AclResourceType as art
-from rhoas_kafka_mgmt_sdk.api import default_api
-
-load_dotenv(".env")
+from ..module_utils.acls import normalize_principal
 
 def run_module():
+    load_env()
+
     # define available arguments/parameters a user can pass to the module
     module_args = dict(
         kafka_id = dict(type='str', required = False),
@@ -134,6 +128,7 @@ def run_module():
         operation_type = dict(type='str', required = True),
         permission_type = dict(type='str', required = True),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -149,6 +144,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'create_kafka_acl_binding')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
@@ -168,36 +164,44 @@ def run_module():
     if api_base_host is None:
         result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
         api_base_host = API_BASE_HOST
-    kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
-        host = api_base_host,
-    )
 
-    kafka_mgmt_config.access_token = token["access_token"]
+    import rhoas_kafka_instance_sdk
+    from rhoas_kafka_instance_sdk.api import acls_api
+    from rhoas_kafka_instance_sdk.model.acl_binding import AclBinding
+    from rhoas_kafka_instance_sdk.model.acl_operation import AclOperation as aot
+    from rhoas_kafka_instance_sdk.model.acl_pattern_type import AclPatternType as apt
+    from rhoas_kafka_instance_sdk.model.acl_permission_type import AclPermissionType as apert
+    from rhoas_kafka_instance_sdk.model.acl_resource_type import AclResourceType as art
 
     configuration = rhoas_kafka_instance_sdk.Configuration()
 
+    # The management SDK is only needed to resolve the admin URL when it is not passed in
     def get_kafka_mgmt_client():
-        with rhoas_kafka_mgmt_sdk.ApiClient(kafka_mgmt_config) as kafka_mgmt_api_client:
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+        kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        kafka_mgmt_config.access_token = token["access_token"]
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, kafka_mgmt_config) as kafka_mgmt_api_client:
             # Create an instance of the API class
             kafka_mgmt_api_instance = default_api.DefaultApi(kafka_mgmt_api_client)
             return kafka_mgmt_api_instance
 
-    def get_kafka_admin_url(kafka_mgmt_api_instance, configuration):
-        # Check for kafka_admin_url to be used to create topic
-        while (result['kafka_admin_url'] == "") or (result['kafka_admin_url'] == None):
-            # Enter a context with an instance of the API client
-                kafka_id = module.params['kafka_id']
-
-                try:
-                    kafka_mgmt_api_response = kafka_mgmt_api_instance.get_kafka_by_id(kafka_id)
-                    kafka_mgmt_api_response
-                    result['kafka_admin_url'] = kafka_mgmt_api_response['admin_api_server_url']
-                    result['kafka_admin_resp_obj'] = kafka_mgmt_api_response.to_dict()
-                except rhoas_kafka_mgmt_sdk.ApiException as e:
-                    rb = json.loads(e.body)
-                    module.fail_json(msg=f'Failed to create Access Control List binding with API exception code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
-                except Exception as e:
-                    module.fail_json(msg=f'Failed to create Access Control List binding with exception: {e}', **result)
+    def get_kafka_admin_url(kafka_mgmt_api_instance):
+        # Check for kafka_admin_url to be used to create the ACL binding
+        import rhoas_kafka_mgmt_sdk
+        kafka_id = module.params['kafka_id']
+
+        try:
+            result['kafka_admin_url'], result['kafka_admin_resp_obj'] = resolve_kafka_admin_url(kafka_mgmt_api_instance, kafka_id)
+        except rhoas_kafka_mgmt_sdk.ApiException as e:
+            rb = json.loads(e.body)
+            module.fail_json(msg=f'Failed to create Access Control List binding with API exception code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
+        except Exception as e:
+            module.fail_json(msg=f'Failed to create Access Control List binding with exception: {e}', **result)
+        if not result['kafka_admin_url']:
+            module.fail_json(msg=f'Failed to create Access Control List binding, Kafka instance `{kafka_id}` has no admin URL yet. The instance may still be provisioning.', **result)
 
     if (module.params['kafka_admin_url'] is None) or (module.params['kafka_admin_url'] == ""):
         get_kafka_admin_url(get_kafka_mgmt_client())
@@ -206,7 +210,7 @@ def run_module():
 
     configuration.host = result['kafka_admin_url']
     configuration.access_token = token["access_token"]
-    with rhoas_kafka_instance_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_kafka_instance_sdk, configuration) as api_client:
         api_instance = acls_api.AclsApi(api_client)
 
         # some light validation as all the params are required to be in all caps
@@ -218,14 +222,7 @@ def run_module():
             op = aot(module.params['operation_type'].upper())
         if module.params['permission_type'] is not None:
             per = apert(module.params['permission_type'].upper())
-        if module.params['principal'].startswith('user:') is True:
-            prncpl = module.params['principal'].title().replace(" ", "")
-            result['message'] = prncpl
-        elif module.params['principal'].startswith('User:') is True:
-            prncpl = module.params['principal'].replace(" ", "")
-            result['message'] = prncpl
-        else:
-            prncpl = f'User:{module.params["principal"].replace(" ", "")}'
+        prncpl = normalize_principal(module.params['principal'])
 
         acl_binding = AclBinding(
             resource_type = rt,
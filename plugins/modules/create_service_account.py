@@ -5,10 +5,11 @@
 from __future__ import (absolute_import, division, print_function)
 import os
 
-from ..module_utils.common import get_offline_token
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
 
 from ..module_utils.constants.constants import SSO_BASE_HOST
-from dotenv import load_dotenv
 
 DOCUMENTATION = r'''
 ---
@@ -36,6 +37,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -79,21 +81,22 @@ env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import rhoas_service_accounts_mgmt_sdk
-import auth.rhoas_auth as auth
-from rhoas_service_accounts_mgmt_sdk.api import service_accounts_api
-from rhoas_service_accounts_mgmt_sdk.model.service_account_create_request_data import ServiceAccountCreateRequestData
-
-load_dotenv(".env")
 
 def run_module():
+    load_env()
+
     module_args = dict(
         name=dict(type='str', required=True),
         description=dict(type='str', required=True),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -110,6 +113,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'create_service_account')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
@@ -131,13 +135,17 @@ def run_module():
         result['message'] = 'cannot find SSO_BASE_HOST in .env file'
         sso_base_host = SSO_BASE_HOST
 
+    import rhoas_service_accounts_mgmt_sdk
+    from rhoas_service_accounts_mgmt_sdk.api import service_accounts_api
+    from rhoas_service_accounts_mgmt_sdk.model.service_account_create_request_data import ServiceAccountCreateRequestData
+
     configuration = rhoas_service_accounts_mgmt_sdk.Configuration(
             host = sso_base_host,
     )
 
     configuration.access_token = token["access_token"]
 
-    with rhoas_service_accounts_mgmt_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_service_accounts_mgmt_sdk, configuration) as api_client:
         # Create an instance of the API class
         api_instance = service_accounts_api.ServiceAccountsApi(api_client)
         try:
@@ -145,8 +153,7 @@ def run_module():
                 name=module.params['name'],
                 description=module.params['description'],
             )
-            api_response = api_instance.create_service_account(service_account_create_request_data, async_req=True)
-            api_response = api_response.get().to_dict()
+            api_response = api_instance.create_service_account(service_account_create_request_data).to_dict()
             result['srvce_acc_resp_obj'] = {
                 "client_id" : api_response['client_id'],
                 'client_secret': api_response['secret'],
@@ -6,9 +6,11 @@ from __future__ import (absolute_import, division, print_function)
 import json
 import os
 
-from ..module_utils.common import get_offline_token
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, invalidate_kafka_admin_url, load_env
+from ..module_utils.journal import find_journal_name, journal_event
+from ..module_utils.profiling import start_profile
 from ..module_utils.constants.constants import API_BASE_HOST
-from dotenv import load_dotenv
 
 DOCUMENTATION = r'''
 ---
@@ -18,7 +20,9 @@ short_description: This module deletes a Red Hat OpenShift Streams for Apache Ka
 
 version_added: "0.1.0"
 
-description: This module deletes a Red Hat OpenShift Streams for Apache Kafka Instance by ID.
+description:
+    - This module deletes a Red Hat OpenShift Streams for Apache Kafka Instance by ID.
+    - The deletion is appended to the provisioning journal of the controller, see M(rhoas.rhoas.create_kafka), so that a later C(create_kafka) with the same name creates a new instance.
 
 options:
     kakfa_id:
@@ -32,6 +36,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -57,19 +62,21 @@ env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import rhoas_kafka_mgmt_sdk
-from rhoas_kafka_mgmt_sdk.api import default_api
-import auth.rhoas_auth as auth
-
-load_dotenv(".env")
 
 def run_module():
+    load_env()
+
     module_args = dict(
         kafka_id=dict(type='str', required=True),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -83,6 +90,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'delete_kafka_by_id')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported.'
@@ -102,19 +110,27 @@ def run_module():
     if api_base_host is None:
         result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
         api_base_host = API_BASE_HOST
+
+    import rhoas_kafka_mgmt_sdk
+    from rhoas_kafka_mgmt_sdk.api import default_api
+
     configuration = rhoas_kafka_mgmt_sdk.Configuration(
         host = api_base_host
     )
 
     configuration.access_token = token["access_token"]
 
-    with rhoas_kafka_mgmt_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client:
         # Create an instance of the API class
         api_instance = default_api.DefaultApi(api_client)
         _async = True # bool | Perform the action in an asynchronous manner
         id = module.params['kafka_id'] # str | The ID of the Kafka instance to be deleted.
         try:
-            del_resp = api_instance.delete_kafka_by_id(id, _async, async_req=True)
+            # The SDK models the 202 response as an Error, only the status of the response is of interest
+            response = api_instance.delete_kafka_by_id(id, _async, _preload_content=False)
+            # Drop the cached admin URL so topic and ACL tasks do not target the deprovisioned instance
+            invalidate_kafka_admin_url(api_instance, id)
+            journal_event('deleted', _deleted_kafka_name(response) or find_journal_name(id, api_base_host), id, api_base_host, _deleted_kafka_status(response))
             result['original_message'] = f'Kafka instance with ID: {id} set for deletion'
             result['message'] = "Kafka instance deleted"
             result['changed'] = True
@@ -128,6 +144,19 @@ def run_module():
         except Exception:
             module.fail_json(msg=f'Failed to delete kafka instance with exception.', **result)
 
+def _deleted_kafka_body(response):
+    try:
+        body = json.loads(response.data)
+    except (TypeError, ValueError):
+        return {}
+    return body if isinstance(body, dict) else {}
+
+def _deleted_kafka_name(response):
+    return _deleted_kafka_body(response).get('name')
+
+def _deleted_kafka_status(response):
+    return _deleted_kafka_body(response).get('status')
+
 def main():
     run_module()
 
@@ -6,9 +6,10 @@ from __future__ import (absolute_import, division, print_function)
 import json
 import os
 
-from ..module_utils.common import get_offline_token
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, resolve_kafka_admin_url, load_env
+from ..module_utils.profiling import start_profile
 from ..module_utils.constants.constants import API_BASE_HOST
-from dotenv import load_dotenv
 
 DOCUMENTATION = r'''
 ---
@@ -40,6 +41,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -76,26 +78,23 @@ env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import rhoas_kafka_mgmt_sdk
-from rhoas_kafka_mgmt_sdk.api import default_api
-import auth.rhoas_auth as auth
-import rhoas_kafka_instance_sdk
-import rhoas_kafka_instance_sdk
-from rhoas_kafka_instance_sdk.api import topics_api
-
-load_dotenv(".env")
-
-configuration = rhoas_kafka_instance_sdk.Configuration()
 
 def run_module():
+    load_env()
+
     module_args = dict(
         topic_name=dict(type='str', required=True),
         kafka_id=dict(type='str', required=True),
         kafka_admin_url=dict(type='str', required=False),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -111,6 +110,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'delete_kafka_topic')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
@@ -130,32 +130,39 @@ def run_module():
     if api_base_host is None:
         result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
         api_base_host = API_BASE_HOST
-    kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
-        host = api_base_host,
-    )
 
-    kafka_mgmt_config.access_token = token["access_token"]
+    import rhoas_kafka_instance_sdk
+    from rhoas_kafka_instance_sdk.api import topics_api
+
+    configuration = rhoas_kafka_instance_sdk.Configuration()
 
+    # The management SDK is only needed to resolve the admin URL when it is not passed in
     def get_kafka_mgmt_client():
-        with rhoas_kafka_mgmt_sdk.ApiClient(kafka_mgmt_config) as kafka_mgmt_api_client:
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+        kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        kafka_mgmt_config.access_token = token["access_token"]
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, kafka_mgmt_config) as kafka_mgmt_api_client:
             kafka_mgmt_api_instance = default_api.DefaultApi(kafka_mgmt_api_client)
             return kafka_mgmt_api_instance
 
     def get_kafka_admin_url(kafka_mgmt_api_instance):
         # Check for kafka_admin_url to be used to delete topic
-        while (result['kafka_admin_url'] == ""):
-                kafka_id = module.params['kafka_id']
-
-                try:
-                    kafka_mgmt_api_response = kafka_mgmt_api_instance.get_kafka_by_id(kafka_id)
-                    result['kafka_admin_url'] = kafka_mgmt_api_response['admin_api_server_url']
-                    result['kafka_admin_resp_obj'] = kafka_mgmt_api_response.to_dict()
-                    configuration.host = result['kafka_admin_url']
-                except rhoas_kafka_mgmt_sdk.ApiException as e:
-                    rb = json.loads(e.body)
-                    module.fail_json(msg=f'Failed to delete kafka topic with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.')
-                except Exception as e:
-                    module.fail_json(msg=f'Failed to delete kafka topic with error: `{e}`.')
+        import rhoas_kafka_mgmt_sdk
+        kafka_id = module.params['kafka_id']
+
+        try:
+            result['kafka_admin_url'], result['kafka_admin_resp_obj'] = resolve_kafka_admin_url(kafka_mgmt_api_instance, kafka_id)
+        except rhoas_kafka_mgmt_sdk.ApiException as e:
+            rb = json.loads(e.body)
+            module.fail_json(msg=f'Failed to delete kafka topic with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.')
+        except Exception as e:
+            module.fail_json(msg=f'Failed to delete kafka topic with error: `{e}`.')
+        if not result['kafka_admin_url']:
+            module.fail_json(msg=f'Failed to delete kafka topic, Kafka instance `{kafka_id}` has no admin URL yet. The instance may still be provisioning.')
+        configuration.host = result['kafka_admin_url']
 
     # Check for kafka_admin_url to be used to delete topic
     if (module.params['kafka_admin_url'] is None) or (module.params['kafka_admin_url'] == ""):
@@ -163,7 +170,7 @@ def run_module():
 
     configuration.access_token = token["access_token"]
 
-    with rhoas_kafka_instance_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_kafka_instance_sdk, configuration) as api_client:
         api_instance = topics_api.TopicsApi(api_client)
         topic_name = module.params['topic_name']
 
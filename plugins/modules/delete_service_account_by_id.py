@@ -7,8 +7,9 @@ import json
 import os
 
 from ..module_utils.constants.constants import SSO_BASE_HOST
-from ..module_utils.common import get_offline_token
-from dotenv import load_dotenv
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
 
 DOCUMENTATION = r'''
 ---
@@ -32,6 +33,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -57,19 +59,21 @@ env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-import rhoas_service_accounts_mgmt_sdk
-import auth.rhoas_auth as auth
-from rhoas_service_accounts_mgmt_sdk.api import service_accounts_api
-
-load_dotenv(".env")
 
 def run_module():
+    load_env()
+
     module_args = dict(
         service_account_id=dict(type='str', required=True),
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
     )
 
     result = dict(
@@ -83,6 +87,7 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'delete_service_account_by_id')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
@@ -98,6 +103,9 @@ def run_module():
     else:
         token['access_token'] = get_offline_token(None)
 
+    import rhoas_service_accounts_mgmt_sdk
+    from rhoas_service_accounts_mgmt_sdk.api import service_accounts_api
+
     configuration = rhoas_service_accounts_mgmt_sdk.Configuration()
     sso_base_host = os.getenv("SSO_BASE_HOST")
     if sso_base_host is None:
@@ -108,7 +116,7 @@ def run_module():
     )
     configuration.access_token = token["access_token"]
 
-    with rhoas_service_accounts_mgmt_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_service_accounts_mgmt_sdk, configuration) as api_client:
         api_instance = service_accounts_api.ServiceAccountsApi(api_client)
         try:
             service_account_id = module.params['service_account_id']
@@ -5,11 +5,14 @@
 from __future__ import absolute_import, division, print_function
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from dotenv import load_dotenv
 
-from ..module_utils.common import get_offline_token
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
 from ..module_utils.constants.constants import API_BASE_HOST
+from ..module_utils.kafkas import get_kafkas_page, list_kafkas, project_kafka
 
 DOCUMENTATION = r'''
 ---
@@ -38,6 +41,25 @@ options:
         description: Search query.
         required: false
         type: string
+    all_pages:
+        description:
+            - Return every Kafka instance matching the search instead of a single page.
+            - The first page is fetched to read the total, the remaining pages are then fetched concurrently. I(size) is used as the page size and I(page) is ignored.
+        required: false
+        type: bool
+        default: false
+    fields:
+        description:
+            - Only return these fields of each Kafka instance, for example C(id), C(name) and C(status).
+            - Keeps the registered result small when listing many instances.
+        required: false
+        type: list
+        elements: str
+    concurrency:
+        description: Maximum number of pages fetched at the same time when I(all_pages) is set.
+        required: false
+        type: int
+        default: 10
     openshift_offline_token:
         description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
         required: false
@@ -45,6 +67,7 @@ options:
 
 extends_documentation_fragment:
     - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
 
 author:
     - Red Hat Developer
@@ -59,6 +82,17 @@ EXAMPLES = r'''
         openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
     register:
       kafka_req_resp
+
+  - name: Get the id, name and status of every kafka in the organization
+    rhoas.rhoas.get_kafkas:
+        all_pages: true
+        fields:
+          - id
+          - name
+          - status
+        openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+    register:
+      kafka_req_resp
 '''
 
 RETURN = r'''
@@ -69,30 +103,40 @@ original_message:
     returned: always
     sample: As can be found in the Red Hat App-Services Python SDK https://github.com/redhat-developer/app-services-sdk-python/blob/main/sdks/kafka_mgmt_sdk/docs/KafkaRequestPayload.md\#kafkarequestpayload
 message:
-    description: The output error / exception message that is returned in the case the module generates an error / exception.
+    description:
+        - The list of Kafka instances, with C(page), C(size), C(total) and C(items).
+        - With I(all_pages), C(items) holds the instances of every page and C(size) is the number of instances returned.
+        - The instances are returned as sent by the API rather than converted by the SDK models, so fields unknown to the
+          SDK are kept and the timestamps keep the format of the API.
+        - The output error / exception message that is returned in the case the module generates an error / exception.
     type: dict
-    returned: in case of error / exception
+    returned: always
 env_url_error:
     description: The error message returned if no environment variable is passed for the BASE_HOST URL.
     type: str
     returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
 '''
 
-import rhoas_kafka_mgmt_sdk
 from ansible.module_utils.basic import AnsibleModule
-from rhoas_kafka_mgmt_sdk.api import default_api
-
-load_dotenv(".env")
 
 def run_module():
+    load_env()
+
     # define available arguments/parameters a user can pass to the module
     module_args = dict(
         openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
         page = dict(type='str', required=False),
         size = dict(type='str', required=False),
         order_by = dict(type='str', required=False),
         search = dict(type='str', required=False),
-
+        all_pages = dict(type='bool', required=False, default=False),
+        fields = dict(type='list', elements='str', required=False),
+        concurrency = dict(type='int', required=False, default=10),
     )
 
     result = dict(
@@ -106,11 +150,15 @@ def run_module():
         argument_spec=module_args,
         supports_check_mode=False
     )
+    start_profile(module, 'get_kafkas')
 
     if module.check_mode:
         result['message'] = 'Check mode is not supported'
         module.exit_json(**result)
 
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1', **result)
+
     token = {}
     if os.environ.get('API_BASE_HOST') is None:
         os.environ['API_BASE_HOST'] = API_BASE_HOST
@@ -125,13 +173,19 @@ def run_module():
     if api_base_host is None:
         result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
         api_base_host = API_BASE_HOST
+
+    import rhoas_kafka_mgmt_sdk
+    from rhoas_kafka_mgmt_sdk.api import default_api
+
     configuration = rhoas_kafka_mgmt_sdk.Configuration(
         host = api_base_host,
     )
 
     configuration.access_token = token["access_token"]
+    # Keep one pooled connection per worker so concurrent page requests do not open and drop connections
+    configuration.connection_pool_maxsize = module.params['concurrency']
     # Enter a context with an instance of the API client
-    with rhoas_kafka_mgmt_sdk.ApiClient(configuration) as api_client:
+    with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client:
         # Create an instance of the API class
         api_instance = default_api.DefaultApi(api_client)
         _async = True # bool | Perform the action in an asynchronous manner
@@ -156,8 +210,14 @@ def run_module():
         else:
             search = "" # str | Search criteria.  The syntax of this parameter is similar to the syntax of the `where` clause of an SQL statement. Allowed fields in the search are `cloud_provider`, `name`, `owner`, `region`, and `status`. Allowed comparators are `<>`, `=`, `LIKE`, or `ILIKE`. Allowed joins are `AND` and `OR`. However, you can use a maximum of 10 joins in a search query.  Examples:  To return a Kafka instance with the name `my-kafka` and the region `aws`, use the following syntax:  ``` name = my-kafka and cloud_provider = aws ```[p-]  To return a Kafka instance with a name that starts with `my`, use the following syntax:  ``` name like my%25 ```  To return a Kafka instance with a name containing `test` matching any character case combinations, use the following syntax:  ``` name ilike %25test%25 ```  If the parameter isn't provided, or if the value is empty, then all the Kafka instances that the user has permission to see are returned.  Note. If the query is invalid, an error is returned.  (optional)
         try:
-            api_response = api_instance.get_kafkas(async_req=True, page=page, size=size, order_by=order_by, search=search)
-            kafka_req_resp = api_response.get(20000).to_dict()
+            if module.params['all_pages']:
+                with ThreadPoolExecutor(max_workers=module.params['concurrency']) as executor:
+                    total, items = list_kafkas(api_instance, executor, page_size=int(size), order_by=order_by, search=search)
+                kafka_req_resp = dict(kind='KafkaRequestList', page=1, size=len(items), total=total, items=items)
+            else:
+                kafka_req_resp = get_kafkas_page(api_instance, page, size, order_by=order_by, search=search)
+            if module.params['fields']:
+                kafka_req_resp['items'] = [project_kafka(kafka, module.params['fields']) for kafka in kafka_req_resp.get('items') or []]
             result['message'] = kafka_req_resp
 
             # exit the module and return the state
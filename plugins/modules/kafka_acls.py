@@ -0,0 +1,427 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, resolve_kafka_admin_url, load_env
+from ..module_utils.profiling import start_profile
+from ..module_utils.constants.constants import API_BASE_HOST
+
+DOCUMENTATION = r'''
+---
+module: kafka_acls
+
+short_description: Manage many Access Control List (ACL) bindings on a Red Hat OpenShift Streams for Apache Kafka Instance in a single task.
+
+version_added: "0.1.1"
+
+description:
+    - Create a list of Access Control List (ACL) bindings on a Red Hat OpenShift Streams for Apache Kafka Instance.
+    - The existing bindings of the instance are listed once and only the bindings that are missing are created,
+      concurrently. When every binding already exists no changes are made.
+    - With I(exclusive=true) the bindings that are not in the list are removed. The removals are grouped into as few
+      filtered deletes as possible, for example a principal that loses all of its bindings is removed with a single call.
+    - Check mode, together with diff mode, reports the bindings that would be created and removed without changing anything.
+
+options:
+    kafka_id:
+        description: ID of the Kafka instance. Required if I(kafka_admin_url) is not provided.
+        required: false
+        type: str
+    kafka_admin_url:
+        description: Kafka Admin URL. Passing it saves the lookup of the URL from the I(kafka_id).
+        required: false
+        type: str
+    bindings:
+        description: List of ACL bindings.
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            principal:
+                description: ID of the User or Service Account to bind the ACL to, with or without the C(User:) prefix.
+                required: true
+                type: str
+            resource_type:
+                description: Resource type of ACL.
+                required: true
+                type: str
+            resource_name:
+                description: Resource name of topic for the ACL.
+                required: true
+                type: str
+            pattern_type:
+                description: Pattern type of ACL.
+                required: true
+                type: str
+            operation_type:
+                description: Operation type of ACL.
+                required: true
+                type: str
+            permission_type:
+                description: Permission type of ACL.
+                required: true
+                type: str
+    exclusive:
+        description:
+            - Remove the bindings of the instance that are not in I(bindings).
+            - Use I(exclusive_principals) to limit which bindings can be removed.
+        required: false
+        type: bool
+        default: false
+    exclusive_principals:
+        description:
+            - Only remove bindings of these principals when I(exclusive=true). The principals are normalised the same way as in I(bindings).
+            - If not provided, every binding of the instance that is not in I(bindings) is removed, including the bindings of other users.
+        required: false
+        type: list
+        elements: str
+    concurrency:
+        description: Maximum number of API calls made at the same time.
+        required: false
+        type: int
+        default: 10
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+
+extends_documentation_fragment:
+    - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+  - name: Create kafka ACL bindings
+    rhoas.rhoas.kafka_acls:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      bindings:
+        - principal: "{{ srvce_acc_resp_obj['client_id'] }}"
+          resource_type: "Topic"
+          resource_name: "orders"
+          pattern_type: "PREFIXED"
+          operation_type: "read"
+          permission_type: "allow"
+        - principal: "{{ srvce_acc_resp_obj['client_id'] }}"
+          resource_type: "Group"
+          resource_name: "*"
+          pattern_type: "LITERAL"
+          operation_type: "read"
+          permission_type: "allow"
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+    register: kafka_acls_resp
+
+  - name: Preview which bindings of the service accounts are not in the desired list
+    rhoas.rhoas.kafka_acls:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      bindings: "{{ desired_acl_bindings }}"
+      exclusive: true
+      exclusive_principals: "{{ service_account_client_ids }}"
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+    check_mode: true
+    diff: true
+'''
+
+RETURN = r'''
+message:
+    description: A summary of the changes made.
+    type: str
+    returned: always
+    sample: "2 ACL bindings created, 3 deleted, 38 unchanged, 0 failed"
+bindings:
+    description: The result of each binding in the order they were passed in, followed by the bindings removed because of I(exclusive).
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        binding:
+            description: The normalised binding, as it is stored by the Kafka instance.
+            type: dict
+        status:
+            description: One of C(created), C(deleted), C(unchanged) or C(failed).
+            type: str
+        elapsed_seconds:
+            description: Time taken by the API call of the binding.
+            type: float
+            returned: when an API call was made for the binding
+        msg:
+            description: The reason of the failure.
+            type: str
+            returned: when status is C(failed)
+delete_filters:
+    description: The filtered deletes used to remove the bindings not in I(bindings).
+    type: list
+    elements: dict
+    returned: when I(exclusive=true)
+    contains:
+        filter:
+            description: The filter passed to the delete call.
+            type: dict
+            sample: {"principal": "User:srvc-acct-1234"}
+        count:
+            description: Number of bindings removed by the filter.
+            type: int
+        status:
+            description: One of C(deleted) or C(failed).
+            type: str
+diff:
+    description: The bindings removed (before) and created (after), one per line.
+    type: dict
+    returned: in diff mode
+timings:
+    description:
+        - Aggregate timings of the task, in seconds.
+        - When C(profile) is enabled it also has the C(total_ms), C(phases) and C(calls) described by the I(profile) option.
+    type: dict
+    returned: always
+    sample: {"total": 1.2, "list": 0.2, "apply": 0.9}
+kafka_admin_resp_obj:
+    description: The response object from the Kafka management API.
+    type: dict
+    returned: If no kafka_admin_url is passed but the Kafka ID is passed, when the module is successful.
+kafka_admin_url:
+    description: The Kafka Admin URL. This is the URL of the Kafka instance to connect to.
+    type: str
+    returned: always
+env_url_error:
+    description: The error message returned if no environment variable is passed for the BASE_HOST URL.
+    type: str
+    returned: when the module uses default url instead of passed environment variable
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.acls import acl_binding_from_key, acl_binding_key, acl_binding_str, delete_acl_bindings, group_acl_removals, list_acl_bindings, normalize_principal
+
+def run_module():
+    load_env()
+
+    binding_spec = dict(
+        principal=dict(type='str', required=True),
+        resource_type=dict(type='str', required=True),
+        resource_name=dict(type='str', required=True),
+        pattern_type=dict(type='str', required=True),
+        operation_type=dict(type='str', required=True),
+        permission_type=dict(type='str', required=True),
+    )
+    module_args = dict(
+        kafka_id=dict(type='str', required=False),
+        kafka_admin_url=dict(type='str', required=False),
+        bindings=dict(type='list', elements='dict', options=binding_spec, required=True),
+        exclusive=dict(type='bool', required=False, default=False),
+        exclusive_principals=dict(type='list', elements='str', required=False),
+        concurrency=dict(type='int', required=False, default=10),
+        openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
+    )
+
+    result = dict(
+        changed=False,
+        message='',
+        bindings=[],
+        delete_filters=[],
+        timings=dict(),
+        kafka_admin_resp_obj=dict(),
+        kafka_admin_url='',
+        env_url_error='',
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[('kafka_id', 'kafka_admin_url')],
+        supports_check_mode=True
+    )
+    start_profile(module, 'kafka_acls')
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1', **result)
+
+    started = time.monotonic()
+
+    token = {}
+    if os.environ.get('API_BASE_HOST') is None:
+        os.environ['API_BASE_HOST'] = API_BASE_HOST
+    if "http://localhost" in os.environ.get("API_BASE_HOST"):
+        token['access_token'] = "DUMMY_TOKEN_FOR_MOCK"
+    elif module.params['openshift_offline_token'] is not None:
+        token['access_token'] = get_offline_token(module.params['openshift_offline_token'])
+    else:
+        token['access_token'] = get_offline_token(None)
+
+    api_base_host = os.getenv("API_BASE_HOST")
+    if api_base_host is None:
+        result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
+        api_base_host = API_BASE_HOST
+
+    if (module.params['kafka_admin_url'] is None) or (module.params['kafka_admin_url'] == ""):
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+        kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        kafka_mgmt_config.access_token = token["access_token"]
+        kafka_id = module.params['kafka_id']
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, kafka_mgmt_config) as kafka_mgmt_api_client:
+            kafka_mgmt_api_instance = default_api.DefaultApi(kafka_mgmt_api_client)
+            try:
+                result['kafka_admin_url'], result['kafka_admin_resp_obj'] = resolve_kafka_admin_url(kafka_mgmt_api_instance, kafka_id)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                rb = json.loads(e.body)
+                module.fail_json(msg=f'Failed to get kafka admin URL with API exception code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
+            except Exception as e:
+                module.fail_json(msg=f'Failed to get kafka admin URL with general exception: `{e}`.', **result)
+        if not result['kafka_admin_url']:
+            module.fail_json(msg=f'Failed to get kafka admin URL, Kafka instance `{kafka_id}` has no admin URL yet. The instance may still be provisioning.', **result)
+    else:
+        result['kafka_admin_url'] = module.params['kafka_admin_url']
+
+    # Normalise the bindings up front so they can be matched against the ones listed from the instance
+    try:
+        desired = [
+            acl_binding_key(
+                resource_type=binding['resource_type'],
+                resource_name=binding['resource_name'],
+                pattern_type=binding['pattern_type'],
+                principal=binding['principal'],
+                operation=binding['operation_type'],
+                permission=binding['permission_type'],
+            )
+            for binding in module.params['bindings']
+        ]
+        for key in desired:
+            acl_binding_from_key(key)
+    except Exception as e:
+        module.fail_json(msg=f'Invalid Access Control List binding: `{e}`', **result)
+
+    import rhoas_kafka_instance_sdk
+    from rhoas_kafka_instance_sdk.api import acls_api
+
+    configuration = rhoas_kafka_instance_sdk.Configuration(
+        host = result['kafka_admin_url'],
+    )
+    configuration.access_token = token["access_token"]
+    configuration.connection_pool_maxsize = module.params['concurrency']
+
+    with pooled_api_client(rhoas_kafka_instance_sdk, configuration) as api_client, ThreadPoolExecutor(max_workers=module.params['concurrency']) as executor:
+        api_instance = acls_api.AclsApi(api_client)
+
+        list_started = time.monotonic()
+        try:
+            existing_bindings = list_acl_bindings(api_instance, executor)
+        except rhoas_kafka_instance_sdk.ApiException as e:
+            module.fail_json(msg=f'Failed to list Access Control List bindings with error: `{e.status} {e.reason}` because `{e.body}`', **result)
+        except Exception as e:
+            module.fail_json(msg=f'Failed to list Access Control List bindings with error: `{e}`', **result)
+        list_elapsed = time.monotonic() - list_started
+
+        # A binding listed twice is only created once
+        pending = set()
+        actions = []
+        for key in desired:
+            if key in existing_bindings or key in pending:
+                actions.append(('unchanged', key))
+            else:
+                pending.add(key)
+                actions.append(('create', key))
+
+        removals = set()
+        if module.params['exclusive']:
+            removals = existing_bindings - set(desired)
+            if module.params['exclusive_principals'] is not None:
+                principals = set(normalize_principal(principal) for principal in module.params['exclusive_principals'])
+                removals = set(key for key in removals if key.principal in principals)
+        delete_groups = group_acl_removals(existing_bindings, removals)
+
+        if module._diff:
+            result['diff'] = dict(
+                before=''.join(f'{acl_binding_str(key)}\n' for key in sorted(removals)),
+                after=''.join(f'{acl_binding_str(key)}\n' for key in sorted(pending)),
+            )
+
+        def delete_group(group):
+            delete_filter, bindings = group
+            filter_result = dict(filter=delete_filter, count=len(bindings), status='deleted')
+            if module.check_mode:
+                return filter_result
+            delete_started = time.monotonic()
+            try:
+                delete_acl_bindings(api_instance, delete_filter)
+            except rhoas_kafka_instance_sdk.ApiException as e:
+                filter_result['status'] = 'failed'
+                try:
+                    rb = json.loads(e.body)
+                    filter_result['msg'] = f'Failed to delete Access Control List bindings with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.'
+                except (TypeError, ValueError, KeyError):
+                    filter_result['msg'] = f'Failed to delete Access Control List bindings with error: `{e}`.'
+            except Exception as e:
+                filter_result['status'] = 'failed'
+                filter_result['msg'] = f'Failed to delete Access Control List bindings with error: `{e}`.'
+            filter_result['elapsed_seconds'] = round(time.monotonic() - delete_started, 3)
+            return filter_result
+
+        def apply_action(action):
+            kind, key = action
+            binding_result = dict(binding=key._asdict())
+            if kind == 'unchanged':
+                binding_result['status'] = 'unchanged'
+                return binding_result
+            binding_result['status'] = 'created'
+            if module.check_mode:
+                return binding_result
+
+            binding_started = time.monotonic()
+            try:
+                api_instance.create_acl(acl_binding_from_key(key))
+            except rhoas_kafka_instance_sdk.ApiException as e:
+                binding_result['status'] = 'failed'
+                try:
+                    rb = json.loads(e.body)
+                    binding_result['msg'] = f'Failed to create Access Control List binding with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.'
+                except (TypeError, ValueError, KeyError):
+                    binding_result['msg'] = f'Failed to create Access Control List binding with error: `{e}`.'
+            except Exception as e:
+                binding_result['status'] = 'failed'
+                binding_result['msg'] = f'Failed to create Access Control List binding with error: `{e}`.'
+            binding_result['elapsed_seconds'] = round(time.monotonic() - binding_started, 3)
+            return binding_result
+
+        # Deletes run first, a broad filter must never catch a binding created by this task
+        apply_started = time.monotonic()
+        result['delete_filters'] = list(executor.map(delete_group, delete_groups))
+        result['bindings'] = list(executor.map(apply_action, actions))
+        apply_elapsed = time.monotonic() - apply_started
+
+    for (delete_filter, bindings), filter_result in zip(delete_groups, result['delete_filters']):
+        for key in sorted(bindings):
+            removed = dict(binding=key._asdict(), status=filter_result['status'])
+            if 'msg' in filter_result:
+                removed['msg'] = filter_result['msg']
+            result['bindings'].append(removed)
+
+    result['timings'] = dict(
+        total=round(time.monotonic() - started, 3),
+        list=round(list_elapsed, 3),
+        apply=round(apply_elapsed, 3),
+    )
+
+    counts = {status: sum(1 for binding in result['bindings'] if binding['status'] == status) for status in ('created', 'deleted', 'unchanged', 'failed')}
+    result['changed'] = counts['created'] > 0 or counts['deleted'] > 0
+    result['message'] = f'{counts["created"]} ACL bindings created, {counts["deleted"]} deleted, {counts["unchanged"]} unchanged, {counts["failed"]} failed'
+    if counts['failed']:
+        module.fail_json(msg=f'Failed to apply {counts["failed"]} of {len(result["bindings"])} Access Control List binding changes', **result)
+    module.exit_json(**result)
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, resolve_kafka_admin_url, load_env
+from ..module_utils.profiling import start_profile
+from ..module_utils.constants.constants import API_BASE_HOST
+
+DOCUMENTATION = r'''
+---
+module: kafka_topics
+
+short_description: Manage many topics on a Red Hat OpenShift Streams for Apache Kafka Instance in a single task.
+
+version_added: "0.1.1"
+
+description:
+    - Declaratively manage a list of topics on a Red Hat OpenShift Streams for Apache Kafka Instance.
+    - The topics of the instance are listed once and compared with the list of topics passed in. Topics are only
+      created, updated or deleted where they differ, so re-running the task against an instance that already
+      matches makes no changes.
+    - Authentication and the Kafka Admin URL lookup are done once for the whole list and the changes are applied concurrently.
+
+options:
+    kafka_id:
+        description: ID of the Kafka instance. Required if I(kafka_admin_url) is not provided.
+        required: false
+        type: str
+    kafka_admin_url:
+        description: Admin URL of the Kafka instance. Passing it saves the lookup of the URL from the I(kafka_id).
+        required: false
+        type: str
+    topics:
+        description:
+            - List of topics to manage.
+            - Only the settings given for a topic are compared, settings that are left out keep their current value.
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: Name of the topic.
+                required: true
+                type: str
+            partitions:
+                description: Number of partitions for the topic.
+                required: false
+                type: int
+            retention_size_bytes:
+                description: Retention size in bytes for the topic.
+                required: false
+                type: str
+            retention_period_ms:
+                description: Retention period in milliseconds for the topic.
+                required: false
+                type: str
+            cleanup_policy:
+                description: Cleanup policy for the topic.
+                required: false
+                type: str
+    state:
+        description: Whether the topics should exist or not.
+        required: false
+        type: str
+        choices: ['present', 'absent']
+        default: present
+    exclusive:
+        description:
+            - Delete every topic of the instance that is not in I(topics). Internal topics are never deleted.
+            - Only used when I(state=present).
+        required: false
+        type: bool
+        default: false
+    concurrency:
+        description: Maximum number of topics changed at the same time.
+        required: false
+        type: int
+        default: 10
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+
+extends_documentation_fragment:
+    - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+  - name: Create Kafka Topics
+    rhoas.rhoas.kafka_topics:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      concurrency: 20
+      topics:
+        - name: "orders"
+          partitions: 3
+          retention_period_ms: "86400000"
+          cleanup_policy: "delete"
+        - name: "customers"
+          cleanup_policy: "compact"
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+    register:
+      kafka_topics_res_obj
+
+  - name: Make sure the instance only has the listed topics
+    rhoas.rhoas.kafka_topics:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      exclusive: true
+      topics:
+        - name: "orders"
+          partitions: 6
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+
+  - name: Delete Kafka Topics
+    rhoas.rhoas.kafka_topics:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      state: absent
+      topics:
+        - name: "orders"
+        - name: "customers"
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+'''
+
+RETURN = r'''
+message:
+    description: A summary of the changes made.
+    type: str
+    returned: always
+    sample: "3 topics created, 1 updated, 0 deleted, 12 unchanged, 0 failed"
+topics:
+    description: The result of each topic in the order they were passed in, followed by the topics deleted because of I(exclusive).
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description: Name of the topic.
+            type: str
+        status:
+            description: One of C(created), C(updated), C(deleted), C(unchanged) or C(failed).
+            type: str
+        changes:
+            description: The settings that differed, with their C(before) and C(after) values.
+            type: dict
+            returned: when status is C(updated)
+            sample: {"partitions": {"before": 1, "after": 3}, "config": {"cleanup.policy": {"before": "delete", "after": "compact"}}}
+        elapsed_seconds:
+            description: Time taken by the API call for the topic.
+            type: float
+            returned: when an API call was made for the topic
+        topic:
+            description: The topic returned by the Kafka Admin REST API.
+            type: dict
+            returned: when status is C(created) or C(updated)
+        msg:
+            description: The reason of the failure.
+            type: str
+            returned: when status is C(failed)
+timings:
+    description:
+        - Aggregate timings of the task, in seconds.
+        - When C(profile) is enabled it also has the C(total_ms), C(phases) and C(calls) described by the I(profile) option.
+    type: dict
+    returned: always
+    sample: {"total": 4.2, "list": 0.2, "apply": 3.9, "min": 0.31, "max": 1.2, "mean": 0.55}
+kafka_admin_resp_obj:
+    description: The response object from the Kafka Admin REST API which details the Kafka instance
+    type: dict
+    returned: if no Kafka Admin URL is provided in the module parameters and the Kafka Admin URL is retrieved from the Kafka Admin REST API
+kafka_admin_url:
+    description: The Kafka Admin URL of the Kafka instance
+    type: str
+    returned: always
+env_url_error:
+    description: The error message returned if no environment variable is passed for the BASE_HOST URL.
+    type: str
+    returned: If the module uses default url instead of passed environment variable.
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.topics import list_topics, topic_changes, topic_settings_from_spec, topic_update_settings
+
+def run_module():
+    load_env()
+
+    topic_spec = dict(
+        name=dict(type='str', required=True),
+        partitions=dict(type='int', required=False),
+        retention_size_bytes=dict(type='str', required=False),
+        retention_period_ms=dict(type='str', required=False),
+        cleanup_policy=dict(type='str', required=False),
+    )
+    module_args = dict(
+        kafka_id=dict(type='str', required=False),
+        kafka_admin_url=dict(type='str', required=False),
+        topics=dict(type='list', elements='dict', options=topic_spec, required=True),
+        state=dict(type='str', required=False, default='present', choices=['present', 'absent']),
+        exclusive=dict(type='bool', required=False, default=False),
+        concurrency=dict(type='int', required=False, default=10),
+        openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
+    )
+
+    result = dict(
+        changed=False,
+        message='',
+        topics=[],
+        timings=dict(),
+        kafka_admin_resp_obj=dict(),
+        kafka_admin_url='',
+        env_url_error='',
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_one_of=[('kafka_id', 'kafka_admin_url')],
+        supports_check_mode=True
+    )
+    start_profile(module, 'kafka_topics')
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1', **result)
+    names = [spec['name'] for spec in module.params['topics']]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg=f'Topics must only be listed once, found duplicates: {", ".join(duplicates)}', **result)
+
+    started = time.monotonic()
+
+    token = {}
+    if os.environ.get('API_BASE_HOST') is None:
+        os.environ['API_BASE_HOST'] = API_BASE_HOST
+    if "http://localhost" in os.environ.get("API_BASE_HOST"):
+        token['access_token'] = "DUMMY_TOKEN_FOR_MOCK"
+    elif module.params['openshift_offline_token'] is not None:
+        token['access_token'] = get_offline_token(module.params['openshift_offline_token'])
+    else:
+        token['access_token'] = get_offline_token(None)
+
+    api_base_host = os.getenv("API_BASE_HOST")
+    if api_base_host is None:
+        result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
+        api_base_host = API_BASE_HOST
+
+    if (module.params['kafka_admin_url'] is None) or (module.params['kafka_admin_url'] == ""):
+        import rhoas_kafka_mgmt_sdk
+        from rhoas_kafka_mgmt_sdk.api import default_api
+        kafka_mgmt_config = rhoas_kafka_mgmt_sdk.Configuration(
+            host = api_base_host,
+        )
+        kafka_mgmt_config.access_token = token["access_token"]
+        kafka_id = module.params['kafka_id']
+        with pooled_api_client(rhoas_kafka_mgmt_sdk, kafka_mgmt_config) as kafka_mgmt_api_client:
+            kafka_mgmt_api_instance = default_api.DefaultApi(kafka_mgmt_api_client)
+            try:
+                result['kafka_admin_url'], result['kafka_admin_resp_obj'] = resolve_kafka_admin_url(kafka_mgmt_api_instance, kafka_id)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                rb = json.loads(e.body)
+                module.fail_json(msg=f'Failed to get kafka admin URL with API exception code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
+            except Exception as e:
+                module.fail_json(msg=f'Failed to get kafka admin URL with general exception: `{e}`.', **result)
+        if not result['kafka_admin_url']:
+            module.fail_json(msg=f'Failed to get kafka admin URL, Kafka instance `{kafka_id}` has no admin URL yet. The instance may still be provisioning.', **result)
+    else:
+        result['kafka_admin_url'] = module.params['kafka_admin_url']
+
+    import rhoas_kafka_instance_sdk
+    from rhoas_kafka_instance_sdk.api import topics_api
+    from rhoas_kafka_instance_sdk.model.new_topic_input import NewTopicInput
+
+    configuration = rhoas_kafka_instance_sdk.Configuration(
+        host = result['kafka_admin_url'],
+    )
+    configuration.access_token = token["access_token"]
+    # Keep one pooled connection per worker so concurrent requests do not open and drop connections
+    configuration.connection_pool_maxsize = module.params['concurrency']
+
+    with pooled_api_client(rhoas_kafka_instance_sdk, configuration) as api_client, ThreadPoolExecutor(max_workers=module.params['concurrency']) as executor:
+        api_instance = topics_api.TopicsApi(api_client)
+
+        list_started = time.monotonic()
+        try:
+            existing_topics = list_topics(api_instance, executor)
+        except rhoas_kafka_instance_sdk.ApiException as e:
+            module.fail_json(msg=f'Failed to list kafka topics with error: `{e.status} {e.reason}` because `{e.body}`', **result)
+        except Exception as e:
+            module.fail_json(msg=f'Failed to list kafka topics with error: `{e}`', **result)
+        list_elapsed = time.monotonic() - list_started
+
+        # Work out what has to change against the snapshot of the instance, topics that match are left alone
+        actions = []
+        for spec in module.params['topics']:
+            topic = existing_topics.get(spec['name'])
+            if module.params['state'] == 'absent':
+                actions.append(('delete', spec, None) if topic is not None else ('unchanged', spec, None))
+            elif topic is None:
+                actions.append(('create', spec, None))
+            else:
+                changes = topic_changes(spec, topic)
+                actions.append(('update', spec, changes) if changes else ('unchanged', spec, None))
+        if module.params['state'] == 'present' and module.params['exclusive']:
+            for name, topic in sorted(existing_topics.items()):
+                if name not in names and not topic.get('isInternal') and not name.startswith('__'):
+                    actions.append(('delete', dict(name=name), None))
+
+        def apply_action(action):
+            kind, spec, changes = action
+            topic_result = dict(name=spec['name'])
+            if changes:
+                topic_result['changes'] = changes
+            if kind == 'unchanged':
+                topic_result['status'] = 'unchanged'
+                return topic_result
+            if kind == 'update' and changes.get('partitions', {}).get('after', 0) < changes.get('partitions', {}).get('before', 0):
+                topic_result['status'] = 'failed'
+                topic_result['msg'] = f'The number of partitions of a topic cannot be decreased from {changes["partitions"]["before"]} to {changes["partitions"]["after"]}'
+                return topic_result
+            topic_result['status'] = dict(create='created', update='updated', delete='deleted')[kind]
+            if module.check_mode:
+                return topic_result
+
+            topic_started = time.monotonic()
+            try:
+                if kind == 'create':
+                    new_topic_input = NewTopicInput(
+                        name=spec['name'],
+                        settings=topic_settings_from_spec(spec),
+                    )
+                    topic_result['topic'] = api_instance.create_topic(new_topic_input).to_dict()
+                elif kind == 'update':
+                    topic_result['topic'] = api_instance.update_topic(spec['name'], topic_update_settings(changes)).to_dict()
+                else:
+                    api_instance.delete_topic(spec['name'])
+            except rhoas_kafka_instance_sdk.ApiException as e:
+                topic_result['status'] = 'failed'
+                try:
+                    rb = json.loads(e.body)
+                    topic_result['msg'] = f'Failed to {kind} kafka topic with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.'
+                except (TypeError, ValueError, KeyError):
+                    topic_result['msg'] = f'Failed to {kind} kafka topic with error: `{e}`'
+            except Exception as e:
+                topic_result['status'] = 'failed'
+                topic_result['msg'] = f'Failed to {kind} kafka topic with error: `{e}`'
+            topic_result['elapsed_seconds'] = round(time.monotonic() - topic_started, 3)
+            return topic_result
+
+        apply_started = time.monotonic()
+        result['topics'] = list(executor.map(apply_action, actions))
+        apply_elapsed = time.monotonic() - apply_started
+
+    per_topic = [topic['elapsed_seconds'] for topic in result['topics'] if 'elapsed_seconds' in topic]
+    result['timings'] = dict(
+        total=round(time.monotonic() - started, 3),
+        list=round(list_elapsed, 3),
+        apply=round(apply_elapsed, 3),
+        min=min(per_topic, default=0),
+        max=max(per_topic, default=0),
+        mean=round(sum(per_topic) / len(per_topic), 3) if per_topic else 0,
+    )
+
+    statuses = ('created', 'updated', 'deleted', 'unchanged', 'failed')
+    counts = {status: sum(1 for topic in result['topics'] if topic['status'] == status) for status in statuses}
+    result['changed'] = any(counts[status] for status in ('created', 'updated', 'deleted'))
+    result['message'] = f'{counts["created"]} topics created, {counts["updated"]} updated, {counts["deleted"]} deleted, {counts["unchanged"]} unchanged, {counts["failed"]} failed'
+    if counts['failed']:
+        module.fail_json(msg=f'Failed to apply {counts["failed"]} of {len(result["topics"])} kafka topic changes', **result)
+    module.exit_json(**result)
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
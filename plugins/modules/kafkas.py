@@ -0,0 +1,397 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
+from ..module_utils.constants.constants import API_BASE_HOST, KAFKA_WAIT_TIMEOUT_SECONDS
+from ..module_utils.kafkas import kafka_spec_mismatch_msg, kafka_spec_mismatches, search_kafkas_by_name, wait_for_kafkas_ready
+
+DOCUMENTATION = r'''
+---
+module: kafkas
+
+short_description: Create many Red Hat OpenShift Streams for Apache Kafka Instances in a single task.
+
+version_added: "0.1.1"
+
+description:
+    - Create a batch of Red Hat OpenShift Streams for Apache Kafka Instances and wait for all of them to be ready.
+    - The instances are looked up by name once, and only the instances that do not exist yet are created. The
+      create requests are sent concurrently.
+    - An instance that is being deleted does not count as existing, a new instance with its name is created.
+    - An existing instance with another C(cloud_provider), C(region) or C(plan) than requested is C(failed).
+    - Readiness of the whole batch is tracked with one name search of the Kafka Management API per poll interval,
+      rather than one status request per instance, so waiting for the batch takes about as long as the slowest instance.
+
+options:
+    kafkas:
+        description:
+            - List of Kafka instances to create.
+            - I(cloud_provider), I(region), I(plan) and I(billing_model) default to the values of the options of the same name.
+        required: true
+        type: list
+        elements: dict
+        suboptions:
+            name:
+                description: Name of the Kafka instance.
+                required: true
+                type: str
+            cloud_provider:
+                description: Cloud provider for the Kafka instance.
+                required: false
+                type: str
+            region:
+                description: Region that the Kafka instance is to be situated in.
+                required: false
+                type: str
+            plan:
+                description: Plan for the Kafka instance.
+                required: false
+                type: str
+            billing_model:
+                description: Billing model for the Kafka instance.
+                required: false
+                type: str
+            billing_cloud_account_id:
+                description: Billing cloud account id for the Kafka instance.
+                required: false
+                type: str
+            marketplace:
+                description: Marketplace for the Kafka instance.
+                required: false
+                type: str
+            reauthentication_enabled:
+                description: Reauthentication enabled for the Kafka instance.
+                required: false
+                type: bool
+                default: true
+    cloud_provider:
+        description: Cloud provider for the Kafka instances that do not set one.
+        required: false
+        type: str
+    region:
+        description: Region for the Kafka instances that do not set one.
+        required: false
+        type: str
+    plan:
+        description: Plan for the Kafka instances that do not set one.
+        required: false
+        type: str
+    billing_model:
+        description: Billing model for the Kafka instances that do not set one.
+        required: false
+        type: str
+    wait:
+        description: Wait for all the Kafka instances to be ready before returning.
+        required: false
+        type: bool
+        default: true
+    wait_timeout:
+        description:
+            - Number of seconds to wait for the Kafka instances to be ready. Instances that are not ready by then are reported as failed.
+            - The status is polled with an exponential backoff, starting at 5 seconds and growing to at most 60 seconds between polls.
+        required: false
+        type: int
+        default: 1800
+    concurrency:
+        description: Maximum number of requests sent to the Kafka Management API at the same time.
+        required: false
+        type: int
+        default: 10
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+
+extends_documentation_fragment:
+    - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+  - name: Create a Kafka instance per team
+    rhoas.rhoas.kafkas:
+      cloud_provider: "aws"
+      region: "us-east-1"
+      plan: "developer.x1"
+      billing_model: "standard"
+      kafkas:
+        - name: "kafka-payments"
+        - name: "kafka-search"
+        - name: "kafka-shipping"
+      openshift_offline_token: "OPENSHIFT_OFFLINE_TOKEN"
+    register:
+      kafkas_res_obj
+
+  - name: Create Kafka instances in different regions
+    rhoas.rhoas.kafkas:
+      plan: "developer.x1"
+      billing_model: "standard"
+      cloud_provider: "aws"
+      kafkas:
+        - name: "orders-us"
+          region: "us-east-1"
+        - name: "orders-eu"
+          region: "eu-west-1"
+      wait_timeout: 2400
+'''
+
+RETURN = r'''
+message:
+    description: A summary of the changes made.
+    type: str
+    returned: always
+    sample: "18 kafka instances created, 2 unchanged, 0 failed"
+kafkas:
+    description: The result of each Kafka instance in the order they were passed in.
+    type: list
+    elements: dict
+    returned: always
+    contains:
+        name:
+            description: Name of the Kafka instance.
+            type: str
+        status:
+            description: One of C(created), C(unchanged) or C(failed). Instances that already existed are C(unchanged).
+            type: str
+        kafka_id:
+            description: The id of the Kafka instance.
+            type: str
+            returned: when the instance exists
+        kafka_state:
+            description: The last known state of the Kafka instance.
+            type: str
+            returned: when the instance exists
+        kafka_admin_url:
+            description: The admin url for the Kafka instance.
+            type: str
+            returned: when the instance exists
+        kafka:
+            description: The Kafka instance as last returned by the Kafka Management API.
+            type: dict
+            returned: when the instance exists
+        msg:
+            description: The reason of the failure.
+            type: str
+            returned: when status is C(failed)
+polls:
+    description: Number of times the batch was polled while waiting for the Kafka instances to be ready.
+    type: int
+    returned: always
+timings:
+    description:
+        - Time taken in seconds by the whole task, by the create requests and by the wait for readiness.
+        - When C(profile) is enabled it also has the C(total_ms), C(phases) and C(calls) described by the I(profile) option.
+    type: dict
+    returned: always
+    sample: {"total": 912.3, "create": 1.2, "wait": 910.8}
+env_url_error:
+    description: The error message returned if no environment variable is passed for the BASE_HOST URL.
+    type: str
+    returned: If the module uses default url instead of passed environment variable.
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+KAFKA_REQUIRED_FIELDS = ('cloud_provider', 'region', 'plan', 'billing_model')
+
+def run_module():
+    load_env()
+
+    kafka_spec = dict(
+        name=dict(type='str', required=True),
+        cloud_provider=dict(type='str', required=False),
+        region=dict(type='str', required=False),
+        plan=dict(type='str', required=False),
+        billing_model=dict(type='str', required=False),
+        billing_cloud_account_id=dict(type='str', required=False),
+        marketplace=dict(type='str', required=False),
+        reauthentication_enabled=dict(type='bool', required=False, default=True),
+    )
+    module_args = dict(
+        kafkas=dict(type='list', elements='dict', options=kafka_spec, required=True),
+        cloud_provider=dict(type='str', required=False),
+        region=dict(type='str', required=False),
+        plan=dict(type='str', required=False),
+        billing_model=dict(type='str', required=False),
+        wait=dict(type='bool', required=False, default=True),
+        wait_timeout=dict(type='int', required=False, default=KAFKA_WAIT_TIMEOUT_SECONDS),
+        concurrency=dict(type='int', required=False, default=10),
+        openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
+    )
+
+    result = dict(
+        changed=False,
+        message='',
+        kafkas=[],
+        polls=0,
+        timings=dict(),
+        env_url_error='',
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+    start_profile(module, 'kafkas')
+
+    if module.params['concurrency'] < 1:
+        module.fail_json(msg='concurrency must be at least 1', **result)
+    specs = []
+    for spec in module.params['kafkas']:
+        spec = dict(spec)
+        for field in KAFKA_REQUIRED_FIELDS:
+            if spec[field] is None:
+                spec[field] = module.params[field]
+        missing = [field for field in KAFKA_REQUIRED_FIELDS if spec[field] is None]
+        if missing:
+            module.fail_json(msg=f'Kafka instance `{spec["name"]}` is missing {", ".join(missing)}', **result)
+        specs.append(spec)
+    names = [spec['name'] for spec in specs]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        module.fail_json(msg=f'Kafka instances must only be listed once, found duplicates: {", ".join(duplicates)}', **result)
+
+    started = time.monotonic()
+
+    token = {}
+    if os.environ.get('API_BASE_HOST') is None:
+        os.environ['API_BASE_HOST'] = API_BASE_HOST
+    if "http://localhost" in os.environ.get("API_BASE_HOST"):
+        token['access_token'] = "DUMMY_TOKEN_FOR_MOCK"
+    elif module.params['openshift_offline_token'] is not None:
+        token['access_token'] = get_offline_token(module.params['openshift_offline_token'])
+    else:
+        token['access_token'] = get_offline_token(None)
+
+    api_base_host = os.getenv("API_BASE_HOST")
+    if api_base_host is None:
+        result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
+        api_base_host = API_BASE_HOST
+
+    import rhoas_kafka_mgmt_sdk
+    from rhoas_kafka_mgmt_sdk.api import default_api
+    from rhoas_kafka_mgmt_sdk.model.kafka_request_payload import KafkaRequestPayload
+
+    configuration = rhoas_kafka_mgmt_sdk.Configuration(
+        host = api_base_host,
+    )
+    configuration.access_token = token["access_token"]
+    # Keep one pooled connection per worker so concurrent requests do not open and drop connections
+    configuration.connection_pool_maxsize = module.params['concurrency']
+
+    with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client, ThreadPoolExecutor(max_workers=module.params['concurrency']) as executor:
+        api_instance = default_api.DefaultApi(api_client)
+
+        try:
+            existing_kafkas = search_kafkas_by_name(api_instance, names, executor)
+        except rhoas_kafka_mgmt_sdk.ApiException as e:
+            rb = json.loads(e.body)
+            module.fail_json(msg=f'Failed to get kafka instances with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
+        except Exception as e:
+            module.fail_json(msg=f'Failed to get kafka instances with error: `{e}`.', **result)
+
+        def create(spec):
+            kafka_result = dict(name=spec['name'])
+            kafka = existing_kafkas.get(spec['name'])
+            if kafka is not None:
+                mismatches = kafka_spec_mismatches(kafka, spec['cloud_provider'], spec['region'], spec['plan'])
+                if mismatches:
+                    kafka_result['status'] = 'failed'
+                    kafka_result['msg'] = kafka_spec_mismatch_msg(kafka, mismatches)
+                    return kafka_result
+                kafka_result['status'] = 'unchanged'
+                kafka_result['kafka'] = kafka
+                return kafka_result
+            kafka_result['status'] = 'created'
+            if module.check_mode:
+                return kafka_result
+
+            kafka_request_payload = KafkaRequestPayload(
+                cloud_provider=spec['cloud_provider'],
+                name=spec['name'],
+                region=spec['region'],
+                reauthentication_enabled=spec['reauthentication_enabled'],
+                plan=spec['plan'],
+                billing_cloud_account_id=spec['billing_cloud_account_id'],
+                marketplace=spec['marketplace'],
+                billing_model=spec['billing_model'],
+            )
+            try:
+                response = api_instance.create_kafka(True, kafka_request_payload, _preload_content=False)
+                kafka_result['kafka'] = json.loads(response.data)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                kafka_result['status'] = 'failed'
+                try:
+                    rb = json.loads(e.body)
+                    kafka_result['msg'] = f'Failed to create new kafka instance with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.'
+                except (TypeError, ValueError, KeyError):
+                    kafka_result['msg'] = f'Failed to create new kafka instance with error: `{e}`.'
+            except Exception as e:
+                kafka_result['status'] = 'failed'
+                kafka_result['msg'] = f'Failed to create new kafka instance with error: `{e}`.'
+            return kafka_result
+
+        create_started = time.monotonic()
+        result['kafkas'] = list(executor.map(create, specs))
+        create_elapsed = time.monotonic() - create_started
+
+        wait_started = time.monotonic()
+        waiting = [kafka_result['name'] for kafka_result in result['kafkas'] if 'kafka' in kafka_result]
+        if module.params['wait'] and waiting:
+            try:
+                ready_kafkas, failures, result['polls'] = wait_for_kafkas_ready(api_instance, waiting, timeout=module.params['wait_timeout'], executor=executor)
+            except rhoas_kafka_mgmt_sdk.ApiException as e:
+                rb = json.loads(e.body)
+                module.fail_json(msg=f'Failed to get kafka instances with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.', **result)
+            except Exception as e:
+                module.fail_json(msg=f'Failed to get kafka instances with error: `{e}`.', **result)
+            for kafka_result in result['kafkas']:
+                if kafka_result['name'] in ready_kafkas:
+                    kafka_result['kafka'] = ready_kafkas[kafka_result['name']]
+                if kafka_result['name'] in failures:
+                    kafka_result['status'] = 'failed'
+                    kafka_result['msg'] = failures[kafka_result['name']]
+        wait_elapsed = time.monotonic() - wait_started
+
+    for kafka_result in result['kafkas']:
+        kafka = kafka_result.get('kafka')
+        if kafka is not None:
+            kafka_result['kafka_id'] = kafka.get('id')
+            kafka_result['kafka_state'] = kafka.get('status')
+            kafka_result['kafka_admin_url'] = kafka.get('admin_api_server_url', '')
+
+    result['timings'] = dict(
+        total=round(time.monotonic() - started, 3),
+        create=round(create_elapsed, 3),
+        wait=round(wait_elapsed, 3),
+    )
+
+    statuses = ('created', 'unchanged', 'failed')
+    counts = {status: sum(1 for kafka_result in result['kafkas'] if kafka_result['status'] == status) for status in statuses}
+    # An instance that was accepted but did not become ready has still been created
+    result['changed'] = any('kafka' in kafka_result and kafka_result['name'] not in existing_kafkas for kafka_result in result['kafkas']) or (module.check_mode and counts['created'] > 0)
+    result['message'] = f'{counts["created"]} kafka instances created, {counts["unchanged"]} unchanged, {counts["failed"]} failed'
+    if counts['failed']:
+        module.fail_json(msg=f'Failed to create {counts["failed"]} of {len(result["kafkas"])} kafka instances', **result)
+    module.exit_json(**result)
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+import json
+import os
+import time
+
+from ..module_utils.constants.constants import API_BASE_HOST, KAFKA_WAIT_TIMEOUT_SECONDS
+from ..module_utils.clients import pooled_api_client
+from ..module_utils.common import get_offline_token, load_env
+from ..module_utils.profiling import start_profile
+from ..module_utils.kafkas import KafkaWaitError, wait_for_kafka_ready
+
+DOCUMENTATION = r'''
+---
+module: wait_for_kafka
+
+short_description: Wait for a Red Hat OpenShift Streams for Apache Kafka Instance to be ready.
+
+version_added: "0.1.1"
+
+description:
+    - Wait for a Red Hat OpenShift Streams for Apache Kafka Instance to be ready.
+    - Together with C(wait=false) on M(rhoas.rhoas.create_kafka) this lets a play start provisioning early, do other work and only block once the instance is needed.
+    - The status is polled with an exponential backoff, starting at 5 seconds and growing to at most 60 seconds between polls.
+    - The module fails as soon as the instance reaches the C(failed), C(deprovision) or C(deleting) state.
+
+options:
+    kafka_id:
+        description: ID of the Kafka instance to wait for.
+        required: true
+        type: str
+    wait_timeout:
+        description: Number of seconds to wait for the Kafka instance to be ready. The module fails if the instance is not ready by then.
+        required: false
+        type: int
+        default: 1800
+    openshift_offline_token:
+        description: openshift_offline_token is the OpenShift Offline Token that is used for authentication to enable communication with the Kafka Management API. If not provided, the OFFLINE_TOKEN environment variable will be used.
+        required: false
+        type: str
+
+extends_documentation_fragment:
+    - rhoas.rhoas.rhoas_doc_fragment
+    - rhoas.rhoas.rhoas_doc_fragment.profile
+
+author:
+    - Red Hat Developer
+'''
+
+EXAMPLES = r'''
+  - name: Create kafka without waiting
+    rhoas.rhoas.create_kafka:
+      name: "kafka_name"
+      billing_model: "standard"
+      cloud_provider: "aws"
+      region: "us-east-1"
+      plan: "developer.x1"
+      wait: false
+    register:
+      kafka_req_resp
+
+  - name: Create service account
+    rhoas.rhoas.create_service_account:
+      name: "service_account_name"
+      description: "Service account used by the Kafka clients"
+    register:
+      srvce_acc_resp_obj
+
+  - name: Wait for kafka to be ready
+    rhoas.rhoas.wait_for_kafka:
+      kafka_id: "{{ kafka_req_resp.kafka_id }}"
+      wait_timeout: 1800
+    register:
+      kafka_ready_resp
+'''
+
+RETURN = r'''
+kafka_id:
+    description: The id of the Kafka instance.
+    type: str
+    returned: always
+kafka_admin_url:
+    description: The admin url for the Kafka instance.
+    type: str
+    returned: If the module is successful.
+kafka_state:
+    description: The last known state of the Kafka instance.
+    type: str
+    returned: always
+kafka_admin_resp_obj:
+    description: The details of the Kafka instance once it is ready.
+    type: dict
+    returned: If the module is successful.
+elapsed:
+    description: Number of seconds spent waiting for the Kafka instance.
+    type: float
+    returned: always
+message:
+    description: The output error / exception message that is returned in the case the module generates an error / exception.
+    type: dict
+    returned: in case of error / exception
+env_url_error:
+    description: The error message returned if no environment variable is passed for the BASE_HOST URL.
+    type: str
+    returned: If the module uses default url instead of passed environment variable.
+timings:
+    description: Time spent by the task and the HTTP calls it made, described by the I(profile) option.
+    type: dict
+    returned: When C(profile) is enabled.
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+
+def run_module():
+    load_env()
+
+    module_args = dict(
+        kafka_id=dict(type='str', required=True),
+        wait_timeout=dict(type='int', required=False, default=KAFKA_WAIT_TIMEOUT_SECONDS),
+        openshift_offline_token=dict(type='str', required=False),
+        profile=dict(type='bool', required=False, default=False),
+    )
+
+    result = dict(
+        changed=False,
+        message='',
+        kafka_id=None,
+        kafka_admin_url='',
+        kafka_state='',
+        elapsed=0,
+        env_url_error='',
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+    start_profile(module, 'wait_for_kafka')
+
+    result['kafka_id'] = module.params['kafka_id']
+
+    token = {}
+    if os.environ.get('API_BASE_HOST') is None:
+        os.environ['API_BASE_HOST'] = API_BASE_HOST
+    if "http://localhost" in os.environ.get("API_BASE_HOST"):
+        token['access_token'] = "DUMMY_TOKEN_FOR_MOCK"
+    elif module.params['openshift_offline_token'] is not None:
+        token['access_token'] = get_offline_token(module.params['openshift_offline_token'])
+    else:
+        token['access_token'] = get_offline_token(None)
+
+    api_base_host = os.getenv("API_BASE_HOST")
+    if api_base_host is None:
+        result['env_url_error'] = 'cannot find API_BASE_HOST in .env file, using default url values instead'
+        api_base_host = API_BASE_HOST
+
+    import rhoas_kafka_mgmt_sdk
+    from rhoas_kafka_mgmt_sdk.api import default_api
+
+    configuration = rhoas_kafka_mgmt_sdk.Configuration(
+        host = api_base_host,
+    )
+
+    configuration.access_token = token["access_token"]
+
+    with pooled_api_client(rhoas_kafka_mgmt_sdk, configuration) as api_client:
+        api_instance = default_api.DefaultApi(api_client)
+        started = time.monotonic()
+        try:
+            kafka = wait_for_kafka_ready(api_instance, module.params['kafka_id'], timeout=module.params['wait_timeout'])
+            result['kafka_admin_url'] = kafka['admin_api_server_url']
+            result['kafka_state'] = kafka['status']
+            result['kafka_admin_resp_obj'] = kafka
+            result['elapsed'] = round(time.monotonic() - started, 3)
+            result['message'] = f'Kafka instance with ID: {module.params["kafka_id"]} is ready'
+            module.exit_json(**result)
+        except KafkaWaitError as e:
+            if e.kafka is not None:
+                result['kafka_state'] = e.kafka.get('status')
+            result['elapsed'] = round(time.monotonic() - started, 3)
+            module.fail_json(msg=f'Failed to establish that the Kafka instance is in a `ready` state: {e}', **result)
+        except rhoas_kafka_mgmt_sdk.ApiException as e:
+            rb = json.loads(e.body)
+            module.fail_json(msg=f'Failed to get kafka instance with error code: `{rb["code"]}`. The reason of failure: `{rb["reason"]}`.')
+        except Exception as e:
+            module.fail_json(msg=f'Failed to get kafka instance with error: `{e}`.')
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
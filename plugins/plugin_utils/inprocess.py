@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import traceback
+
+from ansible.module_utils import basic
+from ansible.module_utils.common.text.converters import to_bytes, to_text
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    patch_module_args = None
+
+# Package the collection modules are imported from when run in-process
+MODULES_PACKAGE = 'ansible_collections.rhoas.rhoas.plugins.modules'
+
+
+def run_module_in_process(module_name, module_args, environment=None):
+    # Runs a collection module in the current interpreter instead of shipping it with AnsiballZ. Returns the
+    # JSON printed by `exit_json`/`fail_json` and the exit code, like a module run in its own process would.
+    module = importlib.import_module(f'{MODULES_PACKAGE}.{module_name}')
+    stdout = io.StringIO()
+    rc = 0
+    with _module_args(module_args), _environment(environment), contextlib.redirect_stdout(stdout):
+        try:
+            module.main()
+        except SystemExit as e:
+            rc = e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            # An uncaught exception is reported the way Ansible reports a module that crashed
+            return json.dumps(dict(failed=True, msg=f'MODULE FAILURE: {to_text(e)}', exception=traceback.format_exc())), 1
+    return stdout.getvalue(), rc
+
+
+@contextlib.contextmanager
+def _module_args(module_args):
+    if patch_module_args is not None:
+        with patch_module_args(module_args):
+            yield
+        return
+    # Before ansible-core 2.19 the arguments are read from `_ANSIBLE_ARGS` and cached there once parsed
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps(dict(ANSIBLE_MODULE_ARGS=module_args)))
+    try:
+        yield
+    finally:
+        basic._ANSIBLE_ARGS = None
+
+
+@contextlib.contextmanager
+def _environment(environment):
+    # The task `environment` is applied for the duration of the module, as it would be for a module process
+    saved = dict(os.environ)
+    os.environ.update((str(key), str(value)) for key, value in (environment or {}).items())
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
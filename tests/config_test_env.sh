@@ -7,7 +7,7 @@ source venv/bin/activate
 # install pip modules on virtual environment
 pip install --upgrade pip
 pip install -r ../requirements.txt
-pip install pytest
+pip install pytest pytest-xdist
 
 # config python3.9 to run in mk-ci-tools container
 mkdir -p /usr/local/opt/python@3.9/bin
@@ -0,0 +1,671 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Apache License, v2.0 (https://www.apache.org/licenses/LICENSE-2.0)
+# Local stand-in for the Red Hat OpenShift Application Services APIs used by the rhoas collection.
+#
+# A single server implements:
+#
+# - the Kafka fleet manager API (`/api/kafkas_mgmt/v1/kafkas`),
+# - the Kafka instance admin API of every instance (`/kafkas/<id>/api/v1/topics` and `/acls`),
+#   which is what the `admin_api_server_url` of a mock instance points at,
+# - the service accounts API (`/apis/service_accounts/v1`),
+# - the SSO token endpoint (`/auth/realms/redhat-external/protocol/openid-connect/token`).
+#
+# Kafka instances move through `accepted -> preparing -> provisioning -> ready` on a timer and through
+# `deprovision -> deleting` when deleted. Latency, 429 and 5xx responses can be injected and large synthetic
+# datasets can be seeded to benchmark the modules offline.
+#
+# Point the modules at it with `API_BASE_HOST=http://localhost:8000` and `SSO_BASE_HOST=http://localhost:8000`.
+# The `/__mock__` endpoints expose request statistics and allow the behaviour to be changed at runtime.
+import argparse
+import base64
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+KAFKAS_PATH = '/api/kafkas_mgmt/v1/kafkas'
+SERVICE_ACCOUNTS_PATH = '/apis/service_accounts/v1'
+TOKEN_PATH = '/auth/realms/redhat-external/protocol/openid-connect/token'
+ADMIN_PATH = re.compile(r'^/kafkas/(?P<kafka_id>[^/]+)(?P<path>/api/v1/.*)$')
+
+# Provisioning timeline of a new Kafka instance, as fractions of the provisioning time
+KAFKA_STATUS_TIMELINE = (
+    (0.1, 'accepted'),
+    (0.3, 'preparing'),
+    (1.0, 'provisioning'),
+)
+
+# Responses at least this large are gzip compressed when the client accepts it, like the real APIs do
+GZIP_MIN_SIZE = 1024
+
+DEFAULT_PARTITION_COUNT = 1
+DEFAULT_TOPIC_CONFIG = {
+    'cleanup.policy': 'delete',
+    'retention.ms': '604800000',
+    'retention.bytes': '-1',
+}
+
+
+class MockError(Exception):
+
+    def __init__(self, status, reason, code=None, headers=None):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.code = code
+        self.headers = headers or {}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _timestamp(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class MockState(object):
+    # All of the mock's data, guarded by a single lock
+
+    def __init__(self, base_url, provisioning_seconds=3.0, deprovisioning_seconds=1.0):
+        self.base_url = base_url.rstrip('/')
+        self.provisioning_seconds = provisioning_seconds
+        self.deprovisioning_seconds = deprovisioning_seconds
+        self.lock = threading.RLock()
+        self.faults = dict(latency_ms=0, latency_jitter_ms=0, rate_429=0.0, rate_5xx=0.0, retry_after=1)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.kafkas = {}
+            self.topics = {}
+            self.acls = {}
+            self.service_accounts = {}
+            self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = dict(requests=0, bytes_in=0, bytes_out=0, status={}, endpoints={})
+            # Every API request since the last reset, for tests asserting what a task sent
+            self.requests = []
+
+    def record(self, method, endpoint, status, bytes_in, bytes_out, path=None, query=None, payload=None):
+        with self.lock:
+            self.requests.append(dict(method=method, endpoint=endpoint, path=path, query=query, payload=payload, status=status))
+            self.stats['requests'] += 1
+            self.stats['bytes_in'] += bytes_in
+            self.stats['bytes_out'] += bytes_out
+            self.stats['status'][str(status)] = self.stats['status'].get(str(status), 0) + 1
+            key = f'{method} {endpoint}'
+            self.stats['endpoints'][key] = self.stats['endpoints'].get(key, 0) + 1
+
+    # Kafka instances
+
+    def create_kafka(self, payload, status=None):
+        with self.lock:
+            for name in ('name', 'cloud_provider', 'region'):
+                if not payload.get(name):
+                    raise MockError(400, f'{name} is required', 'KAFKAS-MGMT-21')
+            if any(k['name'] == payload['name'] for k in self.kafkas.values() if k['status'] not in ('deprovision', 'deleting')):
+                raise MockError(409, f'Kafka cluster name is already used', 'KAFKAS-MGMT-36')
+            kafka_id = uuid.uuid4().hex[:20]
+            created = _now()
+            plan = payload.get('plan') or 'developer.x1'
+            instance_type, _, size_id = plan.partition('.')
+            kafka = dict(
+                id=kafka_id,
+                kind='Kafka',
+                href=f'{KAFKAS_PATH}/{kafka_id}',
+                status=status or 'accepted',
+                cloud_provider=payload['cloud_provider'],
+                region=payload['region'],
+                owner='mock-user',
+                name=payload['name'],
+                multi_az=False,
+                reauthentication_enabled=payload.get('reauthentication_enabled', True),
+                created_at=_timestamp(created),
+                updated_at=_timestamp(created),
+                expires_at=_timestamp(created + timedelta(hours=48)),
+                version='3.0.1',
+                instance_type=instance_type,
+                instance_type_name='Trial' if instance_type == 'developer' else 'Standard',
+                size_id=size_id or 'x1',
+                billing_model=payload.get('billing_model') or 'standard',
+                billing_cloud_account_id=payload.get('billing_cloud_account_id'),
+                marketplace=payload.get('marketplace'),
+                kafka_storage_size='10Gi',
+                max_data_retention_size={'bytes': 10737418240},
+                max_data_retention_period='P14D',
+                ingress_throughput_per_sec='1Mi',
+                egress_throughput_per_sec='1Mi',
+                total_max_connections=100,
+                max_partitions=100,
+                max_connection_attempts_per_sec=50,
+                browser_url=f'{self.base_url}/kafkas/{kafka_id}/dashboard',
+            )
+            kafka = {k: v for k, v in kafka.items() if v is not None}
+            self.kafkas[kafka_id] = dict(kafka, _created=time.monotonic(), _deleted=None)
+            self.topics[kafka_id] = {}
+            self.acls[kafka_id] = []
+            return self._kafka_view(self.kafkas[kafka_id])
+
+    def _kafka_view(self, record):
+        if record['_deleted'] is None and record['status'] != 'ready':
+            elapsed = time.monotonic() - record['_created']
+            record['status'] = 'ready'
+            for fraction, status in KAFKA_STATUS_TIMELINE:
+                if elapsed < fraction * self.provisioning_seconds:
+                    record['status'] = status
+                    break
+            record['updated_at'] = _timestamp(_now())
+        kafka = {k: v for k, v in record.items() if not k.startswith('_')}
+        if kafka['status'] in ('ready', 'deprovision', 'deleting'):
+            kafka['bootstrap_server_host'] = f'{kafka["name"]}-{kafka["id"]}.kafka.mock:443'
+            kafka['admin_api_server_url'] = f'{self.base_url}/kafkas/{kafka["id"]}'
+        return kafka
+
+    def _expire_deleted(self):
+        now = time.monotonic()
+        for kafka_id, record in list(self.kafkas.items()):
+            if record['_deleted'] is None:
+                continue
+            if now - record['_deleted'] >= self.deprovisioning_seconds:
+                del self.kafkas[kafka_id]
+                self.topics.pop(kafka_id, None)
+                self.acls.pop(kafka_id, None)
+            elif now - record['_deleted'] >= self.deprovisioning_seconds / 2:
+                record['status'] = 'deleting'
+
+    def get_kafka(self, kafka_id):
+        with self.lock:
+            self._expire_deleted()
+            if kafka_id not in self.kafkas:
+                raise MockError(404, f'Kafka cluster with id=\'{kafka_id}\' not found', 'KAFKAS-MGMT-7')
+            return self._kafka_view(self.kafkas[kafka_id])
+
+    def list_kafkas(self, page, size, search, order_by):
+        with self.lock:
+            self._expire_deleted()
+            kafkas = [self._kafka_view(record) for record in self.kafkas.values()]
+        kafkas = [kafka for kafka in kafkas if _matches_search(kafka, search)]
+        for clause in reversed([c.strip() for c in (order_by or 'name asc').split(',') if c.strip()]):
+            field, _, direction = clause.partition(' ')
+            kafkas.sort(key=lambda k: str(k.get(field, '')), reverse=direction.strip().lower() == 'desc')
+        return _page(kafkas, page, size, 'KafkaRequestList')
+
+    def delete_kafka(self, kafka_id):
+        with self.lock:
+            self._expire_deleted()
+            if kafka_id not in self.kafkas:
+                raise MockError(404, f'Kafka cluster with id=\'{kafka_id}\' not found', 'KAFKAS-MGMT-7')
+            record = self.kafkas[kafka_id]
+            if record['_deleted'] is None:
+                record['_deleted'] = time.monotonic()
+                record['status'] = 'deprovision'
+            return self._kafka_view(record)
+
+    def _admin_instance(self, kafka_id):
+        with self.lock:
+            self._expire_deleted()
+            record = self.kafkas.get(kafka_id)
+            if record is None or self._kafka_view(record)['status'] != 'ready':
+                raise MockError(503, f'Kafka instance {kafka_id} is not available')
+
+    # Topics
+
+    def _topic_view(self, topic):
+        return dict(
+            id=topic['name'],
+            kind='Topic',
+            href=f'/api/v1/topics/{topic["name"]}',
+            name=topic['name'],
+            isInternal=topic.get('internal', False),
+            partitions=[
+                dict(partition=i, id=i, leader={'id': i % 3}, replicas=[{'id': (i + r) % 3} for r in range(3)], isr=[{'id': (i + r) % 3} for r in range(3)])
+                for i in range(topic['partitions'])
+            ],
+            config=[dict(key=key, value=value) for key, value in sorted(topic['config'].items())],
+        )
+
+    def create_topic(self, kafka_id, payload):
+        self._admin_instance(kafka_id)
+        name = payload.get('name')
+        if not name:
+            raise MockError(400, 'Topic name is required', 17)
+        settings = payload.get('settings') or {}
+        with self.lock:
+            topics = self.topics[kafka_id]
+            if name in topics:
+                raise MockError(409, f'Topic \'{name}\' already exists.', 2)
+            config = dict(DEFAULT_TOPIC_CONFIG)
+            config.update({entry['key']: entry['value'] for entry in settings.get('config') or []})
+            topics[name] = dict(name=name, partitions=settings.get('numPartitions') or DEFAULT_PARTITION_COUNT, config=config)
+            return self._topic_view(topics[name])
+
+    def seed_topic(self, kafka_id, name, partitions=DEFAULT_PARTITION_COUNT, config=None, internal=False):
+        # Adds a topic the way the broker would, internal topics cannot be created through the API
+        with self.lock:
+            self.topics[kafka_id][name] = dict(name=name, partitions=partitions, config=dict(DEFAULT_TOPIC_CONFIG, **(config or {})), internal=internal)
+
+    def get_topic(self, kafka_id, name):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            topic = self.topics[kafka_id].get(name)
+            if topic is None:
+                raise MockError(404, f'Topic \'{name}\' does not exist.', 4)
+            return self._topic_view(topic)
+
+    def list_topics(self, kafka_id, page, size, name_filter, order):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            topics = sorted(self.topics[kafka_id].values(), key=lambda t: t['name'], reverse=(order or 'asc') == 'desc')
+            if name_filter:
+                topics = [topic for topic in topics if name_filter in topic['name']]
+            return _page(topics, page, size, 'TopicList', self._topic_view)
+
+    def update_topic(self, kafka_id, name, payload):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            topic = self.topics[kafka_id].get(name)
+            if topic is None:
+                raise MockError(404, f'Topic \'{name}\' does not exist.', 4)
+            partitions = payload.get('numPartitions')
+            if partitions is not None:
+                if partitions < topic['partitions']:
+                    raise MockError(400, f'Topic currently has {topic["partitions"]} partitions, which is higher than the requested {partitions}.', 17)
+                topic['partitions'] = partitions
+            topic['config'].update({entry['key']: entry['value'] for entry in payload.get('config') or []})
+            return self._topic_view(topic)
+
+    def delete_topic(self, kafka_id, name):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            if self.topics[kafka_id].pop(name, None) is None:
+                raise MockError(404, f'Topic \'{name}\' does not exist.', 4)
+
+    # ACLs
+
+    def create_acl(self, kafka_id, payload):
+        self._admin_instance(kafka_id)
+        fields = ('resourceType', 'resourceName', 'patternType', 'principal', 'operation', 'permission')
+        for field in fields:
+            if not payload.get(field):
+                raise MockError(400, f'{field} is required', 17)
+        binding = {field: payload[field] for field in fields}
+        with self.lock:
+            # Kafka itself ignores duplicates, the admin API mirrors that
+            if binding not in self.acls[kafka_id]:
+                self.acls[kafka_id].append(binding)
+
+    def list_acls(self, kafka_id, query):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            filters = _acl_filters(query)
+            bindings = [b for b in self.acls[kafka_id] if _acl_matches(b, filters, delete=False)] if filters else self.acls[kafka_id]
+            return _page(bindings, query.get('page'), query.get('size'), 'AclBindingList', lambda b: dict(b, kind='AclBinding'))
+
+    def delete_acls(self, kafka_id, query):
+        self._admin_instance(kafka_id)
+        with self.lock:
+            filters = _acl_filters(query)
+            deleted = [b for b in self.acls[kafka_id] if _acl_matches(b, filters, delete=True)]
+            self.acls[kafka_id] = [b for b in self.acls[kafka_id] if not _acl_matches(b, filters, delete=True)]
+        return dict(kind='AclBindingList', items=[dict(b, kind='AclBinding') for b in deleted], total=len(deleted), page=1, size=len(deleted))
+
+    # Service accounts
+
+    def create_service_account(self, payload):
+        if not payload.get('name'):
+            raise MockError(400, 'name is required')
+        account_id = str(uuid.uuid4())
+        account = dict(
+            id=account_id,
+            clientId=f'srvc-acct-{account_id}',
+            secret=uuid.uuid4().hex,
+            name=payload['name'],
+            description=payload.get('description', ''),
+            createdBy='mock-user',
+            createdAt=int(time.time()),
+        )
+        with self.lock:
+            self.service_accounts[account_id] = account
+        return account
+
+    def get_service_account(self, account_id):
+        with self.lock:
+            account = self._find_service_account(account_id)
+            return {k: v for k, v in account.items() if k != 'secret'}
+
+    def list_service_accounts(self, first, max_results):
+        with self.lock:
+            accounts = [{k: v for k, v in a.items() if k != 'secret'} for a in self.service_accounts.values()]
+        first = int(first or 0)
+        return accounts[first:first + int(max_results or 100)]
+
+    def delete_service_account(self, account_id):
+        with self.lock:
+            account = self._find_service_account(account_id)
+            del self.service_accounts[account['id']]
+
+    def _find_service_account(self, account_id):
+        # Service accounts can be addressed by their id or client id
+        for account in self.service_accounts.values():
+            if account_id in (account['id'], account['clientId']):
+                return account
+        raise MockError(404, f'Service account {account_id} not found')
+
+    # Synthetic datasets
+
+    def seed(self, name='mock-seeded', topics=0, acls=0, principals=100):
+        kafka = self.create_kafka(dict(name=name, cloud_provider='aws', region='us-east-1', plan='standard.x1'), status='ready')
+        with self.lock:
+            record = self.kafkas[kafka['id']]
+            record['_created'] -= self.provisioning_seconds
+            for i in range(topics):
+                topic_name = f'topic-{i:06d}'
+                self.topics[kafka['id']][topic_name] = dict(name=topic_name, partitions=1 + i % 6, config=dict(DEFAULT_TOPIC_CONFIG))
+            operations = ('READ', 'WRITE', 'DESCRIBE', 'ALL', 'CREATE')
+            for i in range(acls):
+                self.acls[kafka['id']].append(dict(
+                    resourceType='TOPIC',
+                    resourceName=f'topic-{i // len(operations):06d}',
+                    patternType='LITERAL' if i % 2 else 'PREFIXED',
+                    principal=f'User:srvc-acct-{i % max(principals, 1):05d}',
+                    operation=operations[i % len(operations)],
+                    permission='ALLOW',
+                ))
+            return self._kafka_view(record)
+
+
+def _page(items, page, size, kind, view=None):
+    # Only the items of the requested page are rendered, so paging through large seeded datasets stays fast
+    page = int(page or 1)
+    size = int(size or 100)
+    start = (page - 1) * size
+    selected = items[start:start + size]
+    if view is not None:
+        selected = [view(item) for item in selected]
+    return dict(kind=kind, page=page, size=len(selected), total=len(items), items=selected)
+
+
+_SEARCH_TERM = re.compile(r'^\s*(?P<field>\w+)\s*(?P<op><>|=|(?:not\s+)?in|i?like)\s*(?P<value>.+?)\s*$', re.IGNORECASE)
+
+
+def _matches_search(kafka, search):
+    # Supports the subset of the fleet manager search syntax used by the collection:
+    # `field = value`, `<>`, `like`, `ilike`, `in (...)` joined with `and` / `or` (and binds tighter)
+    if not search or not search.strip():
+        return True
+    for alternative in re.split(r'\s+or\s+', search.strip(), flags=re.IGNORECASE):
+        if all(_matches_term(kafka, term) for term in re.split(r'\s+and\s+', alternative, flags=re.IGNORECASE)):
+            return True
+    return False
+
+
+def _matches_term(kafka, term):
+    match = _SEARCH_TERM.match(term)
+    if match is None:
+        raise MockError(400, f'Failed to parse search query: {term}', 'KAFKAS-MGMT-23')
+    field, op, value = match.group('field'), match.group('op').lower(), match.group('value').strip().strip('\'"')
+    actual = str(kafka.get(field, ''))
+    if op == '=':
+        return actual == value
+    if op == '<>':
+        return actual != value
+    if op.endswith('in'):
+        values = [v.strip().strip('\'"') for v in value.strip('()').split(',')]
+        return (actual in values) != op.startswith('not')
+    pattern = '^' + re.escape(value).replace('%', '.*') + '$'
+    return re.match(pattern, actual, re.IGNORECASE if op == 'ilike' else 0) is not None
+
+
+ACL_FILTER_FIELDS = ('resourceType', 'resourceName', 'patternType', 'principal', 'operation', 'permission')
+
+
+def _acl_filters(query):
+    # The (field, value) pairs of an ACL query that restrict the bindings, ANY and MATCH match every binding
+    return [
+        (field, query[field]) for field in ACL_FILTER_FIELDS
+        if query.get(field) not in (None, '', 'ANY') and not (field == 'patternType' and query[field] == 'MATCH')
+    ]
+
+
+def _acl_matches(binding, filters, delete):
+    for field, wanted in filters:
+        if field == 'principal' and not delete and wanted != 'User:*' and binding[field] == 'User:*':
+            continue
+        if binding[field] != wanted:
+            return False
+    return True
+
+
+def _fake_jwt(lifetime):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+    claims = dict(exp=int(time.time()) + lifetime, iat=int(time.time()), sub='mock-user', jti=uuid.uuid4().hex)
+    return f'{encode(dict(alg="none", typ="JWT"))}.{encode(claims)}.mock'
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'rhoas-mock/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def _handle(self, method):
+        state = self.server.state
+        url = urlsplit(self.path)
+        path = unquote(url.path).rstrip('/') or '/'
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw_body = self.rfile.read(length) if length else b''
+        endpoint = path
+        payload = None
+        status, body, headers = 500, None, {}
+        try:
+            endpoint, handler = self._route(method, path)
+            if not endpoint.startswith('/__mock__'):
+                self._inject_faults(state)
+            if raw_body:
+                if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+                    payload = {k: v[-1] for k, v in parse_qs(raw_body.decode('utf-8')).items()}
+                else:
+                    payload = json.loads(raw_body)
+            status, body = handler(state, path, query, payload)
+        except MockError as e:
+            status, headers = e.status, e.headers
+            body = self._error_body(path, e)
+        except ValueError as e:
+            status = 400
+            body = self._error_body(path, MockError(400, f'Invalid request: {e}'))
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        if len(data) >= GZIP_MIN_SIZE and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            data = gzip.compress(data)
+            headers = dict(headers, **{'Content-Encoding': 'gzip'})
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+        if not endpoint.startswith('/__mock__'):
+            state.record(method, endpoint, status, len(raw_body), len(data), path, query, payload)
+
+    def _inject_faults(self, state):
+        faults = state.faults
+        delay = faults['latency_ms'] + random.uniform(0, faults['latency_jitter_ms'])
+        if delay:
+            time.sleep(delay / 1000.0)
+        roll = random.random()
+        if roll < faults['rate_429']:
+            raise MockError(429, 'Too Many Requests', 'KAFKAS-MGMT-429', headers={'Retry-After': str(faults['retry_after'])})
+        if roll < faults['rate_429'] + faults['rate_5xx']:
+            raise MockError(random.choice((500, 502, 503)), 'Injected server error', 'KAFKAS-MGMT-9')
+
+    def _error_body(self, path, error):
+        if path.startswith(SERVICE_ACCOUNTS_PATH) or path.startswith(TOKEN_PATH):
+            return dict(error='mock_error', error_description=error.reason)
+        if path.startswith(KAFKAS_PATH):
+            return dict(id=str(error.status), kind='Error', href=f'/api/kafkas_mgmt/v1/errors/{error.status}', code=error.code or f'KAFKAS-MGMT-{error.status}', reason=error.reason, operation_id=uuid.uuid4().hex)
+        return dict(id=str(error.status), kind='Error', href=f'/api/v1/errors/{error.status}', code=error.code or error.status, reason=error.reason, error_message=error.reason, detail=error.reason)
+
+    def _route(self, method, path):
+        if path == TOKEN_PATH and method == 'POST':
+            return path, lambda state, path, query, payload: (200, dict(
+                access_token=_fake_jwt(900), expires_in=900, refresh_expires_in=0, token_type='Bearer', scope='openid'))
+        if path == KAFKAS_PATH:
+            if method == 'POST':
+                return KAFKAS_PATH, lambda state, path, query, payload: (202, state.create_kafka(payload or {}))
+            if method == 'GET':
+                return KAFKAS_PATH, lambda state, path, query, payload: (200, state.list_kafkas(query.get('page'), query.get('size'), query.get('search'), query.get('orderBy')))
+        if path.startswith(KAFKAS_PATH + '/'):
+            kafka_id = path[len(KAFKAS_PATH) + 1:]
+            template = KAFKAS_PATH + '/{id}'
+            if method == 'GET':
+                return template, lambda state, path, query, payload: (200, state.get_kafka(kafka_id))
+            if method == 'DELETE':
+                return template, lambda state, path, query, payload: (202, state.delete_kafka(kafka_id))
+        admin = ADMIN_PATH.match(path)
+        if admin:
+            return self._route_admin(method, admin.group('kafka_id'), admin.group('path'))
+        if path == SERVICE_ACCOUNTS_PATH:
+            if method == 'POST':
+                return path, lambda state, path, query, payload: (201, state.create_service_account(payload or {}))
+            if method == 'GET':
+                return path, lambda state, path, query, payload: (200, state.list_service_accounts(query.get('first'), query.get('max')))
+        if path.startswith(SERVICE_ACCOUNTS_PATH + '/'):
+            account_id = path[len(SERVICE_ACCOUNTS_PATH) + 1:]
+            template = SERVICE_ACCOUNTS_PATH + '/{id}'
+            if method == 'GET':
+                return template, lambda state, path, query, payload: (200, state.get_service_account(account_id))
+            if method == 'DELETE':
+                return template, lambda state, path, query, payload: (204, state.delete_service_account(account_id))
+        if path.startswith('/__mock__/'):
+            return self._route_control(method, path)
+        raise MockError(404, f'No mock for {method} {path}')
+
+    def _route_admin(self, method, kafka_id, path):
+        if path == '/api/v1/topics':
+            if method == 'GET':
+                return '/kafkas/{id}/api/v1/topics', lambda state, p, query, payload: (200, state.list_topics(kafka_id, query.get('page'), query.get('size'), query.get('filter'), query.get('order')))
+            if method == 'POST':
+                return '/kafkas/{id}/api/v1/topics', lambda state, p, query, payload: (201, state.create_topic(kafka_id, payload or {}))
+        if path.startswith('/api/v1/topics/'):
+            name = path[len('/api/v1/topics/'):]
+            template = '/kafkas/{id}/api/v1/topics/{topicName}'
+            if method == 'GET':
+                return template, lambda state, p, query, payload: (200, state.get_topic(kafka_id, name))
+            if method == 'PATCH':
+                return template, lambda state, p, query, payload: (200, state.update_topic(kafka_id, name, payload or {}))
+            if method == 'DELETE':
+                return template, lambda state, p, query, payload: (204, state.delete_topic(kafka_id, name))
+        if path == '/api/v1/acls':
+            template = '/kafkas/{id}/api/v1/acls'
+            if method == 'GET':
+                return template, lambda state, p, query, payload: (200, state.list_acls(kafka_id, query))
+            if method == 'POST':
+                return template, lambda state, p, query, payload: (201, state.create_acl(kafka_id, payload or {}))
+            if method == 'DELETE':
+                return template, lambda state, p, query, payload: (200, state.delete_acls(kafka_id, query))
+        raise MockError(404, f'No mock for {method} {path}')
+
+    def _route_control(self, method, path):
+        if path == '/__mock__/stats':
+            if method == 'GET':
+                return path, lambda state, p, query, payload: (200, state.stats)
+            if method == 'DELETE':
+                return path, lambda state, p, query, payload: (204, state.reset_stats())
+        if path == '/__mock__/reset' and method == 'POST':
+            return path, lambda state, p, query, payload: (204, state.reset())
+        if path == '/__mock__/faults':
+            if method == 'GET':
+                return path, lambda state, p, query, payload: (200, state.faults)
+            if method == 'POST':
+                def update_faults(state, p, query, payload):
+                    state.faults.update({k: v for k, v in (payload or {}).items() if k in state.faults})
+                    return 200, state.faults
+                return path, update_faults
+        if path == '/__mock__/seed' and method == 'POST':
+            return path, lambda state, p, query, payload: (201, state.seed(**(payload or {})))
+        raise MockError(404, f'No mock for {method} {path}')
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='localhost', port=0, provisioning_seconds=3.0, deprovisioning_seconds=1.0, verbose=False):
+        super().__init__((host, port), MockRequestHandler)
+        self.verbose = verbose
+        self.state = MockState(f'http://{host}:{self.server_address[1]}', provisioning_seconds, deprovisioning_seconds)
+
+    @property
+    def url(self):
+        return self.state.base_url
+
+    def start(self):
+        # Serves from a background thread, returns the server for chaining
+        self._thread = threading.Thread(target=self.serve_forever, name='rhoas-mock', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local mock of the Red Hat OpenShift Application Services APIs.')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--provisioning-seconds', type=float, default=3.0, help='time for a new Kafka instance to become ready')
+    parser.add_argument('--deprovisioning-seconds', type=float, default=1.0, help='time for a deleted Kafka instance to disappear')
+    parser.add_argument('--latency-ms', type=float, default=0, help='latency added to every API response')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0, help='random extra latency of up to this value')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='fraction of API requests answered with 429')
+    parser.add_argument('--rate-5xx', type=float, default=0.0, help='fraction of API requests answered with a 5xx error')
+    parser.add_argument('--seed-topics', type=int, default=0, help='topics created on a ready `mock-seeded` instance')
+    parser.add_argument('--seed-acls', type=int, default=0, help='ACL bindings created on a ready `mock-seeded` instance')
+    parser.add_argument('--verbose', action='store_true', help='log every request')
+    args = parser.parse_args()
+
+    server = MockServer(args.host, args.port, args.provisioning_seconds, args.deprovisioning_seconds, args.verbose)
+    server.state.faults.update(latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms, rate_429=args.rate_429, rate_5xx=args.rate_5xx)
+    if args.seed_topics or args.seed_acls:
+        seeded = server.state.seed(topics=args.seed_topics, acls=args.seed_acls)
+        print(f'Seeded instance {seeded["id"]} with {args.seed_topics} topics and {args.seed_acls} ACL bindings')
+    print(f'rhoas mock listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
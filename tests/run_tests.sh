@@ -14,8 +14,20 @@ if [ "${TESTING_ENVIRONMENT}" == "prod" ]; then
     export API_BASE_HOST="https://api.openshift.com"
 elif [ "${TESTING_ENVIRONMENT}" == "stage" ]; then
     export API_BASE_HOST="https://api.stage.openshift.com"
+elif [ "${TESTING_ENVIRONMENT}" == "mock" ]; then
+    # local stand-in for the APIs, MOCK_ARGS can inject latency and errors, e.g. "--latency-ms 50 --rate-429 0.05"
+    MOCK_PORT=${MOCK_PORT:-"8000"}
+    python mock/rhoas_mock_server.py --port ${MOCK_PORT} ${MOCK_ARGS:-} > mock.log 2>&1 &
+    MOCK_PID=$!
+    export API_BASE_HOST="http://localhost:${MOCK_PORT}"
+    export SSO_BASE_HOST="http://localhost:${MOCK_PORT}"
+    export OFFLINE_TOKEN=${OFFLINE_TOKEN:-"mock"}
+    for i in $(seq 1 50); do
+        curl -s -o /dev/null "${API_BASE_HOST}/__mock__/stats" && break
+        sleep 0.2
+    done
 else
-    echo "[ERROR] \$TESTING_ENVIRONMENT is set to '$TESTING_ENVIRONMENT'. Only possible values are 'prod' and 'stage'"
+    echo "[ERROR] \$TESTING_ENVIRONMENT is set to '$TESTING_ENVIRONMENT'. Only possible values are 'prod', 'stage' and 'mock'"
     exit 1
 export SSO_BASE_HOST="https://sso.redhat.com/auth/realms/redhat-external"
 export OFFLINE_TOKEN="${OFFLINE_TOKEN}"
@@ -29,8 +41,21 @@ export KAFKA_INSTANCE_PLAN=${KAFKA_INSTANCE_PLAN:-"developer.x1"}
 export REGION=${REGION:-"us-east-1"}
 export TOPIC_NAME=${TOPIC_NAME:-"topic-$(openssl rand -hex 4)"}
 
-# run test suite
-pytest test_suite/basic_test_suite.py --junit-xml=${JUNIT_XML_REPORT} --log-file=${LOGFILE}
+# run test suites, PYTEST_ARGS passes extra options to pytest. The basic suite shares one Kafka instance and service
+# account between TEST_WORKERS pytest-xdist workers, the startup suite measures import times and runs on its own. The
+# plugins suite runs the inventory, lookup and callback plugins with the Ansible CLIs and the daemon suite runs the
+# modules through the connection daemon, both against a mock of their own. The rate_limit suite tests the rate limiter
+# with a fake clock.
+TEST_WORKERS=${TEST_WORKERS:-"4"}
+pytest test_suite/basic_test_suite.py -n ${TEST_WORKERS} --junit-xml=${JUNIT_XML_REPORT} --log-file=${LOGFILE} ${PYTEST_ARGS:-}
+pytest test_suite/startup_test_suite.py --junit-xml=startup_${JUNIT_XML_REPORT} --log-file=startup_${LOGFILE} ${PYTEST_ARGS:-}
+pytest test_suite/plugins_test_suite.py --junit-xml=plugins_${JUNIT_XML_REPORT} --log-file=plugins_${LOGFILE} ${PYTEST_ARGS:-}
+pytest test_suite/daemon_test_suite.py --junit-xml=daemon_${JUNIT_XML_REPORT} --log-file=daemon_${LOGFILE} ${PYTEST_ARGS:-}
+pytest test_suite/rate_limit_test_suite.py --junit-xml=rate_limit_${JUNIT_XML_REPORT} --log-file=rate_limit_${LOGFILE} ${PYTEST_ARGS:-}
+
+if [ -n "${MOCK_PID:-}" ]; then
+    kill ${MOCK_PID}
+fi
 
 trap - EXIT
 set +u
@@ -1,20 +1,56 @@
-import logging, json
+import json, logging, os
 import pytest
 import test_utils
-from test_base import wrapper
+from test_base import wrapper, kafka, service_account, namespace, mock_server, mock_requests, check_delete_kafka, check_delete_service_account
 
 LOGGER = logging.getLogger(__name__)
 
+TOPIC_ENDPOINT = '/kafkas/{id}/api/v1/topics/{topicName}'
+TOPICS_ENDPOINT = '/kafkas/{id}/api/v1/topics'
+ACLS_ENDPOINT = '/kafkas/{id}/api/v1/acls'
+KAFKAS_ENDPOINT = '/api/kafkas_mgmt/v1/kafkas'
+KAFKA_ENDPOINT = '/api/kafkas_mgmt/v1/kafkas/{id}'
+JOURNAL_KAFKA_ARGS = dict(name='journal', billing_model='standard', cloud_provider='aws', region='us-east-1', plan='developer.x1', wait=False)
+
+
+def journal_events(kafka_id=None):
+    # The (event, kafka_id) of the entries of the provisioning journal, of every instance or only of kafka_id
+    with open(os.path.join(os.environ['RHOAS_CACHE_DIR'], 'provisioning-journal.ndjson')) as f:
+        entries = [json.loads(line) for line in f]
+    return [(entry['event'], entry['kafka_id']) for entry in entries if kafka_id in (None, entry['kafka_id'])]
+
+
+def acl_binding(principal, resource_name, operation, resource_type='TOPIC'):
+    return dict(resourceType=resource_type, resourceName=resource_name, patternType='LITERAL', principal=f'User:{principal}', operation=operation, permission='ALLOW')
+
+
+def acl_binding_param(binding):
+    return dict(
+        principal=binding['principal'],
+        resource_type=binding['resourceType'],
+        resource_name=binding['resourceName'],
+        pattern_type=binding['patternType'],
+        operation_type=binding['operation'],
+        permission_type=binding['permission'],
+    )
+
+
+def seed_acl_instance(mock_server):
+    # `alice` keeps one of her two bindings, `bob` loses both of his and `carol` is not in the desired list at all
+    kafka_id = mock_server.state.seed(name='acls')['id']
+    kept = acl_binding('alice', 'orders', 'READ')
+    for binding in (kept, acl_binding('alice', 'orders', 'WRITE'), acl_binding('bob', 'orders', 'READ'), acl_binding('bob', '*', 'READ', 'GROUP'), acl_binding('carol', 'orders', 'READ')):
+        mock_server.state.create_acl(kafka_id, binding)
+    return kafka_id, kept
+
 class TestBasicTestSuite:
 
-    def test_no_kafkas_available(self, wrapper):
+    def test_no_kafkas_available(self, wrapper, namespace):
+        # Other workers and suites create instances on the same account, only an empty search result is predictable
         module = 'get_kafkas'
-        ansible_output = test_utils.run_ansible_rhosak_module(module)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'SUCCESS'
-
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+        params = dict(search="name = {}-absent".format(namespace))
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
         assert dct['changed'] == False
         assert dct['env_url_error'] == ''
         assert dct['message'] is not None
@@ -24,35 +60,65 @@ class TestBasicTestSuite:
         assert dct['message']['total'] == 0
         assert dct['original_message'] == ''
 
-    def test_create_kafka_cluster(self, wrapper):
-        module = 'create_kafka'
-        params = 'name={} billing_model={} cloud_provider={} plan={} region={}'.format(pytest.KAFKA_NAME, pytest.BILLING_MODEL, pytest.CLOUD_PROVIDER, pytest.KAFKA_INSTANCE_PLAN, pytest.REGION)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
-
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+    def test_create_kafka_cluster(self, wrapper, kafka):
+        dct = kafka
+        assert test_utils.get_module_status(dct) == 'CHANGED'
         assert dct['changed'] == True
         assert dct['env_url_error'] == ''
         assert dct['kafka_admin_resp_obj'] is not None
-        pytest.KAFKA_ID = dct['kafka_admin_resp_obj']['id']
-        pytest.ADMIN_API_SERVER_URL = dct['kafka_admin_resp_obj']['admin_api_server_url']
-        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'])
+        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'], kafka)
         assert dct['kafka_admin_url'] is not None
         assert dct['kafka_id'] is not None
         assert dct['kafka_state'] == 'ready'
         assert dct['message'] == ''
         assert dct['original_message'] is not None
 
-    def test_get_kafkas(self, wrapper):
-        module = 'get_kafkas'
-        ansible_output = test_utils.run_ansible_rhosak_module(module)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'SUCCESS'
+    def test_create_existing_kafka_cluster(self, wrapper, kafka):
+        # Creating the instance again adopts the existing one
+        module = 'create_kafka'
+        params = dict(name=pytest.KAFKA_NAME, billing_model=pytest.BILLING_MODEL, cloud_provider=pytest.CLOUD_PROVIDER, plan=pytest.KAFKA_INSTANCE_PLAN, region=pytest.REGION)
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['changed'] == False
+        assert dct['env_url_error'] == ''
+        assert dct['kafka_id'] == kafka['kafka_id']
+        assert dct['kafka_state'] == 'ready'
+        assert dct['kafka_admin_url'] == kafka['kafka_admin_url']
+        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'], kafka)
+
+    @pytest.mark.skipif(not (pytest.API_BASE_HOST or '').startswith('http://localhost'), reason='trial accounts only have room for the shared Kafka instance')
+    def test_recreate_deleted_kafka_cluster(self, wrapper):
+        # The deleted instance keeps its name while it is deprovisioned, creating the name again must not adopt it
+        module = 'create_kafka'
+        params = dict(name=pytest.KAFKA_NAME + '-recreate', billing_model=pytest.BILLING_MODEL, cloud_provider=pytest.CLOUD_PROVIDER, plan=pytest.KAFKA_INSTANCE_PLAN, region=pytest.REGION)
+        created = test_utils.run_rhoas_module(module, dict(params, wait=False))
+        assert test_utils.get_module_status(created) == 'CHANGED'
+        check_delete_kafka(test_utils.run_rhoas_module('delete_kafka_by_id', dict(kafka_id=created['kafka_id'])), created['kafka_id'])
+
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['changed'] == True
+        assert dct['kafka_id'] != created['kafka_id']
+        assert dct['kafka_state'] == 'ready'
+        check_delete_kafka(test_utils.run_rhoas_module('delete_kafka_by_id', dict(kafka_id=dct['kafka_id'])), dct['kafka_id'])
+
+    def test_wait_for_kafka(self, wrapper, kafka):
+        module = 'wait_for_kafka'
+        params = dict(kafka_id=kafka['kafka_id'], wait_timeout=60)
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['changed'] == False
+        assert dct['env_url_error'] == ''
+        assert dct['kafka_id'] == kafka['kafka_id']
+        assert dct['kafka_state'] == 'ready'
+        assert dct['kafka_admin_url'] == kafka['kafka_admin_url']
+        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'], kafka)
 
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+    def test_get_kafkas(self, wrapper, kafka):
+        module = 'get_kafkas'
+        params = dict(search="name = {}".format(pytest.KAFKA_NAME))
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
         assert dct['changed'] == False
         assert dct['env_url_error'] == ''
         assert dct['message'] is not None
@@ -61,17 +127,11 @@ class TestBasicTestSuite:
         assert dct['message']['total'] == 1
         assert dct['original_message'] == ''
         item_id = dct['message']['size'] - 1
-        self.check_kafka_instance_fields(dct['message']['items'][item_id])
-
-    def test_create_service_account(self, wrapper):
-        module = 'create_service_account'
-        params = 'name={} description={}'.format(pytest.KAFKA_NAME + '_svc_acc', pytest.KAFKA_NAME + '_svc_acc_desc')
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
+        self.check_kafka_instance_fields(dct['message']['items'][item_id], kafka)
 
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+    def test_create_service_account(self, wrapper, service_account):
+        dct = service_account
+        assert test_utils.get_module_status(dct) == 'CHANGED'
         assert dct['changed'] == True
         assert dct['client_id'] is not None
         assert dct['client_secret'] is not None
@@ -84,102 +144,325 @@ class TestBasicTestSuite:
         assert dct['srvce_acc_resp_obj']['client_id'] == dct['client_id']
         assert dct['srvce_acc_resp_obj']['client_secret'] == dct['client_secret']
 
-        pytest.SVC_ACC_ID = dct['srvce_acc_resp_obj']['client_id']
-
-    def test_create_kafka_acl_binding(self, wrapper):
+    def test_create_kafka_acl_binding(self, wrapper, kafka, service_account, namespace):
         module = 'create_kafka_acl_binding'
         operation_type = "ALL"
         pattern_type = "PREFIXED"
         permission_type = "ALLOW"
         resource_type = "TOPIC"
-        params = 'kafka_id={} principal={} resource_name={} resource_type={} pattern_type={} operation_type={} permission_type={} kafka_admin_url={}'.format(pytest.KAFKA_ID, pytest.SVC_ACC_ID, pytest.TOPIC_NAME, resource_type, pattern_type, operation_type, permission_type, pytest.ADMIN_API_SERVER_URL)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
-    
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+        principal = service_account['client_id']
+        params = dict(kafka_id=kafka['kafka_id'], principal=principal, resource_name=namespace, resource_type=resource_type, pattern_type=pattern_type, operation_type=operation_type, permission_type=permission_type, kafka_admin_url=kafka['kafka_admin_url'])
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
         assert dct['changed'] == True
         assert dct['env_url_error'] == ''
         assert dct['kafka_admin_resp_obj'] == ''
-        assert dct['kafka_admin_url'] == pytest.ADMIN_API_SERVER_URL
+        assert dct['kafka_admin_url'] == kafka['kafka_admin_url']
         assert dct['message'] == 'ACL Binding Created'
         assert dct['original_message'] is not None
         assert dct['original_message']['operation'] == operation_type
         assert dct['original_message']['pattern_type'] == pattern_type
         assert dct['original_message']['permission'] == permission_type
-        assert dct['original_message']['principal'] == 'User:{}'.format(pytest.SVC_ACC_ID)
-        assert dct['original_message']['resource_name'] == pytest.TOPIC_NAME
+        assert dct['original_message']['principal'] == 'User:{}'.format(principal)
+        assert dct['original_message']['resource_name'] == namespace
         assert dct['original_message']['resource_type'] == resource_type
 
-    def test_create_kafka_topic(self, wrapper):
-        module = 'create_kafka_topic'
-        params = 'kafka_id={} topic_name={}'.format(pytest.KAFKA_ID, pytest.TOPIC_NAME)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
-
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+    def test_create_kafka_topic(self, wrapper, kafka, namespace):
+        topic_name = namespace + '-create'
+        dct = self.create_kafka_topic(kafka, topic_name)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
         assert dct['changed'] == True
         assert dct['create_topic_res_obj'] is not None
         assert dct['kafka_admin_resp_obj'] is not None
-        assert dct['kafka_admin_url'] == pytest.ADMIN_API_SERVER_URL
+        assert dct['kafka_admin_url'] == kafka['kafka_admin_url']
         assert dct['message'] == 'Topic created successfully'
         assert dct['original_message'] is not None
-        assert dct['original_message']['name'] == pytest.TOPIC_NAME
+        assert dct['original_message']['name'] == topic_name
         assert dct['original_message']['settings'] == {}
 
-        self.check_topic_fields(dct['create_topic_res_obj'])
-        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'])
+        self.check_topic_fields(dct['create_topic_res_obj'], topic_name)
+        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'], kafka)
 
-    def test_delete_kafka_topic(self, wrapper):
+    def test_delete_kafka_topic(self, wrapper, kafka, namespace):
+        # Deletes a topic of its own, the test may run in another worker than test_create_kafka_topic
+        topic_name = namespace + '-delete'
+        assert test_utils.get_module_status(self.create_kafka_topic(kafka, topic_name)) == 'CHANGED'
         module = 'delete_kafka_topic'
-        params = 'kafka_id={} topic_name={}'.format(pytest.KAFKA_ID, pytest.TOPIC_NAME)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
-
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
+        params = dict(kafka_id=kafka['kafka_id'], topic_name=topic_name)
+        dct = test_utils.run_rhoas_module(module, params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
         assert dct['changed'] == True
         assert dct['env_var'] == ''
         assert dct['kafka_admin_resp_obj'] is not None
-        assert dct['kafka_admin_url'] == pytest.ADMIN_API_SERVER_URL
+        assert dct['kafka_admin_url'] == kafka['kafka_admin_url']
         assert dct['message'] == 'Topic deleted successfully'
-        assert dct['original_message'] == 'Topic `{}` deleted successfully.'.format(pytest.TOPIC_NAME)
+        assert dct['original_message'] == 'Topic `{}` deleted successfully.'.format(topic_name)
 
-        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'])
+        self.check_kafka_instance_fields(dct['kafka_admin_resp_obj'], kafka)
 
-    def test_delete_service_account(self, wrapper):
+    def test_delete_service_account(self, wrapper, namespace):
+        # Deletes a service account of its own, the shared one is still used by other tests and deleted with the
+        # Kafka instance by the teardown, see test_base.teardown_shared_resources
+        params = dict(name='{}_svc_acc_{}'.format(pytest.KAFKA_NAME, namespace), description=pytest.KAFKA_NAME + '_svc_acc_desc')
+        created = test_utils.run_rhoas_module('create_service_account', params)
+        assert test_utils.get_module_status(created) == 'CHANGED'
+        service_account_id = created['client_id']
         module = 'delete_service_account_by_id'
-        params = 'service_account_id={}'.format(pytest.SVC_ACC_ID)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
+        params = dict(service_account_id=service_account_id)
+        dct = test_utils.run_rhoas_module(module, params)
+        check_delete_service_account(dct, service_account_id)
 
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
-        assert dct['changed'] == True
-        assert dct['env_url_error'] == ''
-        assert dct['message'] == ''
-        assert dct['original_message'] == 'Deleting Service Account with ID: {}'.format(pytest.SVC_ACC_ID)
+    def test_kafka_topics_exclusive(self, wrapper, mock_server):
+        # Only the unlisted topics are deleted, internal topics and the `__` ones Kafka keeps its state in are spared
+        kafka_id = mock_server.state.seed(name='topics')['id']
+        for name in ('kept', 'unlisted'):
+            mock_server.state.seed_topic(kafka_id, name)
+        mock_server.state.seed_topic(kafka_id, '__consumer_offsets')
+        mock_server.state.seed_topic(kafka_id, 'internal', internal=True)
+        params = dict(kafka_id=kafka_id, exclusive=True, topics=[dict(name='kept'), dict(name='created')])
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert {topic['name']: topic['status'] for topic in dct['topics']} == dict(kept='unchanged', created='created', unlisted='deleted')
+        assert dct['message'] == '1 topics created, 0 updated, 1 deleted, 1 unchanged, 0 failed'
+        assert sorted(mock_server.state.topics[kafka_id]) == ['__consumer_offsets', 'created', 'internal', 'kept']
 
-    def test_delete_kafka_by_id(self, wrapper):
-        module = 'delete_kafka_by_id'
-        params = 'kafka_id={}'.format(pytest.KAFKA_ID)
-        ansible_output = test_utils.run_ansible_rhosak_module(module, params)
-        ansible_output_status = test_utils.get_ansible_response_status(ansible_output)
-        assert ansible_output_status == 'CHANGED'
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert [topic['status'] for topic in dct['topics']] == ['unchanged', 'unchanged']
 
-        response_json = test_utils.format_ansible_response_to_json(ansible_output)
-        dct = json.loads(response_json)
-        assert dct['changed'] == True
-        assert dct['env_var_error'] == ''
-        assert dct['message'] == 'Kafka instance deleted'
-        assert dct['original_message'] == 'Kafka instance with ID: {} set for deletion'.format(pytest.KAFKA_ID)
-    
-    def check_kafka_instance_fields(self, kafka_obj):
+    def test_kafka_topics_absent(self, wrapper, mock_server):
+        kafka_id = mock_server.state.seed(name='topics')['id']
+        for name in ('deleted', 'kept'):
+            mock_server.state.seed_topic(kafka_id, name)
+        params = dict(kafka_id=kafka_id, state='absent', topics=[dict(name='deleted'), dict(name='missing')])
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert [(topic['name'], topic['status']) for topic in dct['topics']] == [('deleted', 'deleted'), ('missing', 'unchanged')]
+        assert sorted(mock_server.state.topics[kafka_id]) == ['kept']
+
+        mock_server.state.reset_stats()
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['message'] == '0 topics created, 0 updated, 0 deleted, 2 unchanged, 0 failed'
+        assert mock_requests(mock_server, 'DELETE') == []
+
+    def test_kafka_topics_update_sends_changed_settings(self, wrapper, mock_server):
+        kafka_id = mock_server.state.seed(name='topics')['id']
+        mock_server.state.seed_topic(kafka_id, 'orders', partitions=2, config={'retention.ms': '86400000'})
+        params = dict(kafka_id=kafka_id, topics=[dict(name='orders', partitions=2, retention_period_ms='86400000', cleanup_policy='compact')])
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['topics'][0]['status'] == 'updated'
+        assert dct['topics'][0]['changes'] == {'config': {'cleanup.policy': dict(before='delete', after='compact')}}
+        updates = mock_requests(mock_server, 'PATCH', TOPIC_ENDPOINT)
+        assert [update['payload'] for update in updates] == [{'config': [dict(key='cleanup.policy', value='compact')]}]
+        assert mock_server.state.topics[kafka_id]['orders']['config']['retention.ms'] == '86400000'
+
+    def test_kafka_topics_partitions_cannot_decrease(self, wrapper, mock_server):
+        kafka_id = mock_server.state.seed(name='topics')['id']
+        mock_server.state.seed_topic(kafka_id, 'orders', partitions=3)
+        dct = test_utils.run_rhoas_module('kafka_topics', dict(kafka_id=kafka_id, topics=[dict(name='orders', partitions=1)]))
+        assert test_utils.get_module_status(dct) == 'FAILED'
+        assert dct['msg'] == 'Failed to apply 1 of 1 kafka topic changes'
+        assert dct['topics'][0]['status'] == 'failed'
+        assert dct['topics'][0]['msg'] == 'The number of partitions of a topic cannot be decreased from 3 to 1'
+        assert mock_requests(mock_server, 'PATCH') == []
+        assert mock_server.state.topics[kafka_id]['orders']['partitions'] == 3
+
+    def test_kafka_topics_check_mode(self, wrapper, mock_server):
+        kafka_id = mock_server.state.seed(name='topics')['id']
+        mock_server.state.seed_topic(kafka_id, 'updated')
+        mock_server.state.seed_topic(kafka_id, 'unlisted')
+        params = dict(kafka_id=kafka_id, exclusive=True, topics=[dict(name='created'), dict(name='updated', partitions=2)], _ansible_check_mode=True)
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert {topic['name']: topic['status'] for topic in dct['topics']} == dict(created='created', updated='updated', unlisted='deleted')
+        assert [request for request in mock_requests(mock_server) if request['method'] != 'GET'] == []
+        assert sorted(mock_server.state.topics[kafka_id]) == ['unlisted', 'updated']
+        assert mock_server.state.topics[kafka_id]['updated']['partitions'] == 1
+
+    def test_kafka_acls_exclusive(self, wrapper, mock_server):
+        kafka_id, kept = seed_acl_instance(mock_server)
+        params = dict(kafka_id=kafka_id, exclusive=True, bindings=[acl_binding_param(kept)])
+        dct = test_utils.run_rhoas_module('kafka_acls', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['message'] == '0 ACL bindings created, 4 deleted, 1 unchanged, 0 failed'
+        assert mock_server.state.acls[kafka_id] == [kept]
+        # `bob` is removed with a single principal filter, `alice` shares her principal with the kept binding
+        filters = [request['query'] for request in mock_requests(mock_server, 'DELETE', ACLS_ENDPOINT)]
+        assert dict(principal='User:bob') in filters
+        assert all(f.get('principal') != 'User:alice' or f.get('operation') == 'WRITE' for f in filters)
+        assert sorted(f['count'] for f in dct['delete_filters']) == [1, 1, 2]
+
+        mock_server.state.reset_stats()
+        dct = test_utils.run_rhoas_module('kafka_acls', params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['message'] == '0 ACL bindings created, 0 deleted, 1 unchanged, 0 failed'
+        assert mock_requests(mock_server, 'DELETE') == []
+
+    def test_kafka_acls_exclusive_principals(self, wrapper, mock_server):
+        kafka_id, kept = seed_acl_instance(mock_server)
+        params = dict(kafka_id=kafka_id, exclusive=True, exclusive_principals=['alice', 'User:carol'], bindings=[acl_binding_param(kept)])
+        dct = test_utils.run_rhoas_module('kafka_acls', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['message'] == '0 ACL bindings created, 2 deleted, 1 unchanged, 0 failed'
+        assert [binding['principal'] for binding in mock_server.state.acls[kafka_id]] == ['User:alice', 'User:bob', 'User:bob']
+        filters = [request['query'] for request in mock_requests(mock_server, 'DELETE', ACLS_ENDPOINT)]
+        assert dict(principal='User:carol') in filters
+        assert dict(principal='User:alice') not in filters
+
+    def test_kafka_acls_check_mode(self, wrapper, mock_server):
+        kafka_id, kept = seed_acl_instance(mock_server)
+        created = acl_binding('dave', 'orders', 'READ')
+        bindings = list(mock_server.state.acls[kafka_id])
+        params = dict(kafka_id=kafka_id, exclusive=True, bindings=[acl_binding_param(kept), acl_binding_param(created)], _ansible_check_mode=True, _ansible_diff=True)
+        dct = test_utils.run_rhoas_module('kafka_acls', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['message'] == '1 ACL bindings created, 4 deleted, 1 unchanged, 0 failed'
+        assert dct['diff']['after'] == 'User:dave ALLOW READ on TOPIC LITERAL orders\n'
+        assert dct['diff']['before'].splitlines() == [
+            'User:bob ALLOW READ on GROUP LITERAL *',
+            'User:alice ALLOW WRITE on TOPIC LITERAL orders',
+            'User:bob ALLOW READ on TOPIC LITERAL orders',
+            'User:carol ALLOW READ on TOPIC LITERAL orders',
+        ]
+        assert sum(f['count'] for f in dct['delete_filters']) == 4
+        assert [request for request in mock_requests(mock_server) if request['method'] != 'GET'] == []
+        assert mock_server.state.acls[kafka_id] == bindings
+
+    def test_get_kafkas_all_pages(self, wrapper, mock_server):
+        for i in range(120):
+            mock_server.state.seed(name=f'paged-{i:03d}')
+        params = dict(all_pages=True, size='50', fields=['id', 'name', 'status'], concurrency=2)
+        dct = test_utils.run_rhoas_module('get_kafkas', params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['message']['total'] == 120
+        assert dct['message']['size'] == 120
+        assert [kafka['name'] for kafka in dct['message']['items']] == [f'paged-{i:03d}' for i in range(120)]
+        assert all(sorted(kafka) == ['id', 'name', 'status'] for kafka in dct['message']['items'])
+        assert sorted(request['query']['page'] for request in mock_requests(mock_server, 'GET', KAFKAS_ENDPOINT)) == ['1', '2', '3']
+
+    def test_get_kafkas_page(self, wrapper, mock_server):
+        for i in range(3):
+            mock_server.state.seed(name=f'paged-{i:03d}')
+        dct = test_utils.run_rhoas_module('get_kafkas', dict(page='2', size='2'))
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert (dct['message']['page'], dct['message']['size'], dct['message']['total']) == (2, 1, 3)
+        # The instance is returned as the API sent it, not converted by the SDK models
+        assert dct['message']['items'] == mock_server.state.list_kafkas('3', '1', None, None)['items']
+
+    def test_kafka_topics_profile(self, wrapper, mock_server, monkeypatch, tmp_path):
+        profile_file = tmp_path / 'profile.ndjson'
+        monkeypatch.setenv('RHOAS_PROFILE_FILE', str(profile_file))
+        kafka_id = mock_server.state.seed(name='profile')['id']
+        params = dict(kafka_id=kafka_id, topics=[dict(name='orders')], profile=True)
+        dct = test_utils.run_rhoas_module('kafka_topics', params)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        timings = dct['timings']
+        # The profile is added next to the timings the module returns itself
+        assert {'total_ms', 'phases', 'calls', 'total', 'list', 'apply'} <= set(timings)
+        assert sorted(timings['phases']) == ['auth', 'execute', 'resolve', 'wait']
+        assert timings['phases']['resolve'] > 0
+        calls = [(call['method'], call['endpoint'], call['status'], call['phase']) for call in timings['calls']]
+        assert calls == [
+            ('GET', '/api/kafkas_mgmt/v1/kafkas/{id}', 200, 'resolve'),
+            ('GET', '/api/v1/topics', 200, 'execute'),
+            ('POST', '/api/v1/topics', 201, 'execute'),
+        ]
+        assert all(sorted(call) == ['endpoint', 'latency_ms', 'method', 'phase', 'retries', 'status'] for call in timings['calls'])
+
+        # Without the option the task is not profiled
+        dct = test_utils.run_rhoas_module('kafka_topics', dict(params, profile=False))
+        assert not {'total_ms', 'phases', 'calls'} & set(dct['timings'])
+
+        lines = [json.loads(line) for line in profile_file.read_text().splitlines()]
+        assert len(lines) == 1
+        assert (lines[0]['module'], lines[0]['changed'], lines[0]['failed']) == ('kafka_topics', True, False)
+        assert lines[0]['calls'] == timings['calls']
+        assert lines[0]['phases'] == timings['phases']
+
+    def test_create_kafka_adopt_mismatch(self, wrapper, mock_server):
+        kafka = mock_server.state.seed(name='adopted')
+        params = dict(name='adopted', billing_model='standard', cloud_provider='aws', region='us-east-1', plan='standard.x1', wait=False)
+        dct = test_utils.run_rhoas_module('create_kafka', params)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['kafka_id'] == kafka['id']
+
+        dct = test_utils.run_rhoas_module('create_kafka', dict(params, region='eu-west-1', plan='developer.x1'))
+        assert test_utils.get_module_status(dct) == 'FAILED'
+        assert dct['msg'] == 'Kafka instance `adopted` with ID: {} already exists with plan `standard.x1` instead of `developer.x1`, region `us-east-1` instead of `eu-west-1`. Delete it or use another name.'.format(kafka['id'])
+        assert mock_requests(mock_server, 'POST', KAFKAS_ENDPOINT) == []
+
+        dct = test_utils.run_rhoas_module('kafkas', dict(kafkas=[dict(name='adopted'), dict(name='created')], billing_model='standard', cloud_provider='gcp', region='us-east-1', plan='standard.x1', wait=False))
+        assert test_utils.get_module_status(dct) == 'FAILED'
+        assert [(result['name'], result['status']) for result in dct['kafkas']] == [('adopted', 'failed'), ('created', 'created')]
+        assert dct['kafkas'][0]['msg'] == 'Kafka instance `adopted` with ID: {} already exists with cloud_provider `aws` instead of `gcp`. Delete it or use another name.'.format(kafka['id'])
+
+    def test_create_kafka_journal_resume(self, wrapper, mock_server):
+        mock_server.state.provisioning_seconds = 600
+        kafka_id = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)['kafka_id']
+
+        # The re-runs poll the instance of the journal instead of creating or searching for one
+        mock_server.state.reset_stats()
+        dct = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert dct['kafka_id'] == kafka_id
+        assert dct['kafka_state'] != 'ready'
+
+        mock_server.state.provisioning_seconds = 0
+        dct = test_utils.run_rhoas_module('create_kafka', dict(JOURNAL_KAFKA_ARGS, wait=True))
+        assert test_utils.get_module_status(dct) == 'SUCCESS'
+        assert (dct['kafka_id'], dct['kafka_state']) == (kafka_id, 'ready')
+        assert mock_requests(mock_server, 'POST') == []
+        assert mock_requests(mock_server, 'GET', KAFKAS_ENDPOINT) == []
+        assert journal_events() == [('requested', kafka_id), ('resumed', kafka_id), ('resumed', kafka_id)]
+
+    @pytest.mark.parametrize('deprovisioning_seconds', [0, 600])
+    def test_create_kafka_journal_gone(self, wrapper, mock_server, deprovisioning_seconds):
+        # An instance deleted elsewhere is gone, whether it no longer exists or is still being deleted
+        mock_server.state.deprovisioning_seconds = deprovisioning_seconds
+        kafka_id = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)['kafka_id']
+        mock_server.state.delete_kafka(kafka_id)
+
+        dct = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert dct['kafka_id'] != kafka_id
+        assert journal_events() == [('requested', kafka_id), ('gone', kafka_id), ('requested', dct['kafka_id'])]
+
+    def test_delete_kafka_closes_journal(self, wrapper, mock_server):
+        kafka_id = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)['kafka_id']
+        dct = test_utils.run_rhoas_module('delete_kafka_by_id', dict(kafka_id=kafka_id))
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert journal_events() == [('requested', kafka_id), ('deleted', kafka_id)]
+
+        # The deleted instance is not looked up again
+        mock_server.state.reset_stats()
+        dct = test_utils.run_rhoas_module('create_kafka', JOURNAL_KAFKA_ARGS)
+        assert test_utils.get_module_status(dct) == 'CHANGED'
+        assert mock_requests(mock_server, 'GET', KAFKA_ENDPOINT) == []
+        assert journal_events(dct['kafka_id']) == [('requested', dct['kafka_id'])]
+
+    def test_journal_read_once(self, wrapper, mock_server, monkeypatch):
+        journal = test_utils.import_module_utils('journal')
+        requested = journal.journal_event('requested', 'journal', 'first', 'host', 'accepted')
+        journal.journal_event('status', 'journal', 'first', 'host', 'provisioning', elapsed_seconds=1.0)
+        reads = []
+        read_journal = journal.read_journal
+        monkeypatch.setattr(journal, 'read_journal', lambda: reads.append(1) or read_journal())
+
+        entry = journal.find_journal_instance('journal', 'host')
+        assert (entry['event'], entry['kafka_id'], entry['requested_time']) == ('status', 'first', requested['time'])
+        record_status = journal.status_recorder('journal', 'first', 'host', 'provisioning', entry['requested_time'])
+        record_status(dict(status='ready'))
+        assert len(reads) == 1
+        assert journal.read_journal()[-1]['elapsed_seconds'] is not None
+
+    def create_kafka_topic(self, kafka, topic_name):
+        module = 'create_kafka_topic'
+        params = dict(kafka_id=kafka['kafka_id'], topic_name=topic_name)
+        return test_utils.run_rhoas_module(module, params)
+
+    def check_kafka_instance_fields(self, kafka_obj, kafka):
         assert kafka_obj['admin_api_server_url'] is not None
         assert kafka_obj['billing_model'] is not None
         assert kafka_obj['bootstrap_server_host'] is not None
@@ -218,15 +501,15 @@ class TestBasicTestSuite:
         assert kafka_obj['instance_type_name'] == 'Trial'
         assert kafka_obj['name'] == pytest.KAFKA_NAME
         assert kafka_obj['region'] == pytest.REGION
-        assert kafka_obj['id'] == pytest.KAFKA_ID
-        assert kafka_obj['admin_api_server_url'] == pytest.ADMIN_API_SERVER_URL
+        assert kafka_obj['id'] == kafka['kafka_id']
+        assert kafka_obj['admin_api_server_url'] == kafka['kafka_admin_url']
 
-    def check_topic_fields(self, topic_obj):
+    def check_topic_fields(self, topic_obj, topic_name):
         assert topic_obj['config'] is not None
-        assert topic_obj['href'] == '/api/v1/topics/{}'.format(pytest.TOPIC_NAME)
-        assert topic_obj['id'] == pytest.TOPIC_NAME
+        assert topic_obj['href'] == '/api/v1/topics/{}'.format(topic_name)
+        assert topic_obj['id'] == topic_name
         assert topic_obj['is_internal'] == False
         assert topic_obj['kind'] =='Topic'
-        assert topic_obj['name'] == pytest.TOPIC_NAME
+        assert topic_obj['name'] == topic_name
         assert topic_obj['partitions'] is not None
         
\ No newline at end of file
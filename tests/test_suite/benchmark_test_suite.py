@@ -0,0 +1,144 @@
+import json, logging, os, platform, statistics, sys
+import pytest
+import test_utils
+from test_base import wrapper
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mock'))
+from rhoas_mock_server import MockServer
+
+LOGGER = logging.getLogger(__name__)
+
+BENCHMARK_BASELINE = os.getenv('BENCHMARK_BASELINE', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmark_baseline.json'))
+BENCHMARK_RESULTS = os.getenv('BENCHMARK_RESULTS', 'benchmark_results.json')
+# Write the results of this run to the baseline instead of comparing against it
+BENCHMARK_UPDATE_BASELINE = os.getenv('BENCHMARK_UPDATE_BASELINE', 'false').lower() == 'true'
+# Every task runs this many times from a clean mock, the median wall time and the largest peak RSS are kept
+BENCHMARK_ROUNDS = int(os.getenv('BENCHMARK_ROUNDS', '3'))
+# A metric regresses when it exceeds the baseline by more than this fraction, plus the noise allowance below
+BENCHMARK_REGRESSION_THRESHOLD = float(os.getenv('BENCHMARK_REGRESSION_THRESHOLD', '0.25'))
+BENCHMARK_NOISE_ALLOWANCE = dict(wall_ms=100, requests=0, bytes=0, peak_rss_kb=4096)
+
+# Numbers of topics and ACL bindings the declarative modules are measured with
+BENCHMARK_SCALES = (1, 10, 100, 1000)
+
+KAFKA_ARGS = dict(billing_model='standard', cloud_provider='aws', plan='developer.x1', region='us-east-1')
+ACL_BINDING_ARGS = dict(resource_type='topic', resource_name='benchmark', pattern_type='literal', operation_type='read', permission_type='allow')
+
+def seed_kafka(state, topics=0):
+    return state.seed(name='benchmark', topics=topics)['id']
+
+def seed_kafkas(state, count):
+    for i in range(count):
+        state.seed(name='benchmark-{}'.format(i))
+    return dict()
+
+def seed_service_account(state):
+    return state.create_service_account(dict(name='benchmark'))['id']
+
+def topic_names(count):
+    return ['benchmark-{:04d}'.format(i) for i in range(count)]
+
+def acl_principals(count):
+    return ['srvc-acct-{:04d}'.format(i) for i in range(count)]
+
+def kafka_topics_args(state, count, existing):
+    kafka_id = seed_kafka(state)
+    for name in topic_names(count)[:existing]:
+        state.create_topic(kafka_id, dict(name=name))
+    return dict(kafka_id=kafka_id, topics=[dict(name=name) for name in topic_names(count)])
+
+def kafka_acls_args(state, count, existing):
+    kafka_id = seed_kafka(state)
+    for principal in acl_principals(count)[:existing]:
+        state.create_acl(kafka_id, dict(resourceType='TOPIC', resourceName='benchmark', patternType='LITERAL', principal='User:' + principal, operation='READ', permission='ALLOW'))
+    return dict(kafka_id=kafka_id, bindings=[dict(ACL_BINDING_ARGS, principal=principal) for principal in acl_principals(count)])
+
+# Benchmark name -> (module, function preparing the mock and returning the module args)
+BENCHMARK_TASKS = {
+    'create_kafka': ('create_kafka', lambda state: dict(KAFKA_ARGS, name='benchmark', wait=False)),
+    'wait_for_kafka': ('wait_for_kafka', lambda state: dict(kafka_id=seed_kafka(state))),
+    'get_kafkas': ('get_kafkas', lambda state: seed_kafkas(state, 3)),
+    'kafkas': ('kafkas', lambda state: dict(KAFKA_ARGS, kafkas=[dict(name='benchmark-{}'.format(i)) for i in range(3)], wait=False)),
+    'delete_kafka_by_id': ('delete_kafka_by_id', lambda state: dict(kafka_id=seed_kafka(state))),
+    'create_kafka_topic': ('create_kafka_topic', lambda state: dict(kafka_id=seed_kafka(state), topic_name='benchmark')),
+    'update_kafka_topic': ('update_kafka_topic', lambda state: dict(kafka_id=seed_kafka(state, topics=1), topic_name='topic-000000', partitions=8)),
+    'delete_kafka_topic': ('delete_kafka_topic', lambda state: dict(kafka_id=seed_kafka(state, topics=1), topic_name='topic-000000')),
+    'create_kafka_acl_binding': ('create_kafka_acl_binding', lambda state: dict(ACL_BINDING_ARGS, kafka_id=seed_kafka(state), principal='benchmark')),
+    'create_service_account': ('create_service_account', lambda state: dict(name='benchmark', description='benchmark')),
+    'delete_service_account_by_id': ('delete_service_account_by_id', lambda state: dict(service_account_id=seed_service_account(state))),
+}
+for count in BENCHMARK_SCALES:
+    # `create` starts from an empty instance, `unchanged` from one that already has everything declared
+    BENCHMARK_TASKS['kafka_topics/create/{}'.format(count)] = ('kafka_topics', lambda state, count=count: kafka_topics_args(state, count, 0))
+    BENCHMARK_TASKS['kafka_topics/unchanged/{}'.format(count)] = ('kafka_topics', lambda state, count=count: kafka_topics_args(state, count, count))
+    BENCHMARK_TASKS['kafka_acls/create/{}'.format(count)] = ('kafka_acls', lambda state, count=count: kafka_acls_args(state, count, 0))
+    BENCHMARK_TASKS['kafka_acls/unchanged/{}'.format(count)] = ('kafka_acls', lambda state, count=count: kafka_acls_args(state, count, count))
+
+@pytest.fixture(scope='session')
+def mock_server():
+    # Instances are created ready so that no benchmark measures the provisioning timeline of the mock
+    server = MockServer(provisioning_seconds=0, deprovisioning_seconds=0).start()
+    yield server
+    server.stop()
+
+@pytest.fixture(scope='session')
+def benchmark_results():
+    results = dict(
+        environment=dict(python=platform.python_version(), platform=platform.platform(), rounds=BENCHMARK_ROUNDS),
+        tasks={},
+    )
+    yield results
+    with open(BENCHMARK_UPDATE_BASELINE and BENCHMARK_BASELINE or BENCHMARK_RESULTS, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+@pytest.fixture(scope='session')
+def benchmark_baseline():
+    if BENCHMARK_UPDATE_BASELINE or not os.path.isfile(BENCHMARK_BASELINE):
+        return {}
+    with open(BENCHMARK_BASELINE) as f:
+        return json.load(f)['tasks']
+
+def run_benchmark(mock_server, tmp_path, module, prepare):
+    env = dict(os.environ, API_BASE_HOST=mock_server.url, SSO_BASE_HOST=mock_server.url, OFFLINE_TOKEN='mock', RHOAS_DAEMON='false')
+    rounds = []
+    for i in range(BENCHMARK_ROUNDS):
+        # Every round starts cold: a clean mock and an empty cache directory, so the admin URL lookup is part of
+        # each measurement
+        workdir = tmp_path / 'round-{}'.format(i)
+        workdir.mkdir()
+        env['RHOAS_CACHE_DIR'] = str(workdir / 'cache')
+        mock_server.state.reset()
+        module_args = prepare(mock_server.state)
+        mock_server.state.reset_stats()
+        result, wall_ms, peak_rss_kb = test_utils.run_module_measured(module, module_args, str(workdir), env)
+        assert not result.get('failed'), result
+        stats = mock_server.state.stats
+        rounds.append(dict(wall_ms=wall_ms, requests=stats['requests'], bytes=stats['bytes_in'] + stats['bytes_out'], peak_rss_kb=peak_rss_kb, status=dict(stats['status'])))
+    return dict(
+        module=module,
+        wall_ms=round(statistics.median(r['wall_ms'] for r in rounds), 1),
+        requests=max(r['requests'] for r in rounds),
+        bytes=max(r['bytes'] for r in rounds),
+        peak_rss_kb=max(r['peak_rss_kb'] for r in rounds),
+        status=rounds[-1]['status'],
+    )
+
+class TestBenchmarkTestSuite:
+
+    @pytest.mark.parametrize('name', list(BENCHMARK_TASKS))
+    def test_benchmark(self, wrapper, mock_server, benchmark_results, benchmark_baseline, tmp_path, name):
+        module, prepare = BENCHMARK_TASKS[name]
+        measured = run_benchmark(mock_server, tmp_path, module, prepare)
+        benchmark_results['tasks'][name] = measured
+        LOGGER.info('{}: {wall_ms} ms, {requests} requests, {bytes} bytes, {peak_rss_kb} KiB peak RSS'.format(name, **measured))
+
+        baseline = benchmark_baseline.get(name)
+        if baseline is None:
+            return
+        regressions = []
+        for metric, allowance in BENCHMARK_NOISE_ALLOWANCE.items():
+            limit = baseline[metric] * (1 + BENCHMARK_REGRESSION_THRESHOLD) + allowance
+            if measured[metric] > limit:
+                regressions.append('{} {} > {:.0f} (baseline {})'.format(metric, measured[metric], limit, baseline[metric]))
+        assert not regressions, '{} regressed: {}'.format(name, ', '.join(regressions))
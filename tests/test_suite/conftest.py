@@ -0,0 +1,26 @@
+import os, shutil, tempfile
+import pytest
+import test_base
+
+def is_xdist_worker(config):
+    return hasattr(config, 'workerinput')
+
+def pytest_configure(config):
+    # The controller creates the directory the workers share their resources through, the workers it starts inherit
+    # the variable
+    if is_xdist_worker(config) or os.getenv('RHOAS_TEST_STATE_DIR'):
+        return
+    os.environ['RHOAS_TEST_STATE_DIR'] = tempfile.mkdtemp(prefix='rhoas-tests-')
+    config.add_cleanup(lambda: shutil.rmtree(os.environ.pop('RHOAS_TEST_STATE_DIR'), True))
+
+def pytest_sessionfinish(session, exitstatus):
+    # Bulk teardown, in the controller once every worker is done
+    if is_xdist_worker(session.config):
+        return
+    failures = test_base.teardown_shared_resources()
+    if failures:
+        reporter = session.config.pluginmanager.get_plugin('terminalreporter')
+        reporter.ensure_newline()
+        for failure in failures:
+            reporter.write_line('Teardown failed: {}'.format(failure), red=True)
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
@@ -0,0 +1,74 @@
+import logging, os, signal, socket, stat, struct, subprocess, sys, time
+import pytest
+import test_utils
+from test_base import wrapper, mock_server
+
+LOGGER = logging.getLogger(__name__)
+
+CONNECTION_DAEMON = os.path.join(test_utils.get_collection_root(), 'ansible_collections', 'rhoas', 'rhoas', 'plugins', 'module_utils', 'connection_daemon.py')
+
+def daemon_pid(socket_path):
+    # Pid of the process listening on the socket, None when nothing accepts connections
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        pid, _, _ = struct.unpack('3i', sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+        return pid
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+def stop_daemon(socket_path):
+    pid = daemon_pid(socket_path)
+    if pid is not None:
+        os.kill(pid, signal.SIGTERM)
+        while daemon_pid(socket_path) is not None:
+            time.sleep(0.05)
+
+@pytest.fixture
+def daemon_socket(mock_server, monkeypatch, tmp_path):
+    # The modules of the test share a connection daemon listening in the cache directory, stopped afterwards
+    monkeypatch.setenv('RHOAS_DAEMON', 'true')
+    socket_path = os.path.join(os.environ['RHOAS_CACHE_DIR'], 'daemon.sock')
+    yield socket_path
+    stop_daemon(socket_path)
+
+def run_topics_task(mock_server, workdir, kafka_id, topic_name):
+    result, _, _ = test_utils.run_module_measured('kafka_topics', dict(kafka_id=kafka_id, topics=[dict(name=topic_name)]), workdir)
+    assert test_utils.get_module_status(result) == 'CHANGED', result
+    assert topic_name in mock_server.state.topics[kafka_id]
+
+def test_daemon_tasks(wrapper, mock_server, daemon_socket, tmp_path):
+    kafka_id = mock_server.state.seed(name='daemon')['id']
+    run_topics_task(mock_server, tmp_path, kafka_id, 'first')
+    pid = daemon_pid(daemon_socket)
+    assert pid is not None
+    # The socket gives access to the cached tokens, only the current user may connect to it
+    assert stat.S_IMODE(os.stat(daemon_socket).st_mode) == 0o600
+
+    run_topics_task(mock_server, tmp_path, kafka_id, 'second')
+    assert daemon_pid(daemon_socket) == pid
+
+def test_daemon_restarted(wrapper, mock_server, daemon_socket, tmp_path):
+    kafka_id = mock_server.state.seed(name='daemon')['id']
+    run_topics_task(mock_server, tmp_path, kafka_id, 'first')
+    pid = daemon_pid(daemon_socket)
+    stop_daemon(daemon_socket)
+
+    # The next task starts a new daemon in place of the one that has gone away
+    run_topics_task(mock_server, tmp_path, kafka_id, 'second')
+    assert daemon_pid(daemon_socket) not in (None, pid)
+
+def test_daemon_idle_shutdown(wrapper, tmp_path):
+    socket_path = str(tmp_path / 'daemon.sock')
+    daemon = subprocess.Popen([sys.executable, CONNECTION_DAEMON, socket_path, '0.5', '2'])
+    try:
+        deadline = time.monotonic() + 10
+        while daemon_pid(socket_path) != daemon.pid:
+            assert time.monotonic() < deadline, 'the connection daemon did not start listening'
+            time.sleep(0.05)
+        assert daemon.wait(timeout=10) == 0
+    finally:
+        daemon.kill()
+    assert not os.path.exists(socket_path)
@@ -0,0 +1,93 @@
+import json, logging, os, sys, textwrap
+import test_utils
+from test_base import wrapper, mock_server, mock_requests
+
+LOGGER = logging.getLogger(__name__)
+
+KAFKAS_ENDPOINT = '/api/kafkas_mgmt/v1/kafkas'
+
+def trusted_value(value):
+    # `ansible-inventory` marks the variables set by inventory plugins as unsafe in its JSON output
+    return value['__ansible_unsafe'] if isinstance(value, dict) and '__ansible_unsafe' in value else value
+
+def test_inventory(wrapper, mock_server, tmp_path):
+    kafka = mock_server.state.seed(name='inventory')
+    inventory = tmp_path / 'inventory.rhoas_kafka.yml'
+    inventory.write_text('\n'.join([
+        'plugin: rhoas.rhoas.kafka',
+        'cache: true',
+        'cache_plugin: ansible.builtin.jsonfile',
+        'cache_connection: {}'.format(tmp_path / 'inventory-cache'),
+        'cache_timeout: 600',
+    ]))
+
+    listing = json.loads(test_utils.run_ansible_cli('inventory', ['-i', str(inventory), '--list'], str(tmp_path)).stdout)
+    for group in ('rhoas_kafka', 'cloud_provider_aws', 'region_us_east_1', 'status_ready'):
+        assert listing[group]['hosts'] == ['inventory'], group
+    hostvars = {name: trusted_value(value) for name, value in listing['_meta']['hostvars']['inventory'].items()}
+    assert hostvars['kafka_id'] == kafka['id']
+    assert hostvars['kafka_name'] == 'inventory'
+    assert hostvars['ansible_connection'] == 'local'
+    assert hostvars['admin_api_server_url'] == kafka['admin_api_server_url']
+    assert len(mock_requests(mock_server, 'GET', KAFKAS_ENDPOINT)) == 1
+
+    # The second run reads the instances from the inventory cache
+    mock_server.state.reset_stats()
+    cached = json.loads(test_utils.run_ansible_cli('inventory', ['-i', str(inventory), '--list'], str(tmp_path)).stdout)
+    assert cached == listing
+    assert mock_requests(mock_server) == []
+
+def test_lookup_requests(wrapper, mock_server, tmp_path):
+    # 100 references, across tasks, loop items and forks, to a ready instance and to one that is still provisioning
+    ready_id = mock_server.state.seed(name='lookup-ready')['id']
+    mock_server.state.provisioning_seconds = 600
+    provisioning_id = mock_server.state.create_kafka(dict(name='lookup-provisioning', cloud_provider='aws', region='us-east-1', plan='standard.x1'))['id']
+    playbook = tmp_path / 'lookup.yml'
+    playbook.write_text(textwrap.dedent('''
+        - hosts: localhost
+          gather_facts: false
+          tasks:
+            - ansible.builtin.assert:
+                that: "lookup('rhoas.rhoas.kafka', ready_id, field='status') == 'ready'"
+              loop: "{{ range(50) | list }}"
+            - ansible.builtin.assert:
+                that: "lookup('rhoas.rhoas.kafka', provisioning_id, field='status') != 'ready'"
+              loop: "{{ range(50) | list }}"
+    '''))
+    test_utils.run_ansible_cli('playbook', [str(playbook), '-e', 'ready_id={} provisioning_id={}'.format(ready_id, provisioning_id)], str(tmp_path))
+    assert mock_server.state.stats['requests'] == 1
+    assert len(mock_requests(mock_server, 'GET', KAFKAS_ENDPOINT)) == 1
+
+def test_profile_callback(wrapper, mock_server, tmp_path):
+    kafka_id = mock_server.state.seed(name='profile')['id']
+    output_file = tmp_path / 'profile.json'
+    playbook = tmp_path / 'profile.yml'
+    playbook.write_text(textwrap.dedent('''
+        - hosts: localhost
+          gather_facts: false
+          tasks:
+            - rhoas.rhoas.kafka_topics:
+                kafka_id: "{{ kafka_id }}"
+                topics: "{{ [{'name': item}] }}"
+              loop: [orders, payments]
+            - rhoas.rhoas.kafka_topics:
+                kafka_id: "{{ kafka_id }}"
+                topics:
+                  - name: orders
+                  - name: payments
+    '''))
+    env = dict(os.environ, ANSIBLE_CALLBACKS_ENABLED='rhoas.rhoas.rhoas_profile', RHOAS_PROFILE_OUTPUT=str(output_file))
+    args = [str(playbook), '-e', 'kafka_id={} ansible_python_interpreter={}'.format(kafka_id, sys.executable)]
+    process = test_utils.run_ansible_cli('playbook', args, str(tmp_path), env)
+    assert 'RHOAS PROFILE' in process.stdout
+
+    summary = json.loads(output_file.read_text())
+    assert summary['tasks'] == 3
+    assert sorted(summary['phases_ms']) == ['auth', 'execute', 'resolve', 'wait']
+    assert summary['endpoints']['POST /api/v1/topics']['calls'] == 2
+    assert summary['endpoints']['GET /api/v1/topics']['calls'] == 3
+    for stat in summary['endpoints'].values():
+        assert 0 < stat['p50_ms'] <= stat['p95_ms'] <= stat['p99_ms']
+    assert summary['calls'] == sum(stat['calls'] for stat in summary['endpoints'].values())
+    assert summary['mutations_ms'] == round(summary['endpoints']['POST /api/v1/topics']['total_ms'], 1)
+    assert [task['task'] for task in summary['slowest_tasks']].count('rhoas.rhoas.kafka_topics') == 1
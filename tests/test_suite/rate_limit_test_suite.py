@@ -0,0 +1,76 @@
+import logging
+import pytest
+import test_utils
+from test_base import wrapper, mock_server
+
+LOGGER = logging.getLogger(__name__)
+
+rate_limit = test_utils.import_module_utils('rate_limit')
+
+class FakeClock:
+    # Stands in for the `time` module of rate_limit, sleeping moves the clock forward
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch, tmp_path):
+    monkeypatch.setenv('RHOAS_CACHE_DIR', str(tmp_path))
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, 'time', clock)
+    return clock
+
+@pytest.mark.parametrize('value, rate_limits', [
+    ('api.openshift.com=10', [('api.openshift.com', 10.0, 10.0)]),
+    ('API.openshift.com=0.5', [('api.openshift.com', 0.5, 1.0)]),
+    (' api.openshift.com = 10/20 ,*.openshiftapps.com=5/1,', [('api.openshift.com', 10.0, 20.0), ('*.openshiftapps.com', 5.0, 1.0)]),
+    ('', []),
+])
+def test_parse_rate_limits(wrapper, value, rate_limits):
+    assert rate_limit.parse_rate_limits(value) == rate_limits
+
+@pytest.mark.parametrize('value', ['api.openshift.com', '=10', 'api.openshift.com=fast', 'api.openshift.com=10/many', 'api.openshift.com=0', 'api.openshift.com=10/0.5'])
+def test_parse_rate_limits_malformed(wrapper, value):
+    with pytest.raises(ValueError, match='Invalid RHOAS_RATE_LIMIT entry'):
+        rate_limit.parse_rate_limits(value)
+
+def test_rate_limit_matches_host(wrapper, monkeypatch):
+    monkeypatch.setenv('RHOAS_RATE_LIMIT', 'api.openshift.com=10,*.openshiftapps.com=5/8,localhost:8000=1')
+    assert rate_limit.get_rate_limit('API.openshift.com') == (10.0, 10.0)
+    assert rate_limit.get_rate_limit('admin-server-x.openshiftapps.com:443') == (5.0, 8.0)
+    assert rate_limit.get_rate_limit('localhost:8000') == (1.0, 1.0)
+    assert rate_limit.get_rate_limit('localhost:8001') is None
+    assert rate_limit.get_rate_limit('sso.redhat.com') is None
+
+def test_rate_limit_burst(wrapper, monkeypatch, clock):
+    monkeypatch.setenv('RHOAS_RATE_LIMIT', 'api.openshift.com=2/3')
+    url = 'https://api.openshift.com/api/kafkas_mgmt/v1/kafkas'
+    # The burst goes through at once, then every request waits for its turn at the rate
+    assert [rate_limit.acquire(url) for _ in range(3)] == [0, 0, 0]
+    assert rate_limit.acquire(url) == pytest.approx(0.5)
+    assert rate_limit.acquire(url) == pytest.approx(0.5)
+    assert clock.slept == [pytest.approx(0.5), pytest.approx(0.5)]
+
+    # Requests queued by other tasks at the same time wait behind each other in the shared state file
+    clock.now += 10
+    assert [rate_limit.acquire(url) for _ in range(3)] == [0, 0, 0]
+    clock.sleep = lambda seconds: None
+    assert [rate_limit.acquire(url) for _ in range(3)] == [pytest.approx(0.5), pytest.approx(1.0), pytest.approx(1.5)]
+
+    # Other hosts are not limited
+    assert rate_limit.acquire('https://sso.redhat.com/auth') == 0
+
+def test_rate_limit_malformed_module_error(wrapper, mock_server, monkeypatch):
+    monkeypatch.setenv('RHOAS_RATE_LIMIT', 'localhost=fast')
+    kafka_id = mock_server.state.seed(name='rate-limit')['id']
+    dct = test_utils.run_rhoas_module('kafka_topics', dict(kafka_id=kafka_id, topics=[dict(name='orders')]))
+    assert test_utils.get_module_status(dct) == 'FAILED'
+    assert 'Invalid RHOAS_RATE_LIMIT entry `localhost=fast`' in dct['msg']
+    assert mock_server.state.topics[kafka_id] == {}
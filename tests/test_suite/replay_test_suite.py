@@ -0,0 +1,127 @@
+import json, logging, os, sys
+import pytest
+import test_utils
+from test_base import wrapper
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mock'))
+from rhoas_mock_server import MockServer
+
+LOGGER = logging.getLogger(__name__)
+
+CASSETTE_DIR = os.getenv('CASSETTE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cassettes'))
+# Record the cassettes again against the local mock instead of replaying them
+CASSETTE_RECORD = os.getenv('CASSETTE_RECORD', 'false').lower() == 'true'
+# Scale of the recorded latencies and poll intervals when replaying, 1 replays the original timing
+CASSETTE_TIMING = os.getenv('CASSETTE_TIMING', '0')
+# Replays never connect anywhere, nothing listens on the discard port
+REPLAY_API_BASE_HOST = 'http://localhost:9'
+# The modules only exchange the offline token with SSO when the API is not on `http://localhost`
+REPLAY_SSO_API_BASE_HOST = 'http://127.0.0.1:9'
+SSO_TOKEN_CALL = 'POST /auth/realms/{realm}/protocol/openid-connect/token'
+
+KAFKA_ARGS = dict(billing_model='standard', cloud_provider='aws', plan='developer.x1', region='us-east-1')
+ACL_BINDING_ARGS = dict(resource_type='topic', resource_name='replay', pattern_type='prefixed', operation_type='read', permission_type='allow')
+
+def create_kafka_scenario(run):
+    kafka = run('create_kafka', dict(KAFKA_ARGS, name='replay-create'))
+    run('wait_for_kafka', dict(kafka_id=kafka['kafka_id']))
+    run('get_kafkas', dict(search='name = replay-create'))
+    run('delete_kafka_by_id', dict(kafka_id=kafka['kafka_id']))
+
+def topics_scenario(run):
+    kafka_id = run('create_kafka', dict(KAFKA_ARGS, name='replay-topics'))['kafka_id']
+    run('create_kafka_topic', dict(kafka_id=kafka_id, topic_name='replay'))
+    run('update_kafka_topic', dict(kafka_id=kafka_id, topic_name='replay', partitions=2))
+    run('kafka_topics', dict(kafka_id=kafka_id, topics=[dict(name='replay-{}'.format(i)) for i in range(10)]))
+    run('delete_kafka_topic', dict(kafka_id=kafka_id, topic_name='replay'))
+
+def acls_scenario(run):
+    kafka_id = run('create_kafka', dict(KAFKA_ARGS, name='replay-acls'))['kafka_id']
+    principal = run('create_service_account', dict(name='replay-acls', description='replay'))['client_id']
+    run('create_kafka_acl_binding', dict(ACL_BINDING_ARGS, kafka_id=kafka_id, principal=principal))
+    run('kafka_acls', dict(kafka_id=kafka_id, bindings=[dict(ACL_BINDING_ARGS, principal=principal, operation_type=operation) for operation in ('read', 'write', 'describe')]))
+
+def service_accounts_scenario(run):
+    service_account = run('create_service_account', dict(name='replay', description='replay'))
+    run('delete_service_account_by_id', dict(service_account_id=service_account['client_id']))
+
+# Cassette name -> (seconds the mock takes to provision an instance, tasks run against it). The scenarios take the ids
+# they need from the results of earlier tasks, which come from the cassette when it is replayed.
+SCENARIOS = {
+    'create_kafka': (8, create_kafka_scenario),
+    'topics': (0, topics_scenario),
+    'acls': (0, acls_scenario),
+    'service_accounts': (0, service_accounts_scenario),
+    'sso': (0, service_accounts_scenario),
+}
+# Scenarios replayed with the offline token exchanged through SSO, the first task of the run exchanges it and the
+# others take it from the token cache
+SSO_SCENARIOS = ('sso',)
+
+def run_scenario(scenario, tmp_path, env):
+    def run(module, module_args):
+        result, wall_ms, _ = test_utils.run_module_measured(module, module_args, str(tmp_path), env)
+        assert not result.get('failed'), result
+        LOGGER.info('{}: {} ms'.format(module, wall_ms))
+        return result
+    scenario(run)
+
+def record_access_token(server, cassette, monkeypatch):
+    # The SSO client always connects to sso.redhat.com, so modules recorded against the mock never exchange the offline
+    # token. The exchange is recorded in this process with the SSO client pointed at the mock instead.
+    test_utils.get_inprocess_runner()
+    import auth.rhoas_auth
+    from ansible_collections.rhoas.rhoas.plugins.module_utils.common import get_access_token
+    with monkeypatch.context() as patch:
+        patch.setattr(auth.rhoas_auth, 'DEFAULT_AUTH_URL', server.url + '/auth/')
+        patch.setenv('RHOAS_CASSETTE', cassette)
+        patch.setenv('RHOAS_CASSETTE_MODE', 'record')
+        assert get_access_token('mock')['access_token']
+
+def record(name, tmp_path, monkeypatch):
+    provisioning_seconds, scenario = SCENARIOS[name]
+    tmp_path.mkdir()
+    server = MockServer(provisioning_seconds=provisioning_seconds, deprovisioning_seconds=0).start()
+    try:
+        cassette = os.path.join(CASSETTE_DIR, name + '.ndjson.gz')
+        if os.path.exists(cassette):
+            os.unlink(cassette)
+        if name in SSO_SCENARIOS:
+            record_access_token(server, cassette, monkeypatch)
+        env = dict(os.environ, API_BASE_HOST=server.url, SSO_BASE_HOST=server.url, OFFLINE_TOKEN='mock', RHOAS_DAEMON='false',
+                   RHOAS_CACHE_DIR=str(tmp_path / 'cache'), RHOAS_CASSETTE=cassette, RHOAS_CASSETTE_MODE='record')
+        run_scenario(scenario, tmp_path, env)
+        test_utils.get_inprocess_runner()
+        from ansible_collections.rhoas.rhoas.plugins.module_utils.cassette import compact_cassette
+        compact_cassette(cassette)
+    finally:
+        server.stop()
+
+def replay(name, tmp_path):
+    report = tmp_path / 'report.json'
+    host = REPLAY_SSO_API_BASE_HOST if name in SSO_SCENARIOS else REPLAY_API_BASE_HOST
+    env = dict(os.environ, API_BASE_HOST=host, SSO_BASE_HOST=host, OFFLINE_TOKEN='mock', RHOAS_DAEMON='false',
+               RHOAS_CACHE_DIR=str(tmp_path / 'cache'), RHOAS_CASSETTE=os.path.join(CASSETTE_DIR, name + '.ndjson.gz'),
+               RHOAS_CASSETTE_MODE='replay', RHOAS_CASSETTE_TIMING=CASSETTE_TIMING, RHOAS_CASSETTE_REPORT=str(report))
+    run_scenario(SCENARIOS[name][1], tmp_path, env)
+    with open(report) as f:
+        return json.load(f)
+
+class TestReplayTestSuite:
+
+    @pytest.mark.parametrize('name', sorted(SCENARIOS))
+    def test_replay(self, wrapper, tmp_path, monkeypatch, name):
+        if CASSETTE_RECORD:
+            record(name, tmp_path / 'record', monkeypatch)
+        report = replay(name, tmp_path)
+        LOGGER.info('{}: {requests} requests replayed, {recorded_requests} recorded'.format(name, **report))
+
+        # Requests made in another order, or not at all, are as much of a change as additional ones
+        assert report['unmatched'] == []
+        assert report['repeated'] == 0
+        changed = {call: counts for call, counts in report['endpoints'].items() if counts['replayed'] != counts['recorded']}
+        assert not changed, '{} made a different number of API calls than recorded: {}'.format(name, json.dumps(changed, sort_keys=True))
+        if name in SSO_SCENARIOS:
+            assert report['endpoints'][SSO_TOKEN_CALL] == dict(recorded=1, replayed=1)
+        else:
+            assert SSO_TOKEN_CALL not in report['endpoints']
@@ -0,0 +1,63 @@
+import json, logging, os
+import pytest
+import test_utils
+from test_base import wrapper
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bound in milliseconds for the time a module spends importing Python modules, including the SDK imports
+# made on the code path of the task
+STARTUP_IMPORT_BUDGET_MS = int(os.getenv('STARTUP_IMPORT_BUDGET_MS', '350'))
+
+# Modules that must not be imported when the task runs against the mock: the SSO client is only needed to exchange
+# an offline token and python-dotenv only when there is a `.env` file to read
+MOCK_RUN_EXCLUDED_IMPORTS = ('auth.rhoas_auth', 'keycloak', 'dotenv')
+
+KAFKA_ID = 'startup-benchmark'
+
+STARTUP_MODULE_ARGS = {
+    'create_kafka': dict(name='startup-benchmark', billing_model='standard', cloud_provider='aws', plan='developer.x1', region='us-east-1', wait=False),
+    'wait_for_kafka': dict(kafka_id=KAFKA_ID, wait_timeout=1),
+    'get_kafkas': dict(),
+    'kafkas': dict(kafkas=[dict(name='startup-benchmark')], billing_model='standard', cloud_provider='aws', plan='developer.x1', region='us-east-1', wait=False),
+    'delete_kafka_by_id': dict(kafka_id=KAFKA_ID),
+    'create_kafka_topic': dict(kafka_id=KAFKA_ID, topic_name='startup-benchmark'),
+    'update_kafka_topic': dict(kafka_id=KAFKA_ID, topic_name='startup-benchmark', partitions=2),
+    'delete_kafka_topic': dict(kafka_id=KAFKA_ID, topic_name='startup-benchmark'),
+    'kafka_topics': dict(kafka_id=KAFKA_ID, topics=[dict(name='startup-benchmark')]),
+    'create_kafka_acl_binding': dict(kafka_id=KAFKA_ID, principal='startup-benchmark', resource_type='topic', resource_name='startup-benchmark', pattern_type='literal', operation_type='read', permission_type='allow'),
+    'kafka_acls': dict(kafka_id=KAFKA_ID, bindings=[dict(principal='startup-benchmark', resource_type='topic', resource_name='startup-benchmark', pattern_type='literal', operation_type='read', permission_type='allow')]),
+    'create_service_account': dict(name='startup-benchmark', description='startup-benchmark'),
+    'delete_service_account_by_id': dict(service_account_id='startup-benchmark'),
+}
+
+def is_local_mock(host):
+    return (host or '').startswith('http://localhost')
+
+@pytest.mark.skipif(not (is_local_mock(pytest.API_BASE_HOST) and is_local_mock(pytest.SSO_BASE_HOST)), reason='the startup benchmark runs the modules against the local mock')
+class TestStartupTestSuite:
+
+    @pytest.mark.parametrize('module', sorted(STARTUP_MODULE_ARGS))
+    def test_module_startup_imports(self, wrapper, tmp_path, module):
+        import_times = test_utils.run_module_with_importtime(module, STARTUP_MODULE_ARGS[module], tmp_path)
+        total_ms = sum(self_us for self_us, _ in import_times.values()) / 1000
+        slowest = sorted(import_times.items(), key=lambda item: item[1][1], reverse=True)[:5]
+        LOGGER.info('{}: {:.1f} ms importing modules, slowest: {}'.format(module, total_ms, json.dumps({name: cumulative_us for name, (_, cumulative_us) in slowest})))
+
+        for excluded in MOCK_RUN_EXCLUDED_IMPORTS:
+            assert excluded not in import_times, '{} imported {}'.format(module, excluded)
+        assert total_ms <= STARTUP_IMPORT_BUDGET_MS
+
+    @pytest.mark.parametrize('module', ['create_kafka_topic', 'update_kafka_topic', 'delete_kafka_topic', 'kafka_topics', 'create_kafka_acl_binding', 'kafka_acls'])
+    def test_admin_url_skips_mgmt_sdk(self, wrapper, tmp_path, module):
+        module_args = dict(STARTUP_MODULE_ARGS[module], kafka_admin_url=pytest.API_BASE_HOST)
+        import_times = test_utils.run_module_with_importtime(module, module_args, tmp_path)
+        assert 'rhoas_kafka_instance_sdk' in import_times
+        assert 'rhoas_kafka_mgmt_sdk' not in import_times
+
+    @pytest.mark.parametrize('module_utils', ['topics', 'acls'])
+    def test_module_utils_defer_sdk_imports(self, wrapper, tmp_path, module_utils):
+        # The modules import their module_utils before parsing their arguments, the SDK is only imported once used
+        import_times = test_utils.run_with_importtime(['-c', 'import ansible_collections.rhoas.rhoas.plugins.module_utils.{}'.format(module_utils)], tmp_path)
+        assert 'ansible_collections.rhoas.rhoas.plugins.module_utils.{}'.format(module_utils) in import_times
+        assert 'rhoas_kafka_instance_sdk' not in import_times
@@ -1,5 +1,9 @@
-import os
+import fcntl, json, os, sys
 import pytest, logging
+import test_utils
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mock'))
+from rhoas_mock_server import MockServer
 
 LOGGER = logging.getLogger(__name__)
 
@@ -11,6 +15,7 @@ pytest.KAFKA_INSTANCE_PLAN = os.getenv('KAFKA_INSTANCE_PLAN')
 pytest.CLOUD_PROVIDER = os.getenv('CLOUD_PROVIDER')
 pytest.REGION = os.getenv('REGION')
 pytest.API_BASE_HOST = os.getenv('API_BASE_HOST')
+pytest.SSO_BASE_HOST = os.getenv('SSO_BASE_HOST')
 
 @pytest.fixture(scope="session")
 def wrapper(request):
@@ -22,9 +27,115 @@ def wrapper(request):
     LOGGER.info('    - CLOUD_PROVIDER: {}'.format(pytest.CLOUD_PROVIDER))
     LOGGER.info('    - REGION: {}'.format(pytest.REGION))
     LOGGER.info('    - API_BASE_HOST: {}'.format(pytest.API_BASE_HOST))
+    LOGGER.info('    - SSO_BASE_HOST: {}'.format(pytest.SSO_BASE_HOST))
 
     def teardown():
         LOGGER.info('FINISH')
     request.addfinalizer(teardown)
     
     return
+
+# Resources shared by every test of a run are created once, by whichever pytest-xdist worker asks for them first, and
+# deleted in bulk by `teardown_shared_resources` when all workers are done. The workers find each other's resources
+# through RHOAS_TEST_STATE_DIR, set up by conftest.py.
+
+def shared_resource(name, create):
+    # Returns the result of create, called only once per run across all workers. Failed results are shared too, so a
+    # failed provisioning is not retried by every test.
+    path = os.path.join(os.environ['RHOAS_TEST_STATE_DIR'], name + '.json')
+    with open(path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        result = create()
+        with open(path, 'w') as f:
+            json.dump(result, f)
+        return result
+
+def read_shared_resource(name):
+    path = os.path.join(os.environ['RHOAS_TEST_STATE_DIR'], name + '.json')
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def create_kafka():
+    params = dict(name=pytest.KAFKA_NAME, billing_model=pytest.BILLING_MODEL, cloud_provider=pytest.CLOUD_PROVIDER, plan=pytest.KAFKA_INSTANCE_PLAN, region=pytest.REGION)
+    return test_utils.run_rhoas_module('create_kafka', params)
+
+def create_service_account():
+    params = dict(name=pytest.KAFKA_NAME + '_svc_acc', description=pytest.KAFKA_NAME + '_svc_acc_desc')
+    return test_utils.run_rhoas_module('create_service_account', params)
+
+@pytest.fixture(scope="session")
+def kafka():
+    # Result of `create_kafka` for the Kafka instance of the run, ready when returned
+    return shared_resource('kafka', create_kafka)
+
+@pytest.fixture(scope="session")
+def service_account():
+    # Result of `create_service_account` for the service account of the run
+    return shared_resource('service_account', create_service_account)
+
+@pytest.fixture(scope="session")
+def namespace():
+    # Prefix of the topics and ACLs of this worker, so workers never touch each other's resources
+    return '{}-{}'.format(pytest.TOPIC_NAME, os.getenv('PYTEST_XDIST_WORKER', 'main'))
+
+# Settings of the collection a test against its own mock starts without, whatever the environment of the run sets
+MOCK_SERVER_CLEARED_ENV = ('RHOAS_CASSETTE', 'RHOAS_JOURNAL', 'RHOAS_PROFILE', 'RHOAS_PROFILE_FILE', 'RHOAS_RATE_LIMIT', 'RHOAS_TOKEN_CACHE')
+
+@pytest.fixture
+def mock_server(monkeypatch, tmp_path):
+    # A local mock of the test's own, for tests that seed data or check the requests a task made whichever environment
+    # the suite runs against. The modules run by the test are pointed at it and get a cache directory of their own.
+    server = MockServer(provisioning_seconds=0, deprovisioning_seconds=0).start()
+    for name in MOCK_SERVER_CLEARED_ENV:
+        monkeypatch.delenv(name, raising=False)
+    env = dict(API_BASE_HOST=server.url, SSO_BASE_HOST=server.url, OFFLINE_TOKEN='mock', RHOAS_DAEMON='false', RHOAS_CACHE_DIR=str(tmp_path / 'rhoas-cache'))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    yield server
+    server.stop()
+
+def mock_requests(server, method=None, endpoint=None):
+    # The API requests the mock received since it was started or its stats were reset
+    return [request for request in server.state.requests
+            if (method is None or request['method'] == method) and (endpoint is None or request['endpoint'] == endpoint)]
+
+def check_delete_service_account(dct, service_account_id):
+    assert test_utils.get_module_status(dct) == 'CHANGED'
+    assert dct['changed'] == True
+    assert dct['env_url_error'] == ''
+    assert dct['message'] == ''
+    assert dct['original_message'] == 'Deleting Service Account with ID: {}'.format(service_account_id)
+
+def check_delete_kafka(dct, kafka_id):
+    assert test_utils.get_module_status(dct) == 'CHANGED'
+    assert dct['changed'] == True
+    assert dct['env_var_error'] == ''
+    assert dct['message'] == 'Kafka instance deleted'
+    assert dct['original_message'] == 'Kafka instance with ID: {} set for deletion'.format(kafka_id)
+
+def teardown_shared_resources():
+    # Deletes the shared service account and Kafka instance, which takes the topics and ACLs of every worker with it.
+    # Returns the failures, the caller reports them once the tests are done.
+    failures = []
+    service_account = read_shared_resource('service_account')
+    if service_account and service_account.get('client_id'):
+        service_account_id = service_account['client_id']
+        dct = test_utils.run_rhoas_module('delete_service_account_by_id', dict(service_account_id=service_account_id))
+        try:
+            check_delete_service_account(dct, service_account_id)
+        except AssertionError:
+            failures.append('delete_service_account_by_id {}: {}'.format(service_account_id, json.dumps(dct)))
+    kafka = read_shared_resource('kafka')
+    if kafka and kafka.get('kafka_id'):
+        kafka_id = kafka['kafka_id']
+        dct = test_utils.run_rhoas_module('delete_kafka_by_id', dict(kafka_id=kafka_id))
+        try:
+            check_delete_kafka(dct, kafka_id)
+        except AssertionError:
+            failures.append('delete_kafka_by_id {}: {}'.format(kafka_id, json.dumps(dct)))
+    return failures
@@ -1,5 +1,5 @@
 import subprocess, logging, re
-import shlex
+import json, os, shlex, sys
 
 LOGGER = logging.getLogger(__name__)
 
@@ -30,3 +30,121 @@ def run_ansible_rhosak_module(module, params=''):
         command += ' -a \'{}\''.format(params)
     LOGGER.info(command)
     return run_ansible_command(command)
+
+def get_module_status(result):
+    # The status `ansible localhost -m` prints for a module result
+    if result.get('failed'):
+        return 'FAILED'
+    return 'CHANGED' if result.get('changed') else 'SUCCESS'
+
+def run_rhoas_module(module, module_args=None):
+    # Runs the module and returns its result as a dict. By default the module runs in the pytest process, importing
+    # the collection from this checkout, so no Ansible CLI is started and the collection does not need to be built
+    # and installed. RHOAS_TEST_RUNNER=cli runs it with `ansible localhost -m` against the installed collection.
+    module_args = module_args or {}
+    if os.getenv('RHOAS_TEST_RUNNER', 'inprocess') == 'cli':
+        ansible_output = run_ansible_rhosak_module(module, json.dumps(module_args) if module_args else '')
+        return json.loads(format_ansible_response_to_json(ansible_output))
+    LOGGER.info('{} {}'.format(module, json.dumps(module_args)))
+    output, rc = get_inprocess_runner()(module, module_args)
+    LOGGER.debug(output)
+    # Some modules print SDK errors before their result, like Ansible only the JSON line is parsed
+    result = json.loads(output.strip().splitlines()[-1])
+    assert rc == 0 or result.get('failed'), output
+    return result
+
+_inprocess_runner = None
+_collection_root = None
+
+def get_inprocess_runner():
+    # `run_module_in_process` of the collection, imported from this checkout like an installed collection
+    global _inprocess_runner
+    if _inprocess_runner is None:
+        sys.path.insert(0, get_collection_root())
+        from ansible_collections.rhoas.rhoas.plugins.plugin_utils.inprocess import run_module_in_process
+        _inprocess_runner = run_module_in_process
+    return _inprocess_runner
+
+def import_module_utils(name):
+    # A module_utils module of the collection, imported from this checkout like the in-process runner does
+    import importlib
+    get_inprocess_runner()
+    return importlib.import_module('ansible_collections.rhoas.rhoas.plugins.module_utils.{}'.format(name))
+
+def get_collection_root():
+    # Collections path with this checkout as rhoas.rhoas, through a temporary `ansible_collections/rhoas/rhoas` link,
+    # so the modules resolve their relative imports like an installed collection without building and installing it
+    global _collection_root
+    if _collection_root is None:
+        import atexit, shutil, tempfile
+        checkout = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        collections_root = tempfile.mkdtemp(prefix='rhoas-collection-')
+        os.makedirs(os.path.join(collections_root, 'ansible_collections', 'rhoas'))
+        os.symlink(checkout, os.path.join(collections_root, 'ansible_collections', 'rhoas', 'rhoas'))
+        atexit.register(shutil.rmtree, collections_root, True)
+        _collection_root = collections_root
+    return _collection_root
+
+def run_module_with_importtime(module, module_args, workdir):
+    # Runs the module in a new interpreter with `-X importtime` from an empty working directory. Returns the
+    # self and cumulative import time in microseconds of every imported Python module, keyed by module name.
+    args_file = os.path.join(workdir, 'args.json')
+    with open(args_file, 'w') as f:
+        json.dump(dict(ANSIBLE_MODULE_ARGS=module_args), f)
+    return run_with_importtime(['-m', 'ansible_collections.rhoas.rhoas.plugins.modules.{}'.format(module), args_file], workdir)
+
+def run_with_importtime(args, workdir):
+    # Runs the interpreter with `-X importtime` and the given arguments, see run_module_with_importtime
+    env = dict(os.environ, PYTHONPATH=get_collection_root())
+    command = [sys.executable, '-X', 'importtime'] + args
+    LOGGER.info(' '.join(command))
+    process = subprocess.run(command, cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    LOGGER.debug(process.stdout.decode('utf-8'))
+
+    import_times = {}
+    for line in process.stderr.decode('utf-8').splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| (.*)$', line)
+        if match:
+            import_times[match.group(3).strip()] = (int(match.group(1)), int(match.group(2)))
+    assert import_times, process.stderr.decode('utf-8')
+    return import_times
+
+def run_module_measured(module, module_args, workdir, env=None):
+    # Runs the module in a new interpreter from an empty working directory, like Ansible runs it on the controller.
+    # Returns the module result, the wall time in milliseconds and the peak RSS of the interpreter in KiB.
+    import time
+    args_file = os.path.join(workdir, 'args.json')
+    output_file = os.path.join(workdir, 'output.json')
+    with open(args_file, 'w') as f:
+        json.dump(dict(ANSIBLE_MODULE_ARGS=module_args), f)
+    env = dict(os.environ if env is None else env, PYTHONPATH=get_collection_root())
+    command = [sys.executable, '-m', 'ansible_collections.rhoas.rhoas.plugins.modules.{}'.format(module), args_file]
+    LOGGER.debug(' '.join(command))
+    with open(output_file, 'w') as output:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=workdir, env=env, stdout=output, stderr=subprocess.STDOUT)
+        # wait4 reports the resource usage of this child alone, unlike getrusage(RUSAGE_CHILDREN)
+        _, status, rusage = os.wait4(process.pid, 0)
+        wall_ms = (time.perf_counter() - start) * 1000
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in KiB on Linux but in bytes on macOS
+    peak_rss_kb = rusage.ru_maxrss // 1024 if sys.platform == 'darwin' else rusage.ru_maxrss
+    with open(output_file) as f:
+        output = f.read()
+    LOGGER.debug(output)
+    try:
+        result = json.loads(output[output.index('{'):])
+    except ValueError:
+        raise AssertionError('{} did not return JSON: {}'.format(module, output))
+    return result, wall_ms, peak_rss_kb
+
+def run_ansible_cli(cli, args, workdir, env=None):
+    # Runs an Ansible CLI, e.g. `inventory` or `playbook`, with the interpreter of the tests and this checkout as the
+    # rhoas.rhoas collection. Returns the completed process, stdout and stderr decoded.
+    env = dict(os.environ if env is None else env, ANSIBLE_COLLECTIONS_PATH=get_collection_root())
+    command = [sys.executable, '-m', 'ansible.cli.{}'.format(cli)] + args
+    LOGGER.info(' '.join(command))
+    process = subprocess.run(command, cwd=workdir, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    LOGGER.debug(process.stdout)
+    assert process.returncode == 0, process.stdout + process.stderr
+    return process